@@ -0,0 +1,79 @@
+"""
+Benchmark cold `FormData()` construction time.
+
+Every sample runs in a fresh interpreter so nothing is cached between runs.
+The import time is measured separately from the construction time.
+
+Usage:
+
+```
+python benchmarks/bench_formdata.py --runs 5
+```
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+
+SAMPLE = """
+import time
+start = time.perf_counter()
+from survey123py.form import FormData
+imported = time.perf_counter()
+FormData("{version}")
+done = time.perf_counter()
+print(imported - start, done - imported)
+"""
+
+
+def run_samples(version: str, runs: int):
+    import_times = []
+    construct_times = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", SAMPLE.format(version=version)],
+            cwd=REPO_DIR, capture_output=True, text=True, check=True,
+        ).stdout.split()
+        import_times.append(float(output[-2]))
+        construct_times.append(float(output[-1]))
+    return import_times, construct_times
+
+
+def report(title: str, import_times, construct_times):
+    print(title)
+    print(f"  import:    median {statistics.median(import_times) * 1000:8.1f} ms")
+    print(f"  FormData(): median {statistics.median(construct_times) * 1000:8.1f} ms "
+          f"(min {min(construct_times) * 1000:.1f} ms, max {max(construct_times) * 1000:.1f} ms)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cold FormData() construction.")
+    parser.add_argument("-v", "--version", type=str, default="3.22", help="Template version to use (e.g., 3.22).")
+    parser.add_argument("-n", "--runs", type=int, default=5, help="Number of fresh interpreters to sample.")
+    args = parser.parse_args()
+
+    sys.path.insert(0, str(REPO_DIR))
+    from survey123py.templates import TEMPLATE_PATHS, build_snapshot
+
+    snapshot_path = TEMPLATE_PATHS[args.version]["snapshot"]
+    existing_snapshot = snapshot_path.read_bytes() if snapshot_path.exists() else None
+    try:
+        if snapshot_path.exists():
+            snapshot_path.unlink()
+        report("Without snapshot (.xlsx)", *run_samples(args.version, args.runs))
+
+        build_snapshot(args.version)
+        report("With snapshot", *run_samples(args.version, args.runs))
+    finally:
+        # Leave the snapshot as it was before the benchmark
+        if existing_snapshot is None:
+            snapshot_path.unlink(missing_ok=True)
+        else:
+            snapshot_path.write_bytes(existing_snapshot)
+
+
+if __name__ == "__main__":
+    main()
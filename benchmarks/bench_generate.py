@@ -0,0 +1,74 @@
+"""
+Benchmark `FormData.load_yaml` and `FormData.save_survey` on a large synthetic form.
+
+Usage:
+
+```
+python benchmarks/bench_generate.py --questions 5000 --choices 20000
+```
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import yaml
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_DIR))
+
+from survey123py.form import FormData
+
+
+def make_form(questions: int, choices: int) -> dict:
+    survey = []
+    for i in range(questions):
+        question = {
+            "type": "select_one assets" if i % 10 == 0 else "text",
+            "name": f"q{i}",
+            "label": f"Question {i}",
+            "hint": f"Hint for question {i}",
+        }
+        if i % 3 == 0:
+            question["required"] = True
+        if i % 5 == 0 and i > 0:
+            question["relevant"] = f"${{q{i - 1}}} != ''"
+        survey.append(question)
+    return {
+        "settings": {"form_title": "Benchmark", "instance_name": "Benchmark"},
+        "choices": [{"list_name": "assets", "name": f"asset_{i}", "label": f"Asset {i}"} for i in range(choices)],
+        "survey": [{"type": "group", "name": "grp", "label": "Group", "children": survey}],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark YAML to Excel generation.")
+    parser.add_argument("-q", "--questions", type=int, default=5000, help="Number of survey questions.")
+    parser.add_argument("-c", "--choices", type=int, default=20000, help="Number of choice rows.")
+    parser.add_argument("-v", "--version", type=str, default="3.22", help="Template version to use (e.g., 3.22).")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        yaml_path = os.path.join(tmp_dir, "form.yaml")
+        xlsx_path = os.path.join(tmp_dir, "form.xlsx")
+        with open(yaml_path, "w") as f:
+            yaml.safe_dump(make_form(args.questions, args.choices), f)
+
+        start = time.perf_counter()
+        survey = FormData(args.version)
+        constructed = time.perf_counter()
+        survey.load_yaml(yaml_path)
+        loaded = time.perf_counter()
+        survey.save_survey(xlsx_path)
+        saved = time.perf_counter()
+
+    print(f"{args.questions} questions, {args.choices} choices")
+    print(f"  FormData():    {(constructed - start) * 1000:9.1f} ms")
+    print(f"  load_yaml():   {(loaded - constructed) * 1000:9.1f} ms")
+    print(f"  save_survey(): {(saved - loaded) * 1000:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
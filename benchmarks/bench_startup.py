@@ -0,0 +1,66 @@
+"""
+Benchmark cold start time of the package and the CLI.
+
+Every sample runs in a fresh interpreter so nothing is cached between runs.
+Each sample also reports whether the heavy dependencies were imported.
+
+Usage:
+
+```
+python benchmarks/bench_startup.py --runs 5
+```
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+
+# Dependencies that only some commands and classes need
+HEAVY_MODULES = ("pandas", "openpyxl", "pyxform", "arcgis")
+
+SAMPLES = {
+    "import survey123py": "import survey123py",
+    "import survey123py.formulas": "import survey123py.formulas",
+    "main.py --help": "import sys; sys.argv = ['main.py', '--help']; import main\ntry:\n    main.main()\nexcept SystemExit:\n    pass",
+}
+
+SAMPLE = """
+import sys, time
+start = time.perf_counter()
+{code}
+elapsed = time.perf_counter() - start
+print(elapsed, ",".join(name for name in {heavy!r} if name in sys.modules))
+"""
+
+
+def run_samples(code: str, runs: int):
+    times = []
+    loaded = ""
+    for _ in range(runs):
+        start = time.perf_counter()
+        output = subprocess.run(
+            [sys.executable, "-c", SAMPLE.format(code=code, heavy=HEAVY_MODULES)],
+            cwd=REPO_DIR, capture_output=True, text=True, check=True,
+        ).stdout.splitlines()[-1].split(" ")
+        times.append(time.perf_counter() - start)
+        loaded = output[1] if len(output) > 1 else ""
+    return times, loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cold start of survey123py and the CLI.")
+    parser.add_argument("-n", "--runs", type=int, default=5, help="Number of fresh interpreters to sample.")
+    args = parser.parse_args()
+
+    for title, code in SAMPLES.items():
+        times, loaded = run_samples(code, args.runs)
+        print(f"{title}: median {statistics.median(times) * 1000:8.1f} ms "
+              f"(min {min(times) * 1000:.1f} ms), heavy modules loaded: {loaded or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,9 @@
 import argparse
 import sys
 import getpass
-from survey123py.form import FormData
+
+# Each command imports the modules it needs, so commands that do not publish do not
+# load the ArcGIS Python API and `--help` does not load pandas
 
 def main():
     parser = argparse.ArgumentParser(description="CLI tool for Survey123 form generation and publishing.")
@@ -14,6 +16,20 @@ def main():
     generate_parser.add_argument("-v", "--version", type=str, default="3.22", help="Template version to use (e.g., 3.22).")
     generate_parser.add_argument("-i", "--input", type=str, required=True, help="Path to the YAML file containing survey data.")
     generate_parser.add_argument("-o", "--output", type=str, required=True, help="Path to save the generated Excel file.")
+    generate_parser.add_argument("--cache-dir", type=str, default=".survey123py-cache", help="Directory of the build cache (default: .survey123py-cache).")
+    generate_parser.add_argument("--no-cache", action="store_true", help="Always rebuild the Excel file instead of using the build cache.")
+    
+    # Batch generate command
+    batch_parser = subparsers.add_parser('generate-batch', help='Generate Excel files from many YAML files in parallel')
+    batch_inputs = batch_parser.add_mutually_exclusive_group(required=True)
+    batch_inputs.add_argument("-i", "--input", type=str, help="Glob pattern of YAML files (e.g., 'forms/*.yaml').")
+    batch_inputs.add_argument("-m", "--manifest", type=str, help="Path to a YAML manifest listing input and output paths.")
+    batch_parser.add_argument("-o", "--output-dir", type=str, help="Directory to save the generated Excel files (required with --input).")
+    batch_parser.add_argument("-v", "--version", type=str, default="3.22", help="Template version to use (e.g., 3.22).")
+    batch_parser.add_argument("-w", "--workers", type=int, help="Number of worker processes (default: number of CPUs).")
+    batch_parser.add_argument("--no-validate", action="store_true", help="Skip validation of the generated files.")
+    batch_parser.add_argument("--cache-dir", type=str, default=".survey123py-cache", help="Directory of the build cache (default: .survey123py-cache).")
+    batch_parser.add_argument("--no-cache", action="store_true", help="Always rebuild the Excel files instead of using the build cache.")
     
     # Publish command (new functionality)
     publish_parser = subparsers.add_parser('publish', help='Publish survey directly to ArcGIS Online/Enterprise')
@@ -77,6 +93,8 @@ def main():
     # Handle different commands
     if args.command == 'generate':
         generate_excel(args)
+    elif args.command == 'generate-batch':
+        generate_excel_batch(args)
     elif args.command == 'publish':
         publish_survey(args)
     elif args.command == 'update':
@@ -130,14 +148,61 @@ def create_gis_connection(args):
 def generate_excel(args):
     """Generate Excel file from YAML."""
     try:
-        survey = FormData(version=args.version)
-        survey.load_yaml(args.input)  # Fixed: was args.yaml_path
-        survey.save_survey(args.output)
-        print(f"Survey123 form successfully generated and saved to {args.output}")
+        if args.no_cache:
+            from survey123py.form import FormData
+            survey = FormData(version=args.version)
+            survey.load_yaml(args.input)  # Fixed: was args.yaml_path
+            survey.save_survey(args.output)
+            print(f"Survey123 form successfully generated and saved to {args.output}")
+        else:
+            from survey123py.cache import BuildCache, generate_cached
+            cached, _ = generate_cached(args.input, args.output, args.version, cache=BuildCache(args.cache_dir))
+            if cached:
+                print(f"Survey123 form is unchanged. Copied from cache to {args.output}")
+            else:
+                print(f"Survey123 form successfully generated and saved to {args.output}")
+    except Exception as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+def generate_excel_batch(args):
+    """Generate Excel files from many YAML files in parallel."""
+    from survey123py.batch import find_batch_jobs, read_batch_manifest, iter_generate_batch
+
+    try:
+        if args.manifest:
+            jobs = read_batch_manifest(args.manifest)
+        else:
+            if not args.output_dir:
+                raise ValueError("--output-dir is required when using --input")
+            jobs = find_batch_jobs(args.input, args.output_dir)
     except Exception as e:
         print(f"Error: {e}")
         sys.exit(1)
 
+    if not jobs:
+        print("Error: No YAML files found")
+        sys.exit(1)
+
+    print(f"Generating {len(jobs)} forms...")
+    failed = 0
+    total_seconds = 0.0
+    validate = "off" if args.no_validate else "sync"
+    cache_dir = None if args.no_cache else args.cache_dir
+    for result in iter_generate_batch(jobs, version=args.version, workers=args.workers, validate=validate, cache_dir=cache_dir):
+        total_seconds += result.seconds
+        if not result.success:
+            failed += 1
+            print(f"✗ {result.input} ({result.seconds:.2f}s): {result.error}")
+        elif result.is_valid is False:
+            print(f"⚠ {result.input} -> {result.output} ({result.seconds:.2f}s): {result.validation_error}")
+        else:
+            print(f"✓ {result.input} -> {result.output} ({result.seconds:.2f}s{', cached' if result.cached else ''})")
+
+    print(f"\n{len(jobs) - failed} of {len(jobs)} forms generated ({total_seconds:.2f}s total worker time)")
+    if failed:
+        sys.exit(1)
+
 def convert_excel_to_yaml(args):
     """Convert Excel file to YAML format."""
     try:
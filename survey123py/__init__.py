@@ -1,12 +1,37 @@
-from .form import FormData, Sheets
-from .converter import ExcelToYamlConverter, convert_excel_to_yaml
-
-# Publisher module is imported conditionally to avoid ImportError
-# if ArcGIS Python API is not available
-try:
-    from .publisher import Survey123Publisher, publish_survey
-    __all__ = ['FormData', 'Sheets', 'ExcelToYamlConverter', 'convert_excel_to_yaml', 'Survey123Publisher', 'publish_survey']
-except ImportError:
+__version__ = "1.0.0"
+
+import importlib
+import importlib.util
+
+# Public names by the module defining them. The modules are imported when a name is
+# first used, so importing survey123py or one of its modules such as survey123py.formulas
+# does not load pandas, openpyxl, pyxform or the ArcGIS Python API.
+_LAZY_ATTRIBUTES = {
+    'FormData': '.form',
+    'Sheets': '.form',
+    'ExcelToYamlConverter': '.converter',
+    'convert_excel_to_yaml': '.converter',
+    'Survey123Publisher': '.publisher',
+    'publish_survey': '.publisher',
+}
+
+# Publisher names are only exported if the ArcGIS Python API is installed,
+# which is checked without importing it
+if importlib.util.find_spec('arcgis') is not None:
+    __all__ = list(_LAZY_ATTRIBUTES)
+else:
     __all__ = ['FormData', 'Sheets', 'ExcelToYamlConverter', 'convert_excel_to_yaml']
 
-__version__ = "1.0.0"
\ No newline at end of file
+
+def __getattr__(name: str):
+    module = _LAZY_ATTRIBUTES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    # Later lookups find the name without calling __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
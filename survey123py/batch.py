@@ -0,0 +1,226 @@
+"""
+Batch Generation Module
+
+This module generates many Survey123 Excel files from YAML in one run. The forms
+are spread across a pool of worker processes, and each worker loads the
+template once and reuses it for every form it generates.
+"""
+
+import contextlib
+import glob
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from . import yaml_loader
+from .cache import BuildCache, generate_cached
+from .form import FormData, VALIDATION_MODES
+from .templates import get_template
+
+
+@dataclass
+class BatchResult:
+    """
+    Result of generating a single form in a batch.
+    """
+    input: str
+    output: str
+    seconds: float
+    error: Optional[str] = None
+    is_valid: Optional[bool] = None
+    validation_error: Optional[str] = None
+    cached: bool = False
+
+    @property
+    def success(self) -> bool:
+        """True if the Excel file was generated."""
+        return self.error is None
+
+
+def find_batch_jobs(pattern: str, output_dir: str) -> List[Tuple[str, str]]:
+    """
+    Find YAML files matching a glob pattern and pair them with output paths.
+    Each output is saved in `output_dir` under the path of the input file relative
+    to the directory the pattern starts from, so `forms/**/*.yaml` saves
+    `forms/a/survey.yaml` as `a/survey.xlsx` in `output_dir`.
+
+    Parameters
+    ----------
+    pattern : str
+        Glob pattern of YAML files, e.g. "forms/**/*.yaml".
+    output_dir : str
+        Directory to save the generated Excel files.
+
+    Returns
+    -------
+    List[Tuple[str, str]]
+        List of `(input_path, output_path)` pairs.
+    """
+    root = _glob_root(pattern)
+    jobs = []
+    for input_path in sorted(glob.glob(pattern, recursive=True)):
+        output_path = Path(output_dir) / Path(os.path.relpath(input_path, root)).with_suffix(".xlsx")
+        jobs.append((input_path, str(output_path)))
+    return jobs
+
+
+def _glob_root(pattern: str) -> str:
+    # Directory of the leading parts of a glob pattern without wildcards
+    parts = Path(pattern).parts
+    root = []
+    for part in parts[:-1]:
+        if glob.has_magic(part):
+            break
+        root.append(part)
+    return str(Path(*root)) if root else "."
+
+
+def read_batch_manifest(path: str) -> List[Tuple[str, str]]:
+    """
+    Read a YAML manifest listing the forms to generate, such as below.
+    Relative paths are relative to the manifest file.
+
+    ```
+    - input: forms/inspection.yaml
+      output: build/inspection.xlsx
+    - input: forms/inventory.yaml
+      output: build/inventory.xlsx
+    ```
+
+    Parameters
+    ----------
+    path : str
+        Path to the manifest file.
+
+    Returns
+    -------
+    List[Tuple[str, str]]
+        List of `(input_path, output_path)` pairs.
+    """
+    with open(path, 'r') as file:
+        entries = yaml_loader.load(file) or []
+
+    base_dir = Path(path).parent
+    jobs = []
+    for entry in entries:
+        if not isinstance(entry, dict) or "input" not in entry or "output" not in entry:
+            raise ValueError(f"Invalid manifest entry {entry}. Each entry must have an input and an output.")
+        jobs.append((str(base_dir / entry["input"]), str(base_dir / entry["output"])))
+    return jobs
+
+
+def _check_outputs(tasks: List[tuple]):
+    # Forms saved to the same path would overwrite each other in parallel workers
+    inputs = {}
+    for input_path, output_path, *_ in tasks:
+        output = os.path.normcase(os.path.abspath(output_path))
+        if output in inputs:
+            raise ValueError(f"{inputs[output]} and {input_path} are both saved to {output_path}")
+        inputs[output] = input_path
+
+
+def _init_worker(version: str):
+    # Load the template once so every form in this worker reuses it
+    get_template(version)
+
+
+def _generate(job: Tuple[str, str, str, str, Optional[str]]) -> BatchResult:
+    input_path, output_path, version, validate, cache_dir = job
+    start = time.perf_counter()
+    result = BatchResult(input=input_path, output=output_path, seconds=0.0)
+    try:
+        # Validation warnings are reported in the result instead of printed
+        with contextlib.redirect_stdout(io.StringIO()):
+            Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+            if cache_dir is not None:
+                result.cached, validation = generate_cached(
+                    input_path, output_path, version, validate, BuildCache(cache_dir)
+                )
+            else:
+                survey = FormData(version)
+                survey.load_yaml(input_path)
+                validation = survey.save_survey(output_path, validate=validate)
+        if validation is not None:
+            result.is_valid = validation[0]
+            result.validation_error = None if validation[1] is None else str(validation[1])
+    except Exception as e:
+        result.error = f"{type(e).__name__}: {e}"
+    result.seconds = time.perf_counter() - start
+    return result
+
+
+def iter_generate_batch(
+    jobs: Iterable[Tuple[str, str]],
+    version: str = "3.22",
+    workers: Optional[int] = None,
+    validate: str = "sync",
+    cache_dir: Optional[str] = None,
+) -> Iterator[BatchResult]:
+    """
+    Generate Excel files for a list of YAML files, yielding each result in the
+    order of `jobs` as soon as it is ready. A failing form does not stop the batch.
+
+    Parameters
+    ----------
+    jobs : Iterable[Tuple[str, str]]
+        `(input_path, output_path)` pairs.
+    version : str, optional
+        Template version to use, by default "3.22"
+    workers : int, optional
+        Number of worker processes. Defaults to the number of CPUs.
+        With 1 worker the forms are generated in the current process.
+    validate : str, optional
+        Validation mode passed to `FormData.save_survey`. "async" is treated as
+        "sync" because the workers already run in parallel. Default is "sync".
+    cache_dir : str, optional
+        Directory of a `BuildCache`. Forms whose YAML has not changed since they were
+        cached are copied from the cache instead of being generated. By default no cache is used.
+
+    Yields
+    ------
+    BatchResult
+        Result of each form.
+
+    Raises
+    ------
+    ValueError
+        If two jobs have the same output path. Nothing is generated.
+    """
+    if validate not in VALIDATION_MODES:
+        raise ValueError(f"Validation mode {validate} not supported. Supported modes are: {list(VALIDATION_MODES)}")
+    if validate == "async":
+        validate = "sync"
+    tasks = [(input_path, output_path, version, validate, cache_dir) for input_path, output_path in jobs]
+    _check_outputs(tasks)
+
+    if workers == 1:
+        _init_worker(version)
+        for task in tasks:
+            yield _generate(task)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(version,)) as executor:
+        yield from executor.map(_generate, tasks)
+
+
+def generate_batch(
+    jobs: Iterable[Tuple[str, str]],
+    version: str = "3.22",
+    workers: Optional[int] = None,
+    validate: str = "sync",
+    cache_dir: Optional[str] = None,
+) -> List[BatchResult]:
+    """
+    Generate Excel files for a list of YAML files in parallel.
+    See `iter_generate_batch` for the parameters.
+
+    Returns
+    -------
+    List[BatchResult]
+        Result of each form in the order of `jobs`.
+    """
+    return list(iter_generate_batch(jobs, version=version, workers=workers, validate=validate, cache_dir=cache_dir))
@@ -0,0 +1,308 @@
+"""
+Build Cache Module
+
+This module keeps an on-disk cache of generated Survey123 Excel files. Entries
+are keyed by a hash of the YAML content, the template files, the template version,
+the package version and the pyxform version used to validate the form, so a form that has not changed since the last build is copied from the
+cache instead of being generated and validated again.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from . import __version__
+
+DEFAULT_CACHE_DIR = ".survey123py-cache"
+DEFAULT_MAX_SIZE = 512 * 1024 * 1024
+DEFAULT_MAX_AGE = 30 * 24 * 60 * 60
+# Size of the blocks of choice source files read when computing cache keys
+_BLOCK_SIZE = 1024 * 1024
+# Hash of the template files of each version with their paths and modification times
+_template_digests: Dict[str, Tuple[tuple, bytes]] = {}
+
+
+class BuildCache:
+    """
+    On-disk cache of generated Excel files.
+
+    Each entry is stored as `<key>.xlsx` with a `<key>.json` file holding the
+    validation result of the form. Entries are evicted when they are older than
+    `max_age` seconds and, oldest first, when the cache is larger than `max_size` bytes.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = DEFAULT_CACHE_DIR,
+        max_size: int = DEFAULT_MAX_SIZE,
+        max_age: float = DEFAULT_MAX_AGE,
+        link: bool = False,
+    ):
+        """
+        Parameters
+        ----------
+        cache_dir : str, optional
+            Directory holding the cache entries, by default ".survey123py-cache"
+        max_size : int, optional
+            Maximum total size of the cached files in bytes, by default 512 MB.
+        max_age : float, optional
+            Maximum age of an entry in seconds since it was last used, by default 30 days.
+        link : bool, optional
+            Hard-link cached files to the output path instead of copying them, by default False.
+            Falls back to copying if the file system does not support hard links.
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_size = max_size
+        self.max_age = max_age
+        self.link = link
+
+    @staticmethod
+    def key(yaml_path: str, version: str) -> str:
+        """
+        Compute the cache key of a YAML file.
+
+        Parameters
+        ----------
+        yaml_path : str
+            Path to the YAML file containing survey data.
+        version : str
+            Template version being used for Survey123
+
+        Returns
+        -------
+        str
+            Hex digest of the YAML content, the content of the choice source files,
+            the template version and files, the package version and the pyxform version.
+        """
+        import pyxform
+
+        digest = hashlib.sha256()
+        digest.update(f"survey123py {__version__}\0pyxform {pyxform.__version__}\0template {version}\0".encode("utf-8"))
+        digest.update(_template_digest(version))
+        content = Path(yaml_path).read_bytes()
+        digest.update(content)
+        # Only forms that may have source entries are parsed
+        if b"source" in content:
+            for path in _source_paths(yaml_path):
+                digest.update(b"\0source\0")
+                with open(path, "rb") as file:
+                    for block in iter(lambda: file.read(_BLOCK_SIZE), b""):
+                        digest.update(block)
+        return digest.hexdigest()
+
+    def _paths(self, key: str) -> Tuple[Path, Path]:
+        return self.cache_dir / f"{key}.xlsx", self.cache_dir / f"{key}.json"
+
+    def restore(self, key: str, outpath: str, validated: bool = True) -> Optional[tuple]:
+        """
+        Copy a cached file to `outpath`.
+
+        Parameters
+        ----------
+        key : str
+            Cache key from `BuildCache.key`.
+        outpath : str
+            Path to save the Excel file.
+        validated : bool, optional
+            Only restore entries that have a validation result, by default True.
+
+        Returns
+        -------
+        tuple or None
+            `(is_valid, error)` stored with the entry, or None if the entry is not cached.
+            `is_valid` is None if the entry was stored without validation.
+        """
+        xlsx_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path, "r") as file:
+                meta = json.load(file)
+        except (OSError, ValueError):
+            return None
+        if not xlsx_path.exists() or (validated and meta.get("is_valid") is None):
+            return None
+
+        outpath = Path(outpath)
+        outpath.parent.mkdir(parents=True, exist_ok=True)
+        # Remove the old output first so a hard-linked cache entry is never written through
+        if outpath.exists() or outpath.is_symlink():
+            outpath.unlink()
+        try:
+            if self.link:
+                try:
+                    os.link(xlsx_path, outpath)
+                except FileNotFoundError:
+                    raise
+                except OSError:
+                    shutil.copyfile(xlsx_path, outpath)
+            else:
+                shutil.copyfile(xlsx_path, outpath)
+        except FileNotFoundError:
+            # The entry was evicted by another process
+            return None
+
+        # The modification time records the last use for eviction
+        now = time.time()
+        try:
+            os.utime(xlsx_path, (now, now))
+            os.utime(meta_path, (now, now))
+        except OSError:
+            pass
+        return meta.get("is_valid"), meta.get("error")
+
+    def store(self, key: str, outpath: str, result: Optional[tuple] = None):
+        """
+        Add a generated file to the cache and evict old entries.
+
+        Parameters
+        ----------
+        key : str
+            Cache key from `BuildCache.key`.
+        outpath : str
+            Path of the generated Excel file.
+        result : tuple, optional
+            `(is_valid, error)` returned by `FormData.save_survey`, or None if the
+            file was not validated.
+        """
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        xlsx_path, meta_path = self._paths(key)
+        is_valid, error = result if result is not None else (None, None)
+
+        # Write to temporary files first so concurrent builds never see a partial entry
+        suffix = f".{os.getpid()}.tmp"
+        shutil.copyfile(outpath, f"{xlsx_path}{suffix}")
+        os.replace(f"{xlsx_path}{suffix}", xlsx_path)
+        with open(f"{meta_path}{suffix}", "w") as file:
+            json.dump({"is_valid": is_valid, "error": None if error is None else str(error)}, file)
+        os.replace(f"{meta_path}{suffix}", meta_path)
+        self.prune()
+
+    def prune(self):
+        """
+        Evict entries older than `max_age` and then the least recently used entries
+        until the cache is smaller than `max_size`.
+        """
+        if not self.cache_dir.exists():
+            return
+        entries = []
+        for xlsx_path in self.cache_dir.glob("*.xlsx"):
+            try:
+                stat = xlsx_path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, xlsx_path))
+
+        now = time.time()
+        total_size = sum(size for _, size, _ in entries)
+        for mtime, size, xlsx_path in sorted(entries):
+            if now - mtime <= self.max_age and total_size <= self.max_size:
+                break
+            for path in (xlsx_path, xlsx_path.with_suffix(".json")):
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+            total_size -= size
+
+    def clear(self):
+        """
+        Remove every entry from the cache.
+        """
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+
+def _template_digest(version: str) -> bytes:
+    # Hash of the template files of a version, which can be edited in place.
+    # It is kept until the files are modified, as in survey123py.templates.
+    from .templates import TEMPLATE_PATHS
+
+    paths = TEMPLATE_PATHS.get(version)
+    if paths is None:
+        return b""
+    files = [paths["survey"], paths["columns"]]
+    mtimes = tuple((path, path.stat().st_mtime_ns) for path in files)
+    cached = _template_digests.get(version)
+    if cached is not None and cached[0] == mtimes:
+        return cached[1]
+    digest = hashlib.sha256()
+    for path in files:
+        digest.update(path.read_bytes())
+    _template_digests[version] = (mtimes, digest.digest())
+    return digest.digest()
+
+
+def _source_paths(yaml_path: str) -> List[Path]:
+    # Files of the source entries of the choices, see survey123py.choice_sources
+    from .choice_sources import source_paths
+    from .yaml_loader import load_form
+
+    base_dir = Path(yaml_path).parent
+    data = load_form(yaml_path, {"choices": lambda choices: source_paths(choices or [], base_dir)})
+    if not isinstance(data, dict) or not isinstance(data.get("choices"), list):
+        return []
+    return data["choices"]
+
+
+def generate_cached(
+    yaml_path: str,
+    outpath: str,
+    version: str = "3.22",
+    validate: str = "sync",
+    cache: Optional[BuildCache] = None,
+) -> Tuple[bool, Optional[tuple]]:
+    """
+    Generate an Excel file from YAML, reusing the cached file if the YAML has not changed.
+
+    Parameters
+    ----------
+    yaml_path : str
+        Path to the YAML file containing survey data.
+    outpath : str
+        Path to save the Excel file.
+    version : str, optional
+        Template version to use, by default "3.22"
+    validate : str, optional
+        Validation mode passed to `FormData.save_survey`. "async" is treated as
+        "sync" so the validation result can be stored with the entry. Default is "sync".
+    cache : BuildCache, optional
+        Cache to use. Defaults to a `BuildCache` in the current directory.
+
+    Returns
+    -------
+    Tuple[bool, tuple or None]
+        Whether the file was restored from the cache and the `(is_valid, error)`
+        validation result, which is None with `validate="off"`.
+    """
+    from .form import FormData, VALIDATION_MODES
+
+    if validate not in VALIDATION_MODES:
+        raise ValueError(f"Validation mode {validate} not supported. Supported modes are: {list(VALIDATION_MODES)}")
+    if validate == "async":
+        validate = "sync"
+    cache = cache or BuildCache()
+
+    key = cache.key(yaml_path, version)
+    result = cache.restore(key, outpath, validated=validate != "off")
+    if result is not None:
+        if validate == "off":
+            return True, None
+        if result[0] is False:
+            FormData._report_validation(result)
+        return True, result
+
+    # Build next to the output and move it over the output once it is built, so a
+    # failed build keeps the last good file and a hard-linked cache entry is never
+    # written through. The file keeps its name, which validation uses as the form name.
+    outpath = Path(outpath)
+    with tempfile.TemporaryDirectory(dir=outpath.parent, prefix=".survey123py-") as tmp_dir:
+        build_path = Path(tmp_dir) / outpath.name
+        survey = FormData(version)
+        survey.load_yaml(yaml_path)
+        result = survey.save_survey(str(build_path), validate=validate)
+        cache.store(key, build_path, result)
+        os.replace(build_path, outpath)
+    return False, result
@@ -0,0 +1,185 @@
+"""
+Choice Filter Module
+
+This module evaluates the `choice_filter` of cascading select questions against
+the choices of their choice list. In a choice filter, names without `${}` refer to
+columns of the choices, for example `county=${county}` keeps the choices whose
+`county` column equals the answer of the `county` question.
+
+Equality conditions between a choice column and a value that does not depend on
+the choices are served by the hash indexes of `ChoiceIndex.column_index`, so only
+the matching choices are checked instead of the whole list.
+
+```python
+from survey123py.choices import ChoiceIndex
+from survey123py.choice_filters import compile_choice_filter
+
+index = ChoiceIndex(choices=[
+    {"list_name": "cities", "name": "a", "label": "A", "county": "north"},
+    {"list_name": "cities", "name": "b", "label": "B", "county": "south"},
+])
+choice_filter = compile_choice_filter("county=${county}")
+choice_filter.filter(index, "cities", {"county": "south"})  # [{"name": "b", ...}]
+```
+"""
+
+from typing import Any, List, Mapping, Optional
+
+from .choices import ChoiceIndex, match_key
+from .expressions import Expression, _tokenize, _truth, compile_expression
+
+# Prefix of the variables standing for choice columns in compiled choice filters
+COLUMN_PREFIX = "choice::"
+# Names that are not choice columns when they are not called as a function
+_KEYWORDS = ("and", "or", "div", "mod", "true", "false", "True", "False")
+
+
+def _filter_source(source: str) -> str:
+    """
+    Rewrite the choice columns of a choice filter as variables, e.g. `county=${county}`
+    to `${choice::county}=${county}`.
+    """
+    tokens = _tokenize(source)
+    parts = []
+    end = 0
+    for (kind, value, position), following in zip(tokens, tokens[1:]):
+        if kind == "name" and following[1] != "(" and value not in _KEYWORDS:
+            parts.append(source[end:position])
+            parts.append(f"${{{COLUMN_PREFIX}{value}}}")
+            end = position + len(value)
+    parts.append(source[end:])
+    return "".join(parts)
+
+
+def _conditions(tree: tuple) -> List[tuple]:
+    # Conditions joined by `and` at the top of the expression
+    if tree[0] == "binop" and tree[1] == "and":
+        return _conditions(tree[2]) + _conditions(tree[3])
+    return [tree]
+
+
+class ChoiceFilter:
+    """
+    A compiled choice filter.
+
+    Attributes
+    ----------
+    source : str
+        The original choice filter.
+    expression : Expression
+        The compiled choice filter, where choice columns are `${choice::<column>}` variables.
+    columns : Tuple[str, ...]
+        Choice columns used by the filter.
+    equalities : Tuple[Tuple[str, Expression], ...]
+        Conditions of the filter comparing a choice column with a value that does not
+        depend on the choices, which are looked up in the column indexes.
+    variables : Tuple[str, ...]
+        Questions referenced by the filter with `${name}`.
+    """
+
+    def __init__(self, source: str):
+        self.source = source
+        self.expression = compile_expression(_filter_source(source))
+        self.columns = tuple(
+            name[len(COLUMN_PREFIX):] for name in self.expression.variables if name.startswith(COLUMN_PREFIX)
+        )
+        equalities = []
+        for condition in _conditions(self.expression.tree):
+            if condition[0] != "binop" or condition[1] not in ("=", "=="):
+                continue
+            for column, value in ((condition[2], condition[3]), (condition[3], condition[2])):
+                if column[0] != "var" or not column[1].startswith(COLUMN_PREFIX):
+                    continue
+                value = Expression(self.source, value)
+                if value.uses_current or any(name.startswith(COLUMN_PREFIX) for name in value.variables):
+                    continue
+                equalities.append((column[1][len(COLUMN_PREFIX):], value))
+                break
+        self.equalities = tuple(equalities)
+        self.variables = tuple(name for name in self.expression.variables if not name.startswith(COLUMN_PREFIX))
+
+    def candidates(
+        self,
+        index: ChoiceIndex,
+        list_name: str,
+        values: Mapping[str, Any],
+        settings: Optional[dict] = None,
+    ) -> Optional[List[int]]:
+        """
+        Get the positions of the choices that may pass the filter from the column indexes.
+
+        Returns
+        -------
+        List[int] or None
+            Positions of the choices in `index.rows[list_name]` in order, or None if the
+            filter cannot use the indexes and every choice must be checked.
+        """
+        candidates = None
+        for column, value in self.equalities:
+            key = match_key(value.evaluate(values, settings=settings, choices=index))
+            if key is None:
+                continue
+            positions, unkeyed = index.column_index(list_name, column)
+            matches = set(positions.get(key, ())).union(unkeyed)
+            candidates = matches if candidates is None else candidates & matches
+        return None if candidates is None else sorted(candidates)
+
+    def filter(
+        self,
+        index: ChoiceIndex,
+        list_name: str,
+        values: Mapping[str, Any],
+        settings: Optional[dict] = None,
+    ) -> List[dict]:
+        """
+        Get the choices of a choice list that pass the filter.
+
+        Parameters
+        ----------
+        index : ChoiceIndex
+            Choices of the form.
+        list_name : str
+            Name of the choice list of the question.
+        values : Mapping[str, Any]
+            Question values referenced by `${name}`.
+        settings : dict, optional
+            Settings of the form, used by `version()`.
+
+        Returns
+        -------
+        List[dict]
+            The choices passing the filter, in the order of the choice list.
+        """
+        rows = index.rows.get(list_name, [])
+        positions = self.candidates(index, list_name, values, settings)
+        if positions is None:
+            positions = range(len(rows))
+        filtered = []
+        row_values = dict(values)
+        for position in positions:
+            choice = rows[position]
+            # Choices without a column are empty, as in the choices sheet
+            row_values.update({f"{COLUMN_PREFIX}{column}": choice.get(column, "") for column in self.columns})
+            if _truth(self.expression.evaluate(row_values, settings=settings, choices=index)):
+                filtered.append(choice)
+        return filtered
+
+    def __repr__(self):
+        return f"ChoiceFilter({self.source!r})"
+
+
+def compile_choice_filter(source: str) -> ChoiceFilter:
+    """
+    Compile a choice filter.
+
+    Parameters
+    ----------
+    source : str
+        Choice filter, e.g. `county=${county} and population > 1000`.
+
+    Returns
+    -------
+    ChoiceFilter
+        The compiled choice filter.
+    """
+    return ChoiceFilter(str(source))
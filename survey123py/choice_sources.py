@@ -0,0 +1,130 @@
+"""
+Choice Source Module
+
+This module reads choice lists kept in CSV or Parquet files. Instead of listing
+every choice in the YAML file, the `choices` section refers to the file with a
+`source` entry:
+
+```yaml
+choices:
+  - list_name: yes_no
+    name: "yes"
+    label: "Yes"
+  - source: assets.csv
+    list_name: assets
+```
+
+The columns of the file are columns of the choices sheet, e.g. `name`, `label` or
+the columns used by choice filters. The other keys of the entry, such as `list_name`,
+are set on every choice of the file. Paths are relative to the YAML file.
+
+Files are read in chunks of `CHUNK_ROWS` rows straight into columns, without
+building a dictionary for each choice. CSV values are read as text, so names such
+as `00123` keep their leading zeros, and empty cells are empty. Reading Parquet
+files requires pyarrow.
+"""
+
+from pathlib import Path
+from typing import Any, Iterable, Iterator, List, Optional
+
+import pandas as pd
+
+# Key of the entries of the choices section that refer to a file
+SOURCE_KEY = "source"
+# Supported file extensions
+SOURCE_FORMATS = (".csv", ".parquet")
+# Number of rows read at a time
+CHUNK_ROWS = 65536
+
+
+def is_source(choice: Any) -> bool:
+    """
+    True if an entry of the choices section refers to a file.
+    """
+    # Choices are dictionaries or rows of survey123py.model
+    return hasattr(choice, "items") and SOURCE_KEY in choice
+
+
+def source_path(entry: dict, base_dir: Optional[str] = None) -> Path:
+    """
+    Get the path of the file of a source entry, relative to `base_dir` if given.
+    """
+    path = Path(str(entry[SOURCE_KEY]))
+    if base_dir is not None and not path.is_absolute():
+        path = Path(base_dir) / path
+    return path
+
+
+def read_source(entry: dict, base_dir: Optional[str] = None, chunk_rows: Optional[int] = None) -> Iterator[pd.DataFrame]:
+    """
+    Read the choices of a source entry in chunks.
+
+    Parameters
+    ----------
+    entry : dict
+        Entry of the choices section, e.g. `{"source": "assets.csv", "list_name": "assets"}`.
+    base_dir : str, optional
+        Directory of relative paths, usually the directory of the YAML file.
+    chunk_rows : int, optional
+        Number of rows of each chunk, by default `CHUNK_ROWS`.
+
+    Yields
+    ------
+    pd.DataFrame
+        Choices of the file, with a column for each column of the file and each
+        other key of the entry.
+    """
+    chunk_rows = chunk_rows or CHUNK_ROWS
+    path = source_path(entry, base_dir)
+    suffix = path.suffix.lower()
+    if suffix == ".csv":
+        chunks = _csv_chunks(path, chunk_rows)
+    elif suffix == ".parquet":
+        chunks = _parquet_chunks(path, chunk_rows)
+    else:
+        raise ValueError(f"Choice source {path} not supported. Supported formats are: {list(SOURCE_FORMATS)}")
+    constants = {column: value for column, value in entry.items() if column != SOURCE_KEY}
+    for chunk in chunks:
+        for column, value in constants.items():
+            chunk[column] = value
+        yield chunk
+
+
+def _csv_chunks(path: Path, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    with pd.read_csv(path, dtype=str, keep_default_na=False, na_values=[""], chunksize=chunk_rows) as reader:
+        yield from reader
+
+
+def _parquet_chunks(path: Path, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    try:
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError(
+            "pyarrow is required to read Parquet choice sources. "
+            "Install with: pip install pyarrow"
+        )
+    for batch in pyarrow.parquet.ParquetFile(path).iter_batches(batch_size=chunk_rows):
+        yield batch.to_pandas()
+
+
+def records(choices: Iterable[Any], base_dir: Optional[str] = None) -> Iterator[Any]:
+    """
+    Iterate over the entries of a choices section, replacing source entries by
+    a dictionary for each choice of their file. Empty cells are left out.
+    This is meant for code that looks at choices one by one, such as the preview.
+    """
+    for choice in choices:
+        if not is_source(choice):
+            yield choice
+            continue
+        for chunk in read_source(choice, base_dir):
+            columns = list(chunk.columns)
+            for row in chunk.itertuples(index=False, name=None):
+                yield {column: value for column, value in zip(columns, row) if not pd.isna(value)}
+
+
+def source_paths(choices: Iterable[Any], base_dir: Optional[str] = None) -> List[Path]:
+    """
+    Get the paths of the files referred to by a choices section, in order.
+    """
+    return [source_path(choice, base_dir) for choice in choices if is_source(choice)]
@@ -0,0 +1,164 @@
+"""
+Choice Index Module
+
+This module indexes the `choices` section of a form once, so the label of a
+choice is looked up by its list and name instead of searching the choices.
+Questions are mapped to their choice list from their type, e.g. `select_one priority`.
+
+```python
+from survey123py.choices import ChoiceIndex
+
+index = ChoiceIndex(
+    choices=[{"list_name": "priority", "name": "high", "label": "High"}],
+    questions=[{"type": "select_one priority", "name": "urgency"}],
+)
+index.label("urgency", "high")  # "High"
+index.label("${urgency}", "low")  # None
+```
+"""
+
+import math
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Question types with a choice list, followed by the list name
+SELECT_TYPES = ("select_one", "select_multiple")
+# A question can be referred to by its name or as ${name}
+_REFERENCE = re.compile(r"\$\{(\w+)\}")
+
+
+def _key(value) -> str:
+    # Choice names written as numbers in YAML match the same answers as text
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value)
+
+
+def match_key(value) -> Optional[tuple]:
+    """
+    Key of a value in the column indexes. Values that are equal in expressions, such
+    as `1` and `'1'`, have the same key, though values with the same key may differ,
+    such as `'1'` and `'01'`. None, booleans and NaN have no key.
+    """
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return None if math.isnan(value) else ("number", float(value))
+    if isinstance(value, str):
+        try:
+            number = float(value.strip())
+        except ValueError:
+            return ("text", value)
+        # Text such as 'nan' is compared as text with other text, so it keeps its own key
+        return ("text", value) if math.isnan(number) else ("number", number)
+    return None
+
+
+def _label(choice: dict):
+    if "label" in choice:
+        return choice["label"]
+    # Labels of forms in several languages, e.g. label::English (en)
+    return next((value for column, value in choice.items() if str(column).startswith("label::")), None)
+
+
+class ChoiceIndex:
+    """
+    Index of the choices of a form.
+
+    Attributes
+    ----------
+    labels : Dict[Tuple[str, str], Any]
+        Label of each choice by list name and choice name.
+    lists : Dict[str, str]
+        Choice list of each select question by question name.
+    rows : Dict[str, List[dict]]
+        Choices of each choice list in order.
+    """
+
+    def __init__(self, choices: Iterable[dict] = (), questions: Iterable[dict] = ()):
+        """
+        Parameters
+        ----------
+        choices : Iterable[dict]
+            Rows of the `choices` section, with `list_name`, `name` and `label` columns.
+        questions : Iterable[dict]
+            Questions of the form, with `type` and `name` columns.
+        """
+        self.labels: Dict[Tuple[str, str], Any] = {}
+        self.rows: Dict[str, List[dict]] = {}
+        for choice in choices:
+            list_name = _key(choice.get("list_name"))
+            # The first choice wins if a list has the same name twice
+            self.labels.setdefault((list_name, _key(choice.get("name"))), _label(choice))
+            self.rows.setdefault(list_name, []).append(choice)
+        # Hash indexes of the columns of the choice lists, see column_index
+        self._column_indexes: Dict[Tuple[str, str], Tuple[Dict[Any, List[int]], List[int]]] = {}
+        self.lists: Dict[str, str] = {}
+        for question in questions:
+            parts = str(question.get("type", "")).split()
+            if len(parts) > 1 and parts[0] in SELECT_TYPES and question.get("name"):
+                self.lists[question["name"]] = parts[1]
+
+    def list_name(self, question: str) -> Optional[str]:
+        """
+        Get the choice list of a question, given by its name or as `${name}`.
+        Returns None if the question is not a select question.
+        """
+        question = str(question)
+        match = _REFERENCE.fullmatch(question)
+        return self.lists.get(match.group(1) if match else question)
+
+    def label(self, question: str, value) -> Optional[Any]:
+        """
+        Get the label of a choice of a question.
+
+        Parameters
+        ----------
+        question : str
+            Name of the question, or `${name}`.
+        value : Any
+            Name of the choice.
+
+        Returns
+        -------
+        Any or None
+            The label of the choice, or None if the question has no choice list
+            or the choice is not in it.
+        """
+        list_name = self.list_name(question)
+        if list_name is None:
+            return None
+        return self.labels.get((list_name, _key(value)))
+
+    def column_index(self, list_name: str, column: str) -> Tuple[Dict[Any, List[int]], List[int]]:
+        """
+        Get the hash index of a column of a choice list. Indexes are built once and cached.
+
+        Parameters
+        ----------
+        list_name : str
+            Name of the choice list.
+        column : str
+            Column of the choices, e.g. `county`. Choices without the column are empty.
+
+        Returns
+        -------
+        Tuple[Dict[Any, List[int]], List[int]]
+            Positions of the choices in `rows` by `match_key` of their value, and the positions
+            of the choices whose value has no key, which must always be checked.
+        """
+        key = (list_name, column)
+        if key not in self._column_indexes:
+            positions: Dict[Any, List[int]] = {}
+            unkeyed: List[int] = []
+            for position, choice in enumerate(self.rows.get(list_name, [])):
+                value_key = match_key(choice.get(column, ""))
+                if value_key is None:
+                    unkeyed.append(position)
+                else:
+                    positions.setdefault(value_key, []).append(position)
+            self._column_indexes[key] = (positions, unkeyed)
+        return self._column_indexes[key]
+
+    def __len__(self):
+        return len(self.labels)
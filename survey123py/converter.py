@@ -8,11 +8,12 @@ back to YAML format, enabling round-trip conversion and migration of existing su
 import pandas as pd
 import yaml
 from pathlib import Path
-from typing import Dict, List, Any, Optional
-import json
-import warnings
+from typing import Dict, Iterator, List, Any, Optional, Tuple
 
+from . import tree
 from .form import FormData, Sheets
+from .model import Form, Settings, intern_column
+from .templates import get_template
 
 
 class ExcelToYamlConverter:
@@ -36,9 +37,7 @@ class ExcelToYamlConverter:
         self.form_data = FormData(version)
         
         # Load column mappings for reverse conversion
-        template_path = Path(__file__).parent / "template" / f"template_{version}_columns.json"
-        with open(template_path, 'r') as f:
-            self.column_mappings = json.load(f)
+        self.column_mappings = get_template(version).columns
         
         # Create reverse mappings (Excel column -> YAML field)
         self.reverse_mappings = {}
@@ -68,14 +67,7 @@ class ExcelToYamlConverter:
         ValueError
             If the Excel file is not a valid Survey123 format
         """
-        if not Path(excel_path).exists():
-            raise FileNotFoundError(f"Excel file not found: {excel_path}")
-        
-        # Read Excel file
-        try:
-            excel_data = pd.read_excel(excel_path, sheet_name=None, dtype=str)
-        except Exception as e:
-            raise ValueError(f"Failed to read Excel file: {e}")
+        excel_data = self._read_excel(excel_path)
         
         # Initialize YAML structure
         yaml_data = {}
@@ -97,86 +89,119 @@ class ExcelToYamlConverter:
             self._save_yaml(yaml_data, output_path)
         
         return yaml_data
-    
-    def _convert_survey_sheet(self, survey_df: pd.DataFrame) -> List[Dict[str, Any]]:
-        """Convert the survey sheet to YAML format."""
-        survey_questions = []
-        
-        # Get reverse mappings for survey sheet
-        sheets = Sheets()
-        reverse_map = self.reverse_mappings.get(sheets.survey, {})
+
+    def convert_excel_to_model(self, excel_path: str) -> Form:
+        """
+        Convert a Survey123 Excel file to a form model. The rows of the sheets are
+        added to the model as they are read, with the same values as in
+        `convert_excel_to_yaml`, without building a dictionary for each row.
+
+        Parameters
+        ----------
+        excel_path : str
+            Path to the Survey123 Excel file
+
+        Returns
+        -------
+        survey123py.model.Form
+            The form of the Excel file.
+
+        Raises
+        ------
+        FileNotFoundError
+            If the Excel file doesn't exist
+        ValueError
+            If the Excel file is not a valid Survey123 format
+        """
+        excel_data = self._read_excel(excel_path)
+        form = Form()
+        if Sheets.survey in excel_data:
+            form.add_survey_rows(self._survey_rows(excel_data[Sheets.survey]))
+        if Sheets.choices in excel_data:
+            for choice in self._choice_rows(excel_data[Sheets.choices]):
+                form.add_choice(choice)
+        if Sheets.settings in excel_data:
+            form.settings = Settings(self._settings_values(excel_data[Sheets.settings]))
+        return form
+
+    def _read_excel(self, excel_path: str) -> Dict[str, pd.DataFrame]:
+        """Read every sheet of a Survey123 Excel file as text."""
+        if not Path(excel_path).exists():
+            raise FileNotFoundError(f"Excel file not found: {excel_path}")
         
-        for _, row in survey_df.iterrows():
-            question = {}
+        try:
+            return pd.read_excel(excel_path, sheet_name=None, dtype=str)
+        except Exception as e:
+            raise ValueError(f"Failed to read Excel file: {e}")
+    
+    def _sheet_fields(self, sheet_name: str, columns) -> List[str]:
+        """
+        Get the YAML field of each column of a sheet. Fields are mapped once per
+        column instead of once per cell, and interned so every row shares them.
+        """
+        reverse_map = self.reverse_mappings.get(sheet_name, {})
+        return [intern_column(reverse_map.get(column, column.lower().replace(' ', '_'))) for column in columns]
+
+    def _sheet_rows(self, sheet_name: str, df: pd.DataFrame) -> Iterator[List[Tuple[str, Any]]]:
+        """
+        Iterate over the rows of a sheet as `(field, value)` pairs of their non-empty cells by YAML field.
+        """
+        fields = self._sheet_fields(sheet_name, df.columns)
+        for row in df.itertuples(index=False, name=None):
+            yield [(field, value) for field, value in zip(fields, row) if not (pd.isna(value) or value == '')]
+
+    def _survey_rows(self, survey_df: pd.DataFrame) -> Iterator[List[Tuple[str, Any]]]:
+        """Iterate over the non-empty rows of the survey sheet as `(field, value)` pairs in YAML format."""
+        for row in self._sheet_rows(Sheets.survey, survey_df):
+            question = []
             
-            # Convert each column using reverse mappings
-            for excel_col, value in row.items():
-                if pd.isna(value) or value == '':
-                    continue
-                
-                # Map Excel column to YAML field
-                yaml_field = reverse_map.get(excel_col, excel_col.lower().replace(' ', '_'))
-                
+            # Convert each column
+            for yaml_field, value in row:
                 # Handle special cases
                 if yaml_field == 'type':
-                    question[yaml_field] = self._clean_type_value(value)
+                    question.append((yaml_field, self._clean_type_value(value)))
                 elif yaml_field in ['required', 'readonly']:
-                    question[yaml_field] = self._convert_yes_no_to_bool(value)
+                    question.append((yaml_field, self._convert_yes_no_to_bool(value)))
                 elif yaml_field in ['children']:
                     # Skip children for now - handle in post-processing
                     continue
                 else:
-                    question[yaml_field] = str(value).strip()
+                    question.append((yaml_field, str(value).strip()))
             
             if question:  # Only add non-empty questions
-                survey_questions.append(question)
+                yield question
+
+    def _choice_rows(self, choices_df: pd.DataFrame) -> Iterator[List[Tuple[str, Any]]]:
+        """Iterate over the non-empty rows of the choices sheet as `(field, value)` pairs in YAML format."""
+        for row in self._sheet_rows(Sheets.choices, choices_df):
+            if row:  # Only add non-empty choices
+                yield [(yaml_field, str(value).strip()) for yaml_field, value in row]
+
+    def _settings_values(self, settings_df: pd.DataFrame) -> Dict[str, Any]:
+        """Get the settings of the settings sheet in YAML format."""
+        settings = {}
+        
+        # Settings are typically in key-value format
+        for row in self._sheet_rows(Sheets.settings, settings_df):
+            for yaml_field, value in row:
+                settings[yaml_field] = str(value).strip()
+        
+        return settings
+
+    def _convert_survey_sheet(self, survey_df: pd.DataFrame) -> List[Dict[str, Any]]:
+        """Convert the survey sheet to YAML format."""
+        survey_questions = [dict(question) for question in self._survey_rows(survey_df)]
         
         # Post-process to handle groups and repeats
         return self._process_groups_and_repeats(survey_questions)
     
     def _convert_choices_sheet(self, choices_df: pd.DataFrame) -> List[Dict[str, Any]]:
         """Convert the choices sheet to YAML format."""
-        choices = []
-        
-        # Get reverse mappings for choices sheet
-        sheets = Sheets()
-        reverse_map = self.reverse_mappings.get(sheets.choices, {})
-        
-        for _, row in choices_df.iterrows():
-            choice = {}
-            
-            for excel_col, value in row.items():
-                if pd.isna(value) or value == '':
-                    continue
-                
-                # Map Excel column to YAML field
-                yaml_field = reverse_map.get(excel_col, excel_col.lower().replace(' ', '_'))
-                choice[yaml_field] = str(value).strip()
-            
-            if choice:  # Only add non-empty choices
-                choices.append(choice)
-        
-        return choices
+        return [dict(choice) for choice in self._choice_rows(choices_df)]
     
     def _convert_settings_sheet(self, settings_df: pd.DataFrame) -> Dict[str, Any]:
         """Convert the settings sheet to YAML format."""
-        settings = {}
-        
-        # Get reverse mappings for settings sheet
-        sheets = Sheets()
-        reverse_map = self.reverse_mappings.get(sheets.settings, {})
-        
-        # Settings are typically in key-value format
-        for _, row in settings_df.iterrows():
-            for excel_col, value in row.items():
-                if pd.isna(value) or value == '':
-                    continue
-                
-                # Map Excel column to YAML field
-                yaml_field = reverse_map.get(excel_col, excel_col.lower().replace(' ', '_'))
-                settings[yaml_field] = str(value).strip()
-        
-        return settings
+        return self._settings_values(settings_df)
     
     def _clean_type_value(self, type_value: str) -> str:
         """Clean and normalize question type values."""
@@ -210,58 +235,7 @@ class ExcelToYamlConverter:
     
     def _process_groups_and_repeats(self, questions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Process questions to properly nest groups and repeats."""
-        processed = []
-        stack = [processed]  # Stack to track current container
-        
-        for question in questions:
-            q_type = question.get('type', '').lower()
-            
-            if q_type == 'group' or q_type == 'begin group':
-                # Start a new group
-                group = {
-                    'type': 'group',
-                    'name': question.get('name', ''),
-                    'label': question.get('label', ''),
-                    'children': []
-                }
-                
-                # Copy other properties
-                for key, value in question.items():
-                    if key not in ['type', 'name', 'label']:
-                        group[key] = value
-                
-                stack[-1].append(group)
-                stack.append(group['children'])
-                
-            elif q_type == 'repeat' or q_type == 'begin repeat':
-                # Start a new repeat
-                repeat = {
-                    'type': 'repeat',
-                    'name': question.get('name', ''),
-                    'label': question.get('label', ''),
-                    'children': []
-                }
-                
-                # Copy other properties
-                for key, value in question.items():
-                    if key not in ['type', 'name', 'label']:
-                        repeat[key] = value
-                
-                stack[-1].append(repeat)
-                stack.append(repeat['children'])
-                
-            elif q_type in ['end group', 'end repeat']:
-                # End current group/repeat
-                if len(stack) > 1:
-                    stack.pop()
-                else:
-                    warnings.warn(f"Unmatched end statement: {q_type}")
-                    
-            else:
-                # Regular question
-                stack[-1].append(question)
-        
-        return processed
+        return tree.unflatten(questions)
     
     def _save_yaml(self, data: Dict[str, Any], output_path: str):
         """Save YAML data to file with proper formatting."""
@@ -0,0 +1,146 @@
+"""
+Dependency Graph Module
+
+This module tracks which parts of a form depend on which others, e.g. a
+calculation that references `${q1}` depends on the value of `q1`. The graph
+gives the order in which values must be evaluated and the parts of the form
+that must be evaluated again when a value changes.
+"""
+
+import heapq
+from typing import Dict, Hashable, Iterable, List, Optional
+
+
+class DependencyGraph:
+    """
+    Directed acyclic graph of nodes and the nodes they depend on.
+
+    Nodes can be any hashable value. The order in which nodes are added is used
+    to break ties, so independent nodes keep the order of the form.
+    """
+
+    def __init__(self):
+        self.dependencies: Dict[Hashable, tuple] = {}
+        self.dependents: Dict[Hashable, List[Hashable]] = {}
+        self._index: Dict[Hashable, int] = {}
+        self._nodes: List[Hashable] = []
+
+    def __contains__(self, node) -> bool:
+        return node in self._index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __iter__(self):
+        return iter(self._nodes)
+
+    def add(self, node: Hashable, dependencies: Iterable[Hashable] = ()):
+        """
+        Add a node and the nodes it depends on. Dependencies that are never added
+        as nodes are ignored when ordering the graph.
+
+        Parameters
+        ----------
+        node : Hashable
+            Node to add.
+        dependencies : Iterable[Hashable], optional
+            Nodes that must be evaluated before this node.
+        """
+        if node in self._index:
+            raise ValueError(f"Node {node} is already in the dependency graph")
+        self._index[node] = len(self._nodes)
+        self._nodes.append(node)
+        self.dependencies[node] = tuple(dict.fromkeys(dependencies))
+        self.dependents.setdefault(node, [])
+        for dependency in self.dependencies[node]:
+            self.dependents.setdefault(dependency, []).append(node)
+
+    def order(self, nodes: Optional[Iterable[Hashable]] = None) -> List[Hashable]:
+        """
+        Sort nodes so that every node comes after the nodes it depends on.
+
+        Parameters
+        ----------
+        nodes : Iterable[Hashable], optional
+            Nodes to sort. Defaults to every node in the graph. Only the
+            dependencies between these nodes are taken into account.
+
+        Returns
+        -------
+        List[Hashable]
+            Nodes in evaluation order.
+
+        Raises
+        ------
+        ValueError
+            If the nodes depend on each other in a cycle.
+        """
+        if nodes is None:
+            selected = set(self._nodes)
+        else:
+            selected = {self._nodes[self._index[node]] for node in nodes if node in self._index}
+        remaining = {
+            node: sum(1 for dependency in self.dependencies[node] if dependency in selected)
+            for node in selected
+        }
+        ready = [(self._index[node], node) for node, count in remaining.items() if count == 0]
+        heapq.heapify(ready)
+
+        ordered = []
+        while ready:
+            _, node = heapq.heappop(ready)
+            ordered.append(node)
+            for dependent in self.dependents.get(node, ()):
+                if dependent in remaining:
+                    remaining[dependent] -= 1
+                    if remaining[dependent] == 0:
+                        heapq.heappush(ready, (self._index[dependent], dependent))
+
+        if len(ordered) < len(selected):
+            cycle = self._find_cycle([node for node, count in remaining.items() if count > 0])
+            raise ValueError(f"Circular reference found: {' -> '.join(str(node) for node in cycle)}")
+        return ordered
+
+    def downstream(self, nodes: Iterable[Hashable]) -> List[Hashable]:
+        """
+        Find the nodes that depend directly or indirectly on the given nodes.
+
+        Parameters
+        ----------
+        nodes : Iterable[Hashable]
+            Nodes that changed.
+
+        Returns
+        -------
+        List[Hashable]
+            The given nodes and every node depending on them, in evaluation order.
+        """
+        found = set()
+        stack = list(nodes)
+        while stack:
+            node = stack.pop()
+            if node in found:
+                continue
+            found.add(node)
+            stack.extend(self.dependents.get(node, ()))
+        return self.order(found)
+
+    def _find_cycle(self, nodes: List[Hashable]) -> List[Hashable]:
+        """
+        Find a cycle among nodes that could not be ordered.
+        """
+        candidates = set(nodes)
+        start = min(nodes, key=self._index.__getitem__)
+        path = [start]
+        position = {start: 0}
+        # Every node left over has a dependency that is also left over,
+        # so following them must eventually return to a node on the path
+        while True:
+            node = next(
+                dependency for dependency in self.dependencies[path[-1]]
+                if dependency in candidates
+            )
+            if node in position:
+                return path[position[node]:] + [node]
+            position[node] = len(path)
+            path.append(node)
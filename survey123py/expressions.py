@@ -0,0 +1,530 @@
+"""
+XLSForm Expression Module
+
+This module compiles XLSForm expressions such as `if(${q1} > 5, 'high', 'low')`
+into Python functions bound to the formulas in `survey123py.formulas`.
+Each expression is parsed once and can then be evaluated many times against
+different question values without using `eval()` on user input.
+
+```python
+from survey123py.expressions import compile_expression
+
+expression = compile_expression("concat(${first}, ' ', ${last})")
+expression.evaluate({"first": "John", "last": "Doe"})  # "John Doe"
+```
+"""
+
+import math
+import os
+import re
+import warnings
+from functools import lru_cache
+from typing import Any, List, Mapping, Optional, Tuple
+
+from . import formulas
+from .choices import ChoiceIndex
+
+# Functions available to expressions, by their Python name
+FUNCTIONS = {
+    name: value for name, value in vars(formulas).items()
+    if callable(value) and not name.startswith("_") and getattr(value, "__module__", None) == formulas.__name__
+}
+FUNCTIONS["true"] = lambda: True
+FUNCTIONS["once"] = lambda value: value
+
+# XLSForm function names that are Python keywords or builtins
+_RESERVED_FUNCTIONS = {"if": "if_", "int": "int_", "not": "not_"}
+
+_TOKEN_RE = re.compile(r"""
+    \s*(?:
+        (?P<number>\d+\.\d*|\.\d+|\d+)
+      | (?P<string>'[^']*'|"[^"]*")
+      | \$\{(?P<variable>[^}\s]+)\}
+      | (?P<operator>!=|<=|>=|==|=|<|>|\+|-|\*|\(|\)|,|\.\.|\.|\||/)
+      | (?P<name>[A-Za-z_][\w-]*(?::[A-Za-z_][\w-]*)?)
+    )""", re.X)
+
+# Binding power of binary operators, lowest first as in XPath
+_BINARY_OPERATORS = {
+    "or": 1,
+    "and": 2,
+    "=": 3, "==": 3, "!=": 3,
+    "<": 4, "<=": 4, ">": 4, ">=": 4,
+    "+": 5, "-": 5,
+    "*": 6, "div": 6, "mod": 6,
+}
+_UNARY_BINDING_POWER = 7
+
+# Environment variable setting the number of compiled expressions kept in memory
+CACHE_SIZE_VARIABLE = "SURVEY123PY_EXPRESSION_CACHE_SIZE"
+
+
+def _cache_size_from_env(default: int = 4096) -> int:
+    """
+    Read the expression cache size from `SURVEY123PY_EXPRESSION_CACHE_SIZE`, warning
+    and using `default` if it is not a whole number of at least 0.
+    """
+    value = os.environ.get(CACHE_SIZE_VARIABLE)
+    if value is None or not value.strip():
+        return default
+    try:
+        size = int(value)
+    except ValueError:
+        size = -1
+    if size < 0:
+        warnings.warn(f"Invalid {CACHE_SIZE_VARIABLE} {value!r}. Expected a whole number of at least 0. Using {default}.")
+        return default
+    return size
+
+
+# Number of compiled expressions kept in memory. Set to 0 to disable the cache.
+DEFAULT_CACHE_SIZE = _cache_size_from_env()
+
+_OPERATOR_HELPERS = {
+    "=": "_eq", "==": "_eq", "!=": "_ne",
+    "<": "_lt", "<=": "_le", ">": "_gt", ">=": "_ge",
+    "+": "_add", "-": "_sub", "*": "_mul", "div": "_div", "mod": "_mod",
+}
+
+
+class Expression:
+    """
+    A compiled XLSForm expression.
+
+    Attributes
+    ----------
+    source : str
+        The original expression.
+    tree : tuple
+        Parsed expression as nested tuples, e.g. `("call", "concat", (("var", "q1"), ("str", " ")))`.
+    variables : Tuple[str, ...]
+        Names of the `${name}` references in the order they first appear.
+    uses_current : bool
+        True if the expression uses `.` to refer to the value of the current question.
+    python : str
+        Python source generated for the expression.
+    """
+
+    def __init__(self, source: str, tree: tuple):
+        self.source = source
+        self.tree = tree
+        variables = []
+        self.uses_current = _collect_references(tree, variables)
+        self.variables = tuple(dict.fromkeys(variables))
+        self.python = _generate(tree)
+        self._function = eval(
+            compile(f"lambda _vars, _current, _settings, _choices: {self.python}", "<xlsform>", "eval"),
+            _GLOBALS,
+        )
+
+    def evaluate(
+        self,
+        values: Optional[Mapping[str, Any]] = None,
+        current: Any = None,
+        settings: Optional[dict] = None,
+        choices: Optional[ChoiceIndex] = None,
+    ):
+        """
+        Evaluate the expression.
+
+        Parameters
+        ----------
+        values : Mapping[str, Any], optional
+            Question values referenced by `${name}`.
+        current : any, optional
+            Value of the current question, referenced by `.`
+        settings : dict, optional
+            Settings of the form, used by `version()`.
+        choices : ChoiceIndex, optional
+            Choices of the form, used by `jr:choice-name()`.
+
+        Returns
+        -------
+        any
+            Result of the expression.
+        """
+        if values is None:
+            values = {}
+        try:
+            return self._function(values, current, settings, choices)
+        except KeyError as e:
+            missing = [name for name in self.variables if name not in values]
+            if missing:
+                raise ValueError(f"Element ${{{missing[0]}}} not found in data context. Please check the YAML file.") from e
+            raise
+
+    def __repr__(self):
+        return f"Expression({self.source!r})"
+
+
+def compile_expression(source: str) -> Expression:
+    """
+    Parse an XLSForm expression and compile it to a Python function.
+
+    Compiled expressions are kept in a process-wide LRU cache, so the same
+    expression used by many questions, forms or previews is only compiled once.
+    See `configure_expression_cache` to change the size of the cache.
+
+    Parameters
+    ----------
+    source : str
+        XLSForm expression, e.g. `${q1} mod 2 = 0`.
+
+    Returns
+    -------
+    Expression
+        The compiled expression. It is shared between callers and must not be modified.
+    """
+    return _compile_cached(_normalize(source))
+
+
+def _normalize(source: str) -> str:
+    # Whitespace is only insignificant outside string literals
+    if "'" in source or '"' in source:
+        return source.strip()
+    return " ".join(source.split())
+
+
+def _compile(source: str) -> Expression:
+    return Expression(source, _Parser(source).parse())
+
+
+_compile_cached = lru_cache(maxsize=DEFAULT_CACHE_SIZE)(_compile)
+
+
+def configure_expression_cache(maxsize: int = DEFAULT_CACHE_SIZE):
+    """
+    Set the number of compiled expressions kept in the cache.
+    This clears the cache and its statistics.
+
+    Parameters
+    ----------
+    maxsize : int, optional
+        Maximum number of cached expressions. 0 disables the cache and None
+        removes the limit. Default is 4096, or the value of the
+        `SURVEY123PY_EXPRESSION_CACHE_SIZE` environment variable.
+    """
+    global _compile_cached
+    _compile_cached = lru_cache(maxsize=maxsize)(_compile)
+
+
+def expression_cache_info():
+    """
+    Get the statistics of the compiled expression cache.
+
+    Returns
+    -------
+    functools._CacheInfo
+        Named tuple of `hits`, `misses`, `maxsize` and `currsize`.
+    """
+    return _compile_cached.cache_info()
+
+
+def clear_expression_cache():
+    """
+    Remove all compiled expressions from the cache and reset its statistics.
+    """
+    _compile_cached.cache_clear()
+
+
+def function_name(name: str) -> str:
+    """
+    Convert an XLSForm function name such as `jr:choice-name` to the name of
+    the Python function implementing it, such as `jr_choice_name`.
+    """
+    python_name = name.replace(":", "_").replace("-", "_")
+    return _RESERVED_FUNCTIONS.get(python_name, python_name)
+
+
+def _tokenize(source: str) -> List[Tuple[str, str, int]]:
+    tokens = []
+    pos = 0
+    source = source.rstrip()
+    while pos < len(source):
+        match = _TOKEN_RE.match(source, pos)
+        if match is None or match.end() == pos:
+            raise ValueError(f"Invalid expression '{source}': unexpected character '{source[pos:].lstrip()[:1]}' at position {pos}")
+        kind = match.lastgroup
+        start = match.start(kind) - 2 if kind == "variable" else match.start(kind)
+        tokens.append((kind, match.group(kind), start))
+        pos = match.end()
+    tokens.append(("end", "", len(source)))
+    return tokens
+
+
+class _Parser:
+    """
+    Pratt parser for the XLSForm (XPath 1.0) expression grammar.
+    """
+
+    def __init__(self, source: str):
+        self.source = source
+        self.tokens = _tokenize(source)
+        self.pos = 0
+
+    def parse(self) -> tuple:
+        tree = self._expression(0)
+        kind, value, position = self.tokens[self.pos]
+        if kind != "end":
+            self._error(value, position)
+        return tree
+
+    def _error(self, value, position):
+        if position >= len(self.source.rstrip()):
+            raise ValueError(f"Invalid expression '{self.source}': unexpected end of expression")
+        if self.source.startswith("${", position):
+            value = f"${{{value}}}"
+        raise ValueError(f"Invalid expression '{self.source}': unexpected '{value}' at position {position}")
+
+    def _next(self) -> Tuple[str, str, int]:
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token
+
+    def _expect(self, operator: str):
+        kind, value, position = self._next()
+        if kind != "operator" or value != operator:
+            self._error(value, position)
+
+    def _binary_operator(self) -> Optional[str]:
+        kind, value, _ = self.tokens[self.pos]
+        if kind == "operator" and value in _BINARY_OPERATORS:
+            return value
+        # After an operand, and, or, div and mod are operators even when followed
+        # by a parenthesis, e.g. `(a - b) div (1000 * 60)`
+        if kind == "name" and value in _BINARY_OPERATORS:
+            return value
+        return None
+
+    def _expression(self, min_binding_power: int) -> tuple:
+        left = self._prefix()
+        while True:
+            operator = self._binary_operator()
+            if operator is None or _BINARY_OPERATORS[operator] <= min_binding_power:
+                return left
+            self.pos += 1
+            right = self._expression(_BINARY_OPERATORS[operator])
+            left = ("binop", operator, left, right)
+
+    def _prefix(self) -> tuple:
+        kind, value, position = self._next()
+        if kind == "number":
+            return ("num", float(value) if "." in value else int(value))
+        if kind == "string":
+            return ("str", value[1:-1])
+        if kind == "variable":
+            return ("var", value)
+        if kind == "operator":
+            if value == "(":
+                tree = self._expression(0)
+                self._expect(")")
+                return tree
+            if value == "-":
+                return ("neg", self._expression(_UNARY_BINDING_POWER))
+            if value == ".":
+                return ("current",)
+        if kind == "name":
+            if self.tokens[self.pos][1] == "(":
+                return self._call(value, position)
+            if value in ("true", "True"):
+                return ("bool", True)
+            if value in ("false", "False"):
+                return ("bool", False)
+        self._error(value, position)
+
+    def _call(self, name: str, position: int) -> tuple:
+        python_name = function_name(name)
+        if python_name not in FUNCTIONS:
+            raise ValueError(f"Invalid expression '{self.source}': function {name}() at position {position} is not supported")
+        self._expect("(")
+        args = []
+        if self.tokens[self.pos][1] != ")":
+            args.append(self._expression(0))
+            while self.tokens[self.pos][1] == ",":
+                self.pos += 1
+                args.append(self._expression(0))
+        self._expect(")")
+        return ("call", python_name, tuple(args))
+
+
+def _collect_references(tree: tuple, variables: list) -> bool:
+    """
+    Add the variable names used in the tree to `variables` and return
+    True if the tree refers to the current question.
+    """
+    kind = tree[0]
+    if kind == "var":
+        variables.append(tree[1])
+        return False
+    if kind == "current":
+        return True
+    if kind == "call":
+        uses_current = False
+        for arg in tree[2]:
+            uses_current = _collect_references(arg, variables) or uses_current
+        return uses_current
+    if kind == "binop":
+        uses_current = _collect_references(tree[2], variables)
+        return _collect_references(tree[3], variables) or uses_current
+    if kind == "neg":
+        return _collect_references(tree[1], variables)
+    return False
+
+
+def _generate(tree: tuple) -> str:
+    """
+    Generate Python source for a parsed expression.
+    """
+    kind = tree[0]
+    if kind in ("num", "str", "bool"):
+        return repr(tree[1])
+    if kind == "var":
+        return f"_vars[{tree[1]!r}]"
+    if kind == "current":
+        return "_current"
+    if kind == "neg":
+        return f"_neg({_generate(tree[1])})"
+    if kind == "binop":
+        operator, left, right = tree[1], _generate(tree[2]), _generate(tree[3])
+        if operator in ("and", "or"):
+            return f"(_truth({left}) {operator} _truth({right}))"
+        return f"{_OPERATOR_HELPERS[operator]}({left}, {right})"
+    if kind == "call":
+        name, args = tree[1], [_generate(arg) for arg in tree[2]]
+        # Only the selected branch of if() is evaluated
+        if name == "if_" and len(args) == 3:
+            return f"({args[1]} if _truth({args[0]}) else {args[2]})"
+        if name == "version" and not args:
+            return "version(_settings)"
+        if name == "jr_choice_name" and len(args) == 2:
+            return f"jr_choice_name({args[0]}, {args[1]}, _choices)"
+        return f"{name}({', '.join(args)})"
+    raise ValueError(f"Unknown expression node {kind}")
+
+
+def _truth(value) -> bool:
+    if value is True or value is False:
+        return value
+    return formulas.boolean(value)
+
+
+def _to_number(value):
+    """
+    Convert a value to a number following XPath rules. Values that are not
+    numbers are converted to NaN.
+    """
+    if isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        value = value.strip()
+        try:
+            return int(value)
+        except ValueError:
+            try:
+                return float(value)
+            except ValueError:
+                return math.nan
+    return math.nan
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float))
+
+
+def _comparable(a, b):
+    # Strings compared with numbers are compared as numbers
+    if isinstance(a, str) and _is_number(b):
+        return _to_number(a), b
+    if isinstance(b, str) and _is_number(a):
+        return a, _to_number(b)
+    return a, b
+
+
+def _eq(a, b) -> bool:
+    a, b = _comparable(a, b)
+    return a == b
+
+
+def _ne(a, b) -> bool:
+    return not _eq(a, b)
+
+
+def _ordered(a, b):
+    if _is_number(a) and _is_number(b):
+        return a, b
+    if isinstance(a, str) and isinstance(b, str):
+        return a, b
+    return _to_number(a), _to_number(b)
+
+
+def _lt(a, b) -> bool:
+    a, b = _ordered(a, b)
+    return a < b
+
+
+def _le(a, b) -> bool:
+    a, b = _ordered(a, b)
+    return a <= b
+
+
+def _gt(a, b) -> bool:
+    a, b = _ordered(a, b)
+    return a > b
+
+
+def _ge(a, b) -> bool:
+    a, b = _ordered(a, b)
+    return a >= b
+
+
+def _add(a, b):
+    if not (_is_number(a) and _is_number(b)):
+        a, b = _to_number(a), _to_number(b)
+    return a + b
+
+
+def _sub(a, b):
+    if not (_is_number(a) and _is_number(b)):
+        a, b = _to_number(a), _to_number(b)
+    return a - b
+
+
+def _mul(a, b):
+    if not (_is_number(a) and _is_number(b)):
+        a, b = _to_number(a), _to_number(b)
+    return a * b
+
+
+def _div(a, b):
+    if not (_is_number(a) and _is_number(b)):
+        a, b = _to_number(a), _to_number(b)
+    if b == 0:
+        if a == 0 or a != a:
+            return math.nan
+        return math.copysign(math.inf, a) * math.copysign(1, b)
+    return a / b
+
+
+def _mod(a, b):
+    if not (_is_number(a) and _is_number(b)):
+        a, b = _to_number(a), _to_number(b)
+    if b == 0:
+        return math.nan
+    # XPath keeps the sign of the dividend, like math.fmod
+    if isinstance(a, int) and isinstance(b, int):
+        return a - b * int(a / b)
+    return math.fmod(a, b)
+
+
+def _neg(value):
+    return -value if _is_number(value) else -_to_number(value)
+
+
+_GLOBALS = {
+    "__builtins__": {},
+    **FUNCTIONS,
+    "_truth": _truth,
+    "_eq": _eq, "_ne": _ne, "_lt": _lt, "_le": _le, "_gt": _gt, "_ge": _ge,
+    "_add": _add, "_sub": _sub, "_mul": _mul, "_div": _div, "_mod": _mod,
+    "_neg": _neg,
+}
@@ -1,13 +1,241 @@
-import json
-from pathlib import Path
-import shutil
-import yaml
+import itertools
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+from pathlib import Path
+from collections.abc import MutableSequence
+from typing import Iterable, Iterator, Sized
 
+import numpy as np
 import pandas as pd
-import openpyxl
-from pyxform.xls2json import parse_file_to_json
+from pyxform.xls2json import workbook_to_json
 from pyxform.errors import PyXFormError
+try:
+    from pyxform.xls2json_backends import DefinitionData
+except ImportError:
+    # Older pyxform versions take a plain dictionary
+    DefinitionData = None
+
+from . import choice_sources, tree
+from .model import Form, Settings
+from .templates import TEMPLATE_PATHS, get_template
+from .yaml_loader import load_form
+
+VALIDATION_MODES = ("sync", "async", "off")
+
+_executor = None
+
+
+def _validation_executor() -> ThreadPoolExecutor:
+    """
+    Shared thread pool for background validation, created on first use.
+    """
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(thread_name_prefix="survey123py-validate")
+    return _executor
+
+
+def _xlsform_value(value) -> str:
+    """
+    Convert a cell value to the string pyxform would read from an Excel file.
+    """
+    if value is True:
+        return "TRUE"
+    if value is False:
+        return "FALSE"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if isinstance(value, str):
+        return value.strip().replace(chr(160), " ")
+    return str(value)
+
+
+def _yes(value):
+    # readonly and required are only written when true, e.g. `required: true`
+    try:
+        return "yes" if value == True else np.nan
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _yes_no(value):
+    # YAML reads unquoted yes/no as booleans, e.g. a yes_no list with a choice named yes
+    if value is True:
+        return "yes"
+    if value is False:
+        return "no"
+    return value
+
+
+# Converters of the choices sheet columns, applied to rows loaded and added to it
+_CHOICE_CONVERTERS = {"name": _yes_no, "label": _yes_no}
+
+# Initial number of rows of the columns of a sheet streamed from YAML
+_STREAMED_ROWS = 1024
+
+
+def _build_sheet(records: Iterable[dict], template_columns, converters: dict = None) -> pd.DataFrame:
+    """
+    Build a sheet from YAML records in a single pass. Every column is allocated
+    once and filled directly from the records. The template columns come first,
+    in template order, followed by the other columns in the order they appear.
+    Missing and None values are NaN.
+
+    Parameters
+    ----------
+    records : Iterable[dict]
+        Rows of the sheet as dictionaries of column values. Records streamed from
+        the YAML file have no known length, so the columns grow as they are filled.
+    template_columns : Iterable[str]
+        Columns of the sheet in the template.
+    converters : dict, optional
+        Functions converting the values of a column, applied as the column is filled.
+    """
+    converters = converters or {}
+    size = len(records) if isinstance(records, Sized) else _STREAMED_ROWS
+    columns = {column: [np.nan] * size for column in template_columns}
+    extra_columns = []
+    rows = 0
+    for row, record in enumerate(records):
+        if row == size:
+            for values in columns.values():
+                values.extend([np.nan] * size)
+            size *= 2
+        for column, value in record.items():
+            values = columns.get(column)
+            if values is None:
+                values = columns[column] = [np.nan] * size
+                extra_columns.append(column)
+            if value is not None:
+                values[row] = converters[column](value) if column in converters else value
+        rows = row + 1
+    if rows < size:
+        for values in columns.values():
+            del values[rows:]
+    sheet = pd.DataFrame(columns, dtype=object, copy=False)
+    if extra_columns:
+        # Columns that are not in the template get their own type, as when read from the records
+        sheet[extra_columns] = sheet[extra_columns].infer_objects()
+    return sheet
+
+
+def _source_sheet(chunk: pd.DataFrame, template_columns) -> pd.DataFrame:
+    """
+    Order the columns of a chunk of a choice source like the sheets built by
+    `_build_sheet`, with template columns holding objects.
+    """
+    template_columns = list(template_columns)
+    extra_columns = [column for column in chunk.columns if column not in template_columns]
+    sheet = chunk.reindex(columns=template_columns + extra_columns)
+    sheet[template_columns] = sheet[template_columns].astype(object)
+    return sheet
+
+
+def _sheet_rows(sheet: pd.DataFrame) -> Iterator[list]:
+    """
+    Iterate over the rows of a sheet as `(column, value)` pairs without their empty cells.
+    """
+    columns = list(sheet.columns)
+    for row in sheet.itertuples(index=False, name=None):
+        yield [(column, value) for column, value in zip(columns, row) if not _is_empty(value)]
+
+
+def _sheet_records(sheet: pd.DataFrame) -> list:
+    """
+    Get the rows of a sheet as dictionaries without their empty cells.
+    """
+    return [dict(row) for row in _sheet_rows(sheet)]
+
+
+def _model_survey_row(row: list) -> list:
+    # required and readonly are true in YAML, see _yes
+    return [(column, True if column in ("required", "readonly") and value == "yes" else value) for column, value in row]
+
+
+def _is_empty(value) -> bool:
+    return value is None or value is pd.NA or (isinstance(value, float) and value != value)
+
+
+class _SheetRecords(MutableSequence):
+    """
+    List of the rows of a sheet as dictionaries without their empty cells.
+    It stands in for a section of a YAML file that was streamed into a sheet, so
+    the rows are built as they are read instead of being kept twice. Rows that are
+    added, replaced or removed are written back to the sheet.
+    """
+    __slots__ = ("_sheets", "_name", "_converters")
+
+    def __init__(self, sheets: dict, name: str, converters: dict = None):
+        self._sheets = sheets
+        self._name = name
+        self._converters = converters
+
+    @property
+    def _sheet(self) -> pd.DataFrame:
+        return self._sheets[self._name]
+
+    def __len__(self) -> int:
+        return len(self._sheet)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return _sheet_records(self._sheet.iloc[index])
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("sheet row index out of range")
+        return _sheet_records(self._sheet.iloc[index:index + 1])[0]
+
+    def __iter__(self):
+        return (dict(row) for row in _sheet_rows(self._sheet))
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            records = list(self)
+            records[index] = value
+            self._splice(0, len(self), records)
+            return
+        index = self._row_index(index)
+        self._splice(index, index + 1, [value])
+
+    def __delitem__(self, index):
+        if isinstance(index, slice):
+            records = list(self)
+            del records[index]
+            self._splice(0, len(self), records)
+            return
+        index = self._row_index(index)
+        self._splice(index, index + 1, [])
+
+    def insert(self, index, value):
+        index, _, _ = slice(index, None).indices(len(self))
+        self._splice(index, index, [value])
+
+    def extend(self, values):
+        self._splice(len(self), len(self), list(values))
+
+    def _row_index(self, index: int) -> int:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("sheet row index out of range")
+        return index
+
+    def _splice(self, start: int, stop: int, records: list):
+        # Replace the rows from start to stop with the records, as they are built when loaded
+        sheet = self._sheet
+        rows = _build_sheet(records, sheet.columns, self._converters)
+        parts = [part for part in (sheet.iloc[:start], rows, sheet.iloc[stop:]) if len(part)]
+        if not parts:
+            self._sheets[self._name] = rows
+        elif len(parts) == 1:
+            self._sheets[self._name] = parts[0].reset_index(drop=True)
+        else:
+            self._sheets[self._name] = pd.concat(parts, ignore_index=True)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({len(self)} rows)"
+
 
 @dataclass
 class Sheets:
@@ -42,7 +270,6 @@ class FormData:
     """
 
     def __init__(self, version: str):
-        self._module_dir = Path(__file__).parent
         self.sheets = {
             Sheets.survey: None,
             Sheets.choices: None,
@@ -54,12 +281,8 @@ class FormData:
             Sheets.reference: None,
             Sheets.reserved: None
         }
-        self._template_paths = {
-            "3.22": {
-                "survey": self._module_dir / "template" / "template_3.22.xlsx",
-                "columns": self._module_dir / "template" / "template_3.22_columns.json",
-            },
-        }
+        self._template_paths = TEMPLATE_PATHS
+        self._template = None
         self.yaml_data = None
         self.form_version = None
         self._load_template(version)
@@ -70,22 +293,22 @@ class FormData:
         Load Survey123 template according to the version
         and store it in the sheets property to be filled in later.
 
+        The template workbook is parsed once per process and shared between
+        instances. Each instance gets its own copy of the sheets.
+
         Parameters
         ----------
         version : str
             Template version being used for Survey123
         """
-
-        
-        if version not in self._template_paths.keys():
-            raise ValueError(f"Version {version} not supported. Supported versions are: {list(self._template_paths.keys())}")
+        self._template = get_template(version)
 
         for sheet_name in self.sheets.keys():
-            try:
-                self.sheets[sheet_name] = pd.read_excel(self._template_paths[version][Sheets.survey], sheet_name=sheet_name)
-            except ValueError as e:
-                print(f"Error loading sheet {sheet_name}: {e}")
-        self.form_version = self.sheets[Sheets.version].iloc[1]["Unnamed: 1"]
+            if sheet_name not in self._template.sheets:
+                print(f"Error loading sheet {sheet_name}: Worksheet named '{sheet_name}' not found")
+                continue
+            self.sheets[sheet_name] = self._template.sheet(sheet_name)
+        self.form_version = self._template.form_version
     
     def load_yaml(self, path: str):
         """
@@ -111,24 +334,34 @@ class FormData:
         survey.sheets["choices"]  # Access the choices sheet
         ```
 
+        The parsed YAML document is kept in `yaml_data`. The choices are streamed into
+        the choices sheet as they are parsed, so `yaml_data["choices"]` is a list of
+        the rows of the choices sheet as dictionaries, built as they are read. Choices
+        added, replaced or removed in it are written back to the choices sheet.
+
         Parameters
         ----------
         path : str
             Path to the survey data file.
         """
-        # Load YAML file
-        with open(path, 'r') as file:
-            survey_data = yaml.safe_load(file)
-            self.yaml_data = survey_data
+        template_cols = self._template.columns
+
+        # Load YAML file. The choices are streamed into the choices sheet as they are parsed.
+        base_dir = Path(path).parent
+        choices_sheet = None
 
-        # Validate
-        with open(self._template_paths[self.form_version]["columns"]) as f:
-            template_cols = json.load(f)
+        def load_choices(choices):
+            nonlocal choices_sheet
+            choices_sheet = self._load_yaml_choices_sheet(choices or [], template_cols, base_dir)
+            return _SheetRecords(self.sheets, Sheets.choices, _CHOICE_CONVERTERS)
+
+        survey_data = load_form(path, {Sheets.choices: load_choices})
+        self.yaml_data = survey_data
 
         if Sheets.survey in survey_data.keys():
             self.sheets[Sheets.survey] = self._load_yaml_survey_sheet(survey_data, template_cols)
-        if Sheets.choices in survey_data.keys():
-            self.sheets[Sheets.choices] = self._load_yaml_choices_sheet(survey_data, template_cols)
+        if choices_sheet is not None:
+            self.sheets[Sheets.choices] = choices_sheet
         if Sheets.settings in survey_data.keys():
             self.sheets[Sheets.settings] = self._load_yaml_settings_sheet(survey_data)
                 
@@ -140,123 +373,247 @@ class FormData:
             survey_data[Sheets.settings] = [survey_data[Sheets.settings]]
         return pd.DataFrame(survey_data[Sheets.settings])
     
-    def _load_yaml_choices_sheet(self, survey_data, template_cols):
-        choices_data_processed = []
-        for field in survey_data[Sheets.choices]:
-            choices_data_processed.append(field)
-        df_input = pd.DataFrame(choices_data_processed)
-        df_input["name"] = df_input["name"].replace({True: "yes", False: "no"})
-        df_input["label"] = df_input["label"].replace({True: "yes", False: "no"})
-        df = pd.DataFrame(columns=template_cols[Sheets.choices])
-        return pd.concat([df, df_input], axis=0, ignore_index=True)
+    def _load_yaml_choices_sheet(self, choices, template_cols, base_dir=None):
+        converters = _CHOICE_CONVERTERS
+        columns = template_cols[Sheets.choices]
+        parts = []
+        # Consecutive choices written in the YAML file are built together, and
+        # files of source entries are added in chunks where they are referred to
+        for from_source, group in itertools.groupby(choices, key=choice_sources.is_source):
+            if not from_source:
+                parts.append(_build_sheet(group, columns, converters))
+                continue
+            for entry in group:
+                parts.extend(_source_sheet(chunk, columns) for chunk in choice_sources.read_source(entry, base_dir))
+        if len(parts) == 1:
+            return parts[0]
+        if not parts:
+            return _build_sheet([], columns)
+        return pd.concat(parts, ignore_index=True)
     
     def _load_yaml_survey_sheet(self, survey_data, template_cols):
-        survey_data_processed = []
-        for _, field in enumerate(survey_data[Sheets.survey]):
-            
-            # Process groups and add the begin/end group statements automatically
-            if field["type"] == "group":
-                survey_data_processed.append({"type": "begin group", "name": field["name"], "label": field["label"]})
-                for child in field["children"]:
-                    survey_data_processed.append(child)
-                survey_data_processed.append({"type": "end group"})
-                continue
+        # Groups and repeats are written as begin/end rows around their questions
+        rows = tree.flatten(survey_data[Sheets.survey])
+        converters = {"readonly": _yes, "required": _yes}
+        return _build_sheet(rows, template_cols[Sheets.survey], converters)
 
-            # Process repeats and add the begin/end group statements automatically
-            if field["type"] == "repeat":
-                survey_data_processed.append({"type": "begin repeat", "name": field["name"], "label": field["label"]})
-                for child in field["children"]:
-                    survey_data_processed.append(child)
-                survey_data_processed.append({"type": "end repeat"})
-                continue
-            survey_data_processed.append(field)
-    
-        df_input = pd.DataFrame(survey_data_processed)
-        if "readonly" not in df_input.columns:
-            df_input["readonly"] = ""
-        if "required" not in df_input.columns:
-            df_input["required"] = ""
-        df_input["readonly"] = df_input["readonly"].map({True: "yes"})
-        df_input["required"] = df_input["required"].map({True: "yes"})
-        
-        
-        df = pd.DataFrame(columns=template_cols[Sheets.survey])
-        return pd.concat([df, df_input], axis=0, ignore_index=True)
+    def load_model(self, form: Form, base_dir: str = None):
+        """
+        Load a form model into the sheets, as `load_yaml` does for a YAML file.
+        The sheets are built from the rows of the model. `yaml_data` holds the
+        questions of the form as its survey, and the choices as in `load_yaml`.
+
+        ```python
+        from survey123py.model import Form
+
+        form = Form.from_dict({"survey": [{"type": "text", "name": "site", "label": "Site"}]})
+        survey = FormData("3.22")
+        survey.load_model(form)
+        survey.save_survey("survey.xlsx")
+        ```
 
-    def save_survey(self, outpath: str):
+        Parameters
+        ----------
+        form : survey123py.model.Form
+            The form to load.
+        base_dir : str, optional
+            Directory of the relative paths of choice sources.
+        """
+        template_cols = self._template.columns
+        survey_data = {Sheets.survey: form.questions}
+        self.sheets[Sheets.survey] = self._load_yaml_survey_sheet(survey_data, template_cols)
+        if form.choices:
+            self.sheets[Sheets.choices] = self._load_yaml_choices_sheet(form.choices, template_cols, base_dir)
+            survey_data[Sheets.choices] = _SheetRecords(self.sheets, Sheets.choices, _CHOICE_CONVERTERS)
+        if form.settings is not None:
+            survey_data[Sheets.settings] = form.settings.to_dict()
+            self.sheets[Sheets.settings] = self._load_yaml_settings_sheet(survey_data)
+        self.yaml_data = survey_data
+
+    def to_model(self) -> Form:
+        """
+        Build a form model from the loaded survey, choices and settings sheets.
+        Groups and repeats are nested from their begin and end rows, `required`
+        and `readonly` are true as in YAML, and empty cells are left out.
+
+        Returns
+        -------
+        survey123py.model.Form
+            The form of the sheets.
+        """
+        form = Form()
+        sheets = {
+            sheet_name: self.sheets.get(sheet_name)
+            for sheet_name in (Sheets.survey, Sheets.choices, Sheets.settings)
+            if sheet_name in (self.yaml_data or {})
+        }
+        # The rows are added to the model as they are read from the sheets
+        if sheets.get(Sheets.survey) is not None:
+            form.add_survey_rows(_model_survey_row(row) for row in _sheet_rows(sheets[Sheets.survey]))
+        if sheets.get(Sheets.choices) is not None:
+            for row in _sheet_rows(sheets[Sheets.choices]):
+                form.add_choice(row)
+        if sheets.get(Sheets.settings) is not None:
+            # Settings only have a single row
+            settings = next(_sheet_rows(sheets[Sheets.settings]), None)
+            if settings is not None:
+                form.settings = Settings(settings)
+        return form
+
+    def save_survey(self, outpath: str, validate: str = "sync"):
         """
         Save the survey data to the specified path.
+
+        The output is validated against the ODK standard using the sheet data
+        already in memory, so the saved file does not need to be read again.
+
+        Parameters
+        ----------
+        outpath : str
+            Path to save the Excel file.
+        validate : str, optional
+            How to validate the output. Default is "sync".
+            - "sync": validate before returning and print a warning if the form is not valid.
+            - "async": validate in a background thread. A warning is printed when done.
+            - "off": skip validation, for inputs that are known to be valid.
+
+        Returns
+        -------
+        tuple, concurrent.futures.Future or None
+            `(is_valid, error)` with `validate="sync"`, a future resolving to
+            `(is_valid, error)` with `validate="async"` and None with `validate="off"`.
         """
-        # Copy template file to the output path and load it using openpyxl
-        # to preserve formatting and styles
-        shutil.copy(self._template_paths[self.form_version][Sheets.survey], outpath)
-        wb = openpyxl.load_workbook(outpath)
+        if validate not in VALIDATION_MODES:
+            raise ValueError(f"Validation mode {validate} not supported. Supported modes are: {list(VALIDATION_MODES)}")
 
-        with open(self._template_paths[self.form_version]["columns"]) as f:
-            template_cols = json.load(f)
+        template_cols = self._template.columns
         
-        # Iterate through the sheets and write the data to the corresponding sheets
+        # Collect the rows of each sheet to be written
         target_sheets = [Sheets.survey, Sheets.choices, Sheets.settings]
+        sheet_rows = {}
         for sheet_name in list(self.yaml_data.keys()):
             sheet_data = self.sheets.get(sheet_name, None)
             if sheet_data is None or sheet_name not in target_sheets:
                 continue
-            
-            ws = wb[sheet_name]
-            excel_col = None
-            excel_row = None
 
             if sheet_name == Sheets.settings:
-                input_data = sheet_data.iloc[0].to_dict()
-                for col in template_cols["settings"]:
-                    excel_col = template_cols["settings"][col]
-                    excel_row = 2
-                    target_cell = f"{excel_col}{excel_row}"
-                    ws[target_cell].value = input_data.get(col, None)
-
-            if sheet_name == Sheets.survey or sheet_name == Sheets.choices:
-
+                # Settings only have a single row of values below the column titles
+                rows = self._sheet_rows(sheet_data.iloc[:1], template_cols[sheet_name])
+                start_row = 2
+            else:
                 # Start at row 3 to give some space between column titles and data
-                excel_row = 3
-
-                for _, row in sheet_data.iterrows():
-                    input_data = row.to_dict()
-                    if sheet_name == Sheets.choices:
-                        for col in template_cols["choices"]:
-                            excel_col = template_cols["choices"][col]
-                            target_cell = f"{excel_col}{excel_row}"
-                            cell_data = input_data.get(col, None)
-                            # if pd.isna(cell_data) is False:
-                            #     print("Writing to cell", target_cell, ":", cell_data)
-                            ws[target_cell].value = cell_data
-                        excel_row += 1
-                    
-                    if sheet_name == Sheets.survey:
-                        for col in template_cols["survey"]:
-                            excel_col = template_cols["survey"][col]
-                            target_cell = f"{excel_col}{excel_row}"
-                            cell_data = input_data.get(col, None)
-                            ws[target_cell].value = cell_data
-                        excel_row += 1
-
-        wb.save(outpath)
+                rows = self._sheet_rows(sheet_data, template_cols[sheet_name])
+                start_row = 3
+            sheet_rows[sheet_name] = (rows, template_cols[sheet_name], start_row)
+
+        # The template workbook is kept in memory, so only the sheets with new data
+        # are rebuilt and the output file is written once
+        self._template.workbook.save(outpath, sheet_rows)
         
         # Validate output file is valid
-        is_valid, error = self._validate_survey(outpath)
+        if validate == "sync":
+            result = self._validate_sheets(sheet_rows, Path(outpath).stem)
+            self._report_validation(result)
+            return result
+        elif validate == "async":
+            future = _validation_executor().submit(self._validate_sheets, sheet_rows, Path(outpath).stem)
+            future.add_done_callback(lambda done: self._report_validation(done.result()))
+            return future
+
+    @classmethod
+    def generate_batch(cls, jobs, version: str = "3.22", workers: int = None, validate: str = "sync", cache_dir: str = None) -> list:
+        """
+        Generate Excel files for many YAML files using a pool of worker processes.
+        Each worker loads the template once. A failing form does not stop the batch.
+
+        ```python
+        from survey123py.batch import find_batch_jobs
+
+        results = FormData.generate_batch(find_batch_jobs("forms/*.yaml", "build"))
+        failed = [result for result in results if not result.success]
+        ```
+
+        Parameters
+        ----------
+        jobs : Iterable[Tuple[str, str]]
+            `(input_path, output_path)` pairs.
+        version : str, optional
+            Template version to use, by default "3.22"
+        workers : int, optional
+            Number of worker processes. Defaults to the number of CPUs.
+        validate : str, optional
+            Validation mode passed to `save_survey`. Default is "sync".
+        cache_dir : str, optional
+            Directory of a `survey123py.cache.BuildCache` used to skip unchanged forms.
+            By default no cache is used.
+
+        Returns
+        -------
+        List[survey123py.batch.BatchResult]
+            Result and timing of each form in the order of `jobs`.
+        """
+        from .batch import generate_batch
+        return generate_batch(jobs, version=version, workers=workers, validate=validate, cache_dir=cache_dir)
+
+    @staticmethod
+    def _report_validation(result):
+        is_valid, error = result
         if is_valid is False:
             print(f"Warning: Output file is not valid.")
             print(error)
-        
 
-    def _validate_survey(self, path) -> bool:
+    @staticmethod
+    def _sheet_rows(sheet_data: pd.DataFrame, columns) -> list:
+        """
+        Convert a sheet to a list of row tuples ordered by the template columns.
+        Empty values are returned as None.
+        """
+        frame = sheet_data.reindex(columns=list(columns)).astype(object)
+        frame = frame.where(frame.notna(), None)
+        return list(frame.itertuples(index=False, name=None))
+
+    def _validate_sheets(self, sheet_rows: dict, form_name: str = None) -> tuple:
         """
-        Validate the .xlsx file is valid according to ODK standard.
+        Validate the sheet data according to ODK standard without reading the saved file.
+
+        Parameters
+        ----------
+        sheet_rows : dict
+            Sheet name mapped to `(rows, columns, start_row)` as written by `save_survey`.
+            Sheets that are not included are validated using the template data.
+        form_name : str, optional
+            Fallback form name used when the settings do not have a form_id.
         """
+        workbook_dict = {"sheet_names": list(self._template.sheets.keys())}
+        for sheet_name in (Sheets.survey, Sheets.choices, Sheets.settings):
+            columns = self._template.columns[sheet_name]
+            if sheet_name in sheet_rows:
+                rows, columns, start_row = sheet_rows[sheet_name]
+            else:
+                rows, start_row = self._sheet_rows(self._template.sheets[sheet_name], columns), 2
+
+            # Match the rows produced by pyxform when reading a file. Blank rows
+            # between the column titles and the data are kept to keep row numbers
+            # in error messages correct.
+            records = [{} for _ in range(start_row - 2)]
+            for row in rows:
+                records.append({
+                    col: _xlsform_value(value) for col, value in zip(columns, row)
+                    if value is not None and str(value).strip() != ""
+                })
+            while records and not records[-1]:
+                records.pop()
+            workbook_dict[sheet_name] = records
+            workbook_dict[f"{sheet_name}_header"] = [{col: None for col in columns}]
+
+        if DefinitionData is not None:
+            workbook_dict = DefinitionData(fallback_form_name=form_name, **workbook_dict)
         try:
-            survey = parse_file_to_json(path)
+            workbook_to_json(workbook_dict, fallback_form_name=form_name)
             return True, None
         except PyXFormError as e:
             return False, e
 
+
 if __name__ == "__main__":
     pass
@@ -5,7 +5,8 @@ import math
 import builtins
 import uuid
 import random
-import re
+
+from . import dates, patterns, selections
 
 def if_(statement, a, b) -> bool:
     """
@@ -67,11 +68,10 @@ def date(value: str) -> str:
     """
     if value is None or value == '':
         return None  # Return None for empty values to keep the question empty
-    try:
-        outval = datetime.strptime(value, '%Y-%m-%d').replace(tzinfo=timezone.utc).timestamp() * 1000
-        return int(outval)
-    except ValueError:
+    parsed = dates.get_format(dates.DATE_FORMAT).parse(value)
+    if parsed is None:
         raise ValueError(f"Value '{value}' is unsupported. The value must be a valid date in 'YYYY-MM-DD' format.")
+    return dates.epoch_milliseconds(parsed.replace(tzinfo=timezone.utc))
 
 def format_date(datetime_val: str, format: str) -> str:
     """
@@ -356,11 +356,8 @@ def selected(multi_select_answer: str, choice_value: str) -> bool:
     if not multi_select_answer or not choice_value:
         return False
     
-    # Convert to string and split by commas to get individual selections
-    selections = str(multi_select_answer).split(',')
-    # Strip whitespace from each selection
-    selections = [sel.strip() for sel in selections]
-    return str(choice_value) in selections
+    # The answer is split into its selected values once, see `selections.parse`
+    return str(choice_value) in selections.parse(multi_select_answer).choices
 
 def selected_at(multi_select_answer: str, index: int) -> str:
     """
@@ -375,36 +372,35 @@ def selected_at(multi_select_answer: str, index: int) -> str:
     if not multi_select_answer:
         return ""
     
-    # Convert to string and split by commas to get individual selections
-    selections = str(multi_select_answer).split(',')
-    # Strip whitespace from each selection
-    selections = [sel.strip() for sel in selections]
+    values = selections.parse(multi_select_answer).values
     
     # Check if index is valid
-    if index < 0 or index >= len(selections):
+    if index < 0 or index >= len(values):
         return ""
     
-    return selections[index]
+    return values[index]
 
-def jr_choice_name(choice_value: str, question_name: str) -> str:
+def jr_choice_name(choice_value: str, question_name: str, choices=None) -> str:
     """
     Returns the label/display text for a given choice value from a specified question.
-    This is a simplified implementation that returns the choice_value since we don't have
-    access to the choice definitions in the formula context.
-    
-    In a real Survey123 form, this would look up the label from the choices sheet
-    based on the question's choice list.
+    The label is looked up in the choice list of the question, given by its name or as
+    '${question}'. If the choices of the form are not available or the value is not in
+    the choice list, the choice_value is returned.
+
+    `choices` is the `survey123py.choices.ChoiceIndex` of the form, which is passed by
+    the previewer.
 
     Example:
 
-    `jr:choice-name(${priority}, 'priority')`
+    `jr:choice-name(${priority}, '${priority}')`
     """
-    # In a real implementation, this would:
-    # 1. Look up the question to find its choice list
-    # 2. Look up the choice_value in that choice list
-    # 3. Return the corresponding label
-    # For now, we return the choice_value as a placeholder
-    return str(choice_value) if choice_value else ""
+    if not choice_value:
+        return ""
+    if choices is not None:
+        label = choices.label(question_name, choice_value)
+        if label is not None:
+            return label
+    return str(choice_value)
 
 def boolean(value: any) -> bool:
     """
@@ -465,11 +461,8 @@ def count_selected(multi_select_answer: str) -> int:
     if not multi_select_answer:
         return 0
     
-    # Convert to string and split by commas to get individual selections
-    selections = str(multi_select_answer).split(',')
-    # Filter out empty selections after stripping whitespace
-    selections = [sel.strip() for sel in selections if sel.strip()]
-    return len(selections)
+    # Empty selections are not counted
+    return selections.parse(multi_select_answer).count
 
 def date_time(value: str) -> str:
     """
@@ -486,21 +479,11 @@ def date_time(value: str) -> str:
     if isinstance(value, str) and value.startswith("'") and value.endswith("'"):
         value = value[1:-1]
     
-    try:
-        # Try parsing as ISO format first (YYYY-MM-DDTHH:MM:SS)
-        if 'T' in value:
-            dt = datetime.strptime(value, '%Y-%m-%dT%H:%M:%S')
-        else:
-            # Try parsing as date + time format
-            dt = datetime.strptime(value, '%Y-%m-%d %H:%M:%S')
-        return int(dt.timestamp() * 1000)
-    except ValueError:
-        try:
-            # Fallback to date only
-            dt = datetime.strptime(value, '%Y-%m-%d')
-            return int(dt.timestamp() * 1000)
-        except ValueError:
-            raise ValueError(f"Value '{value}' is not a valid datetime format")
+    # ISO format (YYYY-MM-DDTHH:MM:SS), date and time (YYYY-MM-DD HH:MM:SS) or date only
+    dt = dates.parse_date_time(value)
+    if dt is None:
+        raise ValueError(f"Value '{value}' is not a valid datetime format")
+    return dates.epoch_milliseconds(dt)
 
 def decimal_date_time(timestamp) -> float:
     """
@@ -612,7 +595,7 @@ def now() -> int:
 
     `now()`
     """
-    return int(datetime.now().timestamp() * 1000)
+    return dates.epoch_milliseconds(dates.current_time())
 
 def number(value) -> float:
     """
@@ -669,7 +652,7 @@ def today() -> int:
     `today()`
     """
     # Get current date and set time to midnight
-    today_date = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    today_date = dates.current_time().replace(hour=0, minute=0, second=0, microsecond=0)
     return int(today_date.timestamp() * 1000)
 
 def sum(*args) -> float:
@@ -701,11 +684,8 @@ def regex(pattern: str, text: str) -> bool:
     if not pattern or not text:
         return False
     
-    try:
-        return bool(re.search(str(pattern), str(text)))
-    except re.error:
-        # Invalid regex pattern
-        return False
+    # Patterns are compiled once and invalid patterns never match, see `patterns.search`
+    return patterns.search(str(pattern), str(text))
 
 def random() -> float:
     """
@@ -0,0 +1,217 @@
+"""
+Date and time helpers for the formulas in `survey123py.formulas`.
+
+Date formats such as `%Y-%m-%d` are compiled once into a `DateFormat` and
+cached, so parsing a value is a regular expression match instead of a call to
+`datetime.strptime`, and a value that does not match a format is rejected
+without raising and catching an exception.
+
+The clock used by `now()` and `today()` can be replaced, so previews give the
+same results every time they run:
+
+```python
+from datetime import datetime
+from survey123py.formulas import dates, now
+
+with dates.use_clock(datetime(2024, 6, 14, 10, 30)):
+    now()  # always 2024-06-14 10:30 local time
+```
+"""
+
+import re
+from contextlib import contextmanager
+from datetime import datetime
+from functools import lru_cache
+from typing import Callable, Optional, Union
+
+# Regular expression and datetime field of the supported strptime directives
+_DIRECTIVES = {
+    "Y": (r"\d{4}", "year"),
+    "m": (r"\d{1,2}", "month"),
+    "d": (r"\d{1,2}", "day"),
+    "H": (r"\d{1,2}", "hour"),
+    "M": (r"\d{1,2}", "minute"),
+    "S": (r"\d{1,2}", "second"),
+}
+
+# Formats accepted by date() and date-time()
+DATE_FORMAT = "%Y-%m-%d"
+DATE_TIME_FORMATS = ("%Y-%m-%dT%H:%M:%S", "%Y-%m-%d %H:%M:%S")
+
+_clock: Callable[[], datetime] = datetime.now
+
+
+class DateFormat:
+    """
+    A strptime/strftime format string split into literal text and directives.
+
+    Attributes
+    ----------
+    format : str
+        The original format string, e.g. `%Y-%m-%d`.
+    tokens : Tuple[Tuple[str, str], ...]
+        `("literal", text)` and `("directive", letter)` pairs in order.
+    pattern : re.Pattern or None
+        Regular expression matching values in this format with a group per field,
+        or None if the format has directives that cannot be parsed.
+    fields : Tuple[str, ...]
+        datetime fields of the groups of `pattern`.
+    """
+
+    def __init__(self, format: str):
+        self.format = format
+        tokens = []
+        literal = []
+        i = 0
+        while i < len(format):
+            if format[i] == "%" and i + 1 < len(format):
+                letter = format[i + 1]
+                if letter == "%":
+                    literal.append("%")
+                else:
+                    if literal:
+                        tokens.append(("literal", "".join(literal)))
+                        literal = []
+                    tokens.append(("directive", letter))
+                i += 2
+            else:
+                literal.append(format[i])
+                i += 1
+        if literal:
+            tokens.append(("literal", "".join(literal)))
+        self.tokens = tuple(tokens)
+
+        fields = []
+        regex = []
+        for kind, value in self.tokens:
+            if kind == "literal":
+                regex.append(re.escape(value))
+            elif value in _DIRECTIVES and _DIRECTIVES[value][1] not in fields:
+                regex.append(f"({_DIRECTIVES[value][0]})")
+                fields.append(_DIRECTIVES[value][1])
+            else:
+                regex = None
+                break
+        self.fields = tuple(fields)
+        self.pattern = re.compile("".join(regex)) if regex is not None and "year" in fields else None
+
+    def parse(self, value) -> Optional[datetime]:
+        """
+        Parse a value in this format.
+
+        Parameters
+        ----------
+        value : str
+            Value to parse.
+
+        Returns
+        -------
+        datetime or None
+            Naive datetime, or None if the value does not match the format or is not a valid date.
+        """
+        if not isinstance(value, str):
+            return None
+        if self.pattern is None:
+            try:
+                return datetime.strptime(value, self.format)
+            except ValueError:
+                return None
+        match = self.pattern.fullmatch(value)
+        if match is None:
+            return None
+        parts = dict(zip(self.fields, map(int, match.groups())))
+        parts.setdefault("month", 1)
+        parts.setdefault("day", 1)
+        try:
+            return datetime(**parts)
+        except ValueError:
+            return None
+
+    def __repr__(self):
+        return f"DateFormat({self.format!r})"
+
+
+@lru_cache(maxsize=256)
+def get_format(format: str) -> DateFormat:
+    """
+    Get the compiled version of a format string. Formats are compiled once and cached.
+
+    Parameters
+    ----------
+    format : str
+        strptime/strftime format string, e.g. `%Y-%m-%d`.
+
+    Returns
+    -------
+    DateFormat
+        The compiled format.
+    """
+    return DateFormat(format)
+
+
+def parse_date_time(value: str) -> Optional[datetime]:
+    """
+    Parse a value accepted by `date-time()`: a date and time separated by `T` or a
+    space, or a date only.
+
+    Returns
+    -------
+    datetime or None
+        Naive datetime, or None if the value is not in a supported format.
+    """
+    if not isinstance(value, str):
+        return None
+    format = DATE_TIME_FORMATS[0] if "T" in value else DATE_TIME_FORMATS[1]
+    return get_format(format).parse(value) or get_format(DATE_FORMAT).parse(value)
+
+
+def set_clock(clock: Union[Callable[[], datetime], datetime, None] = None):
+    """
+    Set the clock used by `now()` and `today()`.
+
+    Parameters
+    ----------
+    clock : callable, datetime or None, optional
+        Function returning the current datetime, or a datetime to freeze the clock at.
+        None restores the system clock. Naive datetimes are in local time.
+    """
+    global _clock
+    if clock is None:
+        clock = datetime.now
+    elif isinstance(clock, datetime):
+        clock = _frozen(clock)
+    _clock = clock
+
+
+def _frozen(moment: datetime) -> Callable[[], datetime]:
+    return lambda: moment
+
+
+@contextmanager
+def use_clock(clock: Union[Callable[[], datetime], datetime, None]):
+    """
+    Use a clock for `now()` and `today()` inside a `with` block.
+    See `set_clock` for the parameters.
+    """
+    global _clock
+    previous = _clock
+    set_clock(clock)
+    try:
+        yield
+    finally:
+        _clock = previous
+
+
+def current_time() -> datetime:
+    """
+    Get the current datetime from the clock set with `set_clock`.
+    """
+    return _clock()
+
+
+def epoch_milliseconds(value: datetime) -> int:
+    """
+    Convert a datetime to a Survey123 timestamp in milliseconds.
+    Naive datetimes are in local time.
+    """
+    return int(value.timestamp() * 1000)
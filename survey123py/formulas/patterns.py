@@ -0,0 +1,137 @@
+"""
+Compiled regular expressions for the `regex()` formula.
+
+Patterns are compiled once and kept in a bounded cache, so forms with many
+distinct patterns do not recompile them on every evaluation. The cache
+statistics are available from `compile_pattern.cache_info()`.
+
+A pattern with catastrophic backtracking can take a very long time to match.
+A time budget per match can be set, after which `regex()` raises a ValueError
+instead of stalling the preview:
+
+```python
+from survey123py.formulas import patterns, regex
+
+with patterns.use_timeout(0.5):
+    regex("^(a+)+$", "a" * 40 + "b")  # ValueError after half a second
+```
+
+The budget uses a timer signal, so it only applies in the main thread on
+platforms with `signal.setitimer`. Elsewhere matches run without a budget.
+"""
+
+import re
+import signal
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Optional
+
+CACHE_SIZE = 1024
+
+_timeout: Optional[float] = None
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def compile_pattern(pattern: str) -> Optional[re.Pattern]:
+    """
+    Get the compiled version of a regular expression. Patterns are compiled once
+    and the last `CACHE_SIZE` patterns used are cached.
+
+    Parameters
+    ----------
+    pattern : str
+        Regular expression.
+
+    Returns
+    -------
+    re.Pattern or None
+        The compiled pattern, or None if the pattern is not a valid regular expression.
+    """
+    try:
+        return re.compile(pattern)
+    except re.error:
+        return None
+
+
+def set_timeout(seconds: Optional[float] = None):
+    """
+    Set the time budget of every match of `regex()`.
+
+    Parameters
+    ----------
+    seconds : float or None, optional
+        Maximum time of a match in seconds. None removes the budget.
+    """
+    global _timeout
+    if seconds is not None and seconds <= 0:
+        raise ValueError(f"Timeout must be greater than 0, got {seconds}")
+    _timeout = seconds
+
+
+@contextmanager
+def use_timeout(seconds: Optional[float]):
+    """
+    Use a time budget for `regex()` inside a `with` block.
+    See `set_timeout` for the parameters.
+    """
+    global _timeout
+    previous = _timeout
+    set_timeout(seconds)
+    try:
+        yield
+    finally:
+        _timeout = previous
+
+
+class _Timeout(Exception):
+    pass
+
+
+def _raise_timeout(signum, frame):
+    raise _Timeout()
+
+
+def _can_interrupt() -> bool:
+    # Timer signals are only delivered to the main thread, and an existing timer is left alone
+    return (
+        hasattr(signal, "setitimer")
+        and threading.current_thread() is threading.main_thread()
+        and signal.getitimer(signal.ITIMER_REAL)[0] == 0
+    )
+
+
+def search(pattern: str, text: str) -> bool:
+    """
+    Check whether a regular expression matches anywhere in a text, within the
+    time budget set with `set_timeout`.
+
+    Parameters
+    ----------
+    pattern : str
+        Regular expression.
+    text : str
+        Text to search.
+
+    Returns
+    -------
+    bool
+        True if the pattern matches. Invalid patterns never match.
+    """
+    compiled = compile_pattern(pattern)
+    if compiled is None:
+        return False
+    if _timeout is None or not _can_interrupt():
+        return compiled.search(text) is not None
+
+    previous = signal.signal(signal.SIGALRM, _raise_timeout)
+    try:
+        signal.setitimer(signal.ITIMER_REAL, _timeout)
+        try:
+            return compiled.search(text) is not None
+        finally:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+    except _Timeout:
+        raise ValueError(f"Regular expression '{pattern}' took longer than {_timeout} seconds to match") from None
+    finally:
+        signal.signal(signal.SIGALRM, previous)
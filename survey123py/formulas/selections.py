@@ -0,0 +1,67 @@
+"""
+Parsed answers of `select_multiple` questions.
+
+An answer such as `option1, option3` is split into its selected values once
+and cached, so `selected()`, `selected-at()` and `count-selected()` look values
+up instead of splitting the answer on every call. Equal answers share the same
+`Selection`:
+
+```python
+from survey123py.formulas import selections
+
+answer = selections.parse("option1, option3")
+answer.values  # ("option1", "option3")
+"option3" in answer.choices  # True
+selections.parse("option1, option3") is answer  # True
+```
+"""
+
+from functools import lru_cache
+
+
+class Selection(str):
+    """
+    Answer of a `select_multiple` question. It is the comma-separated text of the
+    answer, so it can be used like any other text in expressions.
+
+    Attributes
+    ----------
+    values : Tuple[str, ...]
+        Selected values in order with the whitespace around them removed,
+        including empty values, e.g. for `a,,b`.
+    choices : FrozenSet[str]
+        Selected values, for membership tests.
+    count : int
+        Number of selected values that are not empty.
+    """
+
+    def __new__(cls, answer: str):
+        selection = super().__new__(cls, answer)
+        selection.values = tuple(value.strip() for value in answer.split(","))
+        selection.choices = frozenset(selection.values)
+        selection.count = sum(1 for value in selection.values if value)
+        return selection
+
+
+@lru_cache(maxsize=4096)
+def _parse(answer: str) -> Selection:
+    return Selection(answer)
+
+
+def parse(answer) -> Selection:
+    """
+    Get the parsed version of a multi-select answer. Answers are parsed once and cached.
+
+    Parameters
+    ----------
+    answer : Any
+        Comma-separated selected values. Other values are converted to text first.
+
+    Returns
+    -------
+    Selection
+        The parsed answer.
+    """
+    if isinstance(answer, Selection):
+        return answer
+    return _parse(str(answer))
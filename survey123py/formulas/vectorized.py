@@ -0,0 +1,492 @@
+"""
+Vectorized versions of the math formulas in `survey123py.formulas`.
+
+The functions have the same names as the scalar formulas and accept scalars,
+NumPy arrays or pandas Series. Empty and non-numeric values become NaN, and
+values outside the domain of a function return NaN instead of raising an
+error, so a whole column can be evaluated at once. Series keep their index.
+
+```python
+import pandas as pd
+from survey123py.formulas import vectorized
+
+vectorized.sqrt(pd.Series([4, -1, None]))  # [2.0, NaN, NaN]
+vectorized.max(pd.Series([1, 5]), 3)  # [3.0, 5.0]
+vectorized.date(pd.Series(["2024-06-14", "June 14"]))  # [1718323200000.0, NaN]
+```
+"""
+
+import builtins
+import functools
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from . import dates
+
+
+def _numbers(value) -> np.ndarray:
+    """
+    Convert a value to a float array. Empty and non-numeric values become NaN.
+    """
+    if isinstance(value, pd.Series):
+        if value.dtype.kind in "biuf":
+            return value.to_numpy(dtype=float, na_value=np.nan)
+        return pd.to_numeric(value, errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+    if isinstance(value, np.ndarray):
+        if value.dtype.kind in "biuf":
+            return value.astype(float)
+        return pd.to_numeric(pd.Series(value.ravel()), errors="coerce").to_numpy(dtype=float).reshape(value.shape)
+    if value is None or value == "":
+        return np.array(np.nan)
+    try:
+        return np.array(float(value))
+    except (TypeError, ValueError):
+        return np.array(np.nan)
+
+
+def _result(result: np.ndarray, *args):
+    """
+    Return the result in the type of the arguments: a Series with the index of the
+    first Series argument, an array for arrays and a float for scalars.
+    """
+    for arg in args:
+        if isinstance(arg, pd.Series):
+            return pd.Series(np.broadcast_to(result, arg.shape), index=arg.index)
+    if any(isinstance(arg, np.ndarray) for arg in args):
+        return result
+    return float(result)
+
+
+def _unary(function, value, domain=None):
+    """
+    Apply a NumPy function to the values. Values for which `domain` is False return NaN.
+    """
+    values = _numbers(value)
+    with np.errstate(all="ignore"):
+        result = function(values)
+    if domain is not None:
+        result = np.where(domain(values), result, np.nan)
+    return _result(result, value)
+
+
+def acos(value):
+    """
+    Returns the arccosine of the values in radians.
+    Values outside the range [-1, 1] return NaN.
+
+    Example:
+
+    `acos(${question_one})`
+    """
+    return _unary(np.arccos, value, lambda values: (values >= -1) & (values <= 1))
+
+
+def asin(value):
+    """
+    Returns the arcsine of the values in radians.
+    Values outside the range [-1, 1] return NaN.
+
+    Example:
+
+    `asin(${question_one})`
+    """
+    return _unary(np.arcsin, value, lambda values: (values >= -1) & (values <= 1))
+
+
+def atan(value):
+    """
+    Returns the arctangent of the values in radians.
+
+    Example:
+
+    `atan(${question_one})`
+    """
+    return _unary(np.arctan, value)
+
+
+def cos(value):
+    """
+    Returns the cosine of the values in radians.
+
+    Example:
+
+    `cos(${question_one})`
+    """
+    return _unary(np.cos, value)
+
+
+def sin(value):
+    """
+    Returns the sine of the values in radians.
+
+    Example:
+
+    `sin(${question_one})`
+    """
+    return _unary(np.sin, value)
+
+
+def tan(value):
+    """
+    Returns the tangent of the values in radians.
+
+    Example:
+
+    `tan(${question_one})`
+    """
+    return _unary(np.tan, value)
+
+
+def exp(value):
+    """
+    Returns e raised to the power of the values.
+
+    Example:
+
+    `exp(${question_one})`
+    """
+    return _unary(np.exp, value)
+
+
+def exp10(value):
+    """
+    Returns 10 raised to the power of the values.
+
+    Example:
+
+    `exp10(${question_one})`
+    """
+    return _unary(lambda values: np.power(10.0, values), value)
+
+
+def log(value):
+    """
+    Returns the natural logarithm of the values.
+    Values that are not positive return NaN.
+
+    Example:
+
+    `log(${question_one})`
+    """
+    return _unary(np.log, value, lambda values: values > 0)
+
+
+def log10(value):
+    """
+    Returns the base-10 logarithm of the values.
+    Values that are not positive return NaN.
+
+    Example:
+
+    `log10(${question_one})`
+    """
+    return _unary(np.log10, value, lambda values: values > 0)
+
+
+def sqrt(value):
+    """
+    Returns the square root of the values.
+    Negative values return NaN.
+
+    Example:
+
+    `sqrt(${question_one})`
+    """
+    return _unary(np.sqrt, value, lambda values: values >= 0)
+
+
+def atan2(y, x):
+    """
+    Returns the arctangent of y/x in radians using the signs of both arguments
+    to determine the quadrant of the result.
+
+    Example:
+
+    `atan2(${question_one}, ${question_two})`
+    """
+    return _result(np.arctan2(_numbers(y), _numbers(x)), y, x)
+
+
+def pow(base, exponent):
+    """
+    Returns base raised to the power of exponent.
+    Results that are not real numbers, such as a negative base with a fractional exponent, return NaN.
+
+    Example:
+
+    `pow(${question_one}, ${question_two})`
+    """
+    with np.errstate(all="ignore"):
+        return _result(np.power(_numbers(base), _numbers(exponent)), base, exponent)
+
+
+def round(value, ndigits=0):
+    """
+    Returns the values rounded to the given number of digits after the decimal point,
+    with the same results as the scalar formula. Halves are rounded to the nearest even number.
+    `ndigits` can be a single number or one number per value.
+    Rounding to whole numbers is vectorized, other digits are rounded value by value.
+
+    Example:
+
+    `round(${question_one}, 2)`
+    """
+    values = _numbers(value)
+    digits = _numbers(ndigits)
+    if digits.ndim == 0:
+        result = _round(values, int(digits))
+    else:
+        values, digits = np.broadcast_arrays(values, digits)
+        result = np.full(values.shape, np.nan)
+        for places in np.unique(digits[~np.isnan(digits)]):
+            mask = digits == places
+            result[mask] = _round(values[mask], int(places))
+    return _result(result, value, ndigits)
+
+
+def _round(values: np.ndarray, places: int) -> np.ndarray:
+    # np.round scales by a power of ten first, so e.g. 2.675 rounds to 2.68 instead of
+    # 2.67 with 2 digits. Python rounds the exact binary value like the scalar formula.
+    if places == 0:
+        return np.round(values)
+    rounded = [builtins.round(number, places) for number in values.ravel().tolist()]
+    return np.array(rounded, dtype=float).reshape(np.shape(values))
+
+
+def _reduce(function, args):
+    with np.errstate(all="ignore"):
+        return functools.reduce(function, np.broadcast_arrays(*(_numbers(arg) for arg in args)))
+
+
+def sum(*args):
+    """
+    Returns the sum of the arguments for each row.
+    Empty and non-numeric values are ignored.
+
+    Example:
+
+    `sum(${field1}, ${field2}, ${field3})`
+    """
+    if not args:
+        return 0.0
+    result = _reduce(lambda total, value: total + np.nan_to_num(value, nan=0.0), [0.0, *args])
+    return _result(result, *args)
+
+
+def max(*args):
+    """
+    Returns the maximum of the arguments for each row.
+    Empty and non-numeric values are ignored. Rows without a number return NaN.
+
+    Example:
+
+    `max(${field1}, ${field2}, ${field3})`
+    """
+    if not args:
+        return np.nan
+    return _result(_reduce(np.fmax, args), *args)
+
+
+def min(*args):
+    """
+    Returns the minimum of the arguments for each row.
+    Empty and non-numeric values are ignored. Rows without a number return NaN.
+
+    Example:
+
+    `min(${field1}, ${field2}, ${field3})`
+    """
+    if not args:
+        return np.nan
+    return _result(_reduce(np.fmin, args), *args)
+
+
+def _strings(value) -> pd.Series:
+    if isinstance(value, pd.Series):
+        return value.astype(object).where(value.notna(), None)
+    return pd.Series(np.asarray(value, dtype=object).ravel())
+
+
+def _parse(values: pd.Series, format: str) -> pd.Series:
+    """
+    Parse strings in a format into naive datetimes. Values that are not strings,
+    do not match the format or are not valid dates such as February 30 are NaT.
+    """
+    texts = values.where(values.map(type) == str)
+    # Milliseconds cover every year of the scalar formulas, unlike nanoseconds
+    return pd.to_datetime(texts, format=format, errors="coerce").astype("datetime64[ms]")
+
+
+# Time zones only change their offset from UTC on quarter hours
+_OFFSET_STEP = 15 * 60 * 1000
+_DAY = 24 * 60 * 60 * 1000
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _utc_offset(milliseconds: float, to_local: bool) -> float:
+    try:
+        if to_local:
+            local = datetime.fromtimestamp(milliseconds / 1000)
+            return (local - _EPOCH) / timedelta(milliseconds=1) - milliseconds
+        naive = _EPOCH + timedelta(milliseconds=milliseconds)
+        return milliseconds - naive.timestamp() * 1000
+    except (OverflowError, OSError, ValueError):
+        return np.nan
+
+
+def _step_offsets(milliseconds: np.ndarray, step: int, to_local: bool):
+    steps, codes = np.unique(np.floor(milliseconds / step), return_inverse=True)
+    starts = np.array([_utc_offset(value * step, to_local) for value in steps], dtype=float)
+    ends = np.array([_utc_offset((value + 1) * step, to_local) for value in steps], dtype=float)
+    return starts[codes.ravel()], ends[codes.ravel()]
+
+
+def _utc_offsets(milliseconds: np.ndarray, to_local: bool) -> np.ndarray:
+    """
+    Offsets of the local time zone from UTC in milliseconds, from timestamps to
+    local time or from naive local times to timestamps. The offsets are computed
+    by the `datetime` functions used by the scalar formulas, once per day, or once
+    per quarter hour on the days the offset changes.
+    """
+    result = np.full(len(milliseconds), np.nan)
+    valid = np.isfinite(milliseconds)
+    values = milliseconds[valid]
+    offsets, next_offsets = _step_offsets(values, _DAY, to_local)
+    changes = offsets != next_offsets
+    if changes.any():
+        offsets[changes] = _step_offsets(values[changes], _OFFSET_STEP, to_local)[0]
+    result[valid] = offsets
+    return result
+
+
+def _milliseconds(values: pd.Series) -> np.ndarray:
+    """
+    Convert naive datetimes to milliseconds since the epoch, with NaN for NaT.
+    """
+    datetimes = values.to_numpy(dtype="datetime64[ms]")
+    result = datetimes.astype(np.int64).astype(float)
+    result[np.isnat(datetimes)] = np.nan
+    return result
+
+
+def _local_datetimes(timestamps) -> pd.Series:
+    """
+    Convert timestamps in milliseconds to naive local datetimes.
+    """
+    milliseconds = np.trunc(_numbers(timestamps).ravel())
+    local = milliseconds + _utc_offsets(milliseconds, to_local=True)
+    return pd.Series(pd.to_datetime(local, unit="ms", errors="coerce"))
+
+
+def date(value):
+    """
+    Converts dates in 'YYYY-MM-DD' format to Survey123 date objects (unix timestamps in
+    milliseconds at midnight UTC). Empty and invalid dates return NaN.
+
+    Example:
+
+    `date(${question_one})`
+    """
+    strings = _strings(value)
+    parsed = _parse(strings, dates.DATE_FORMAT)
+    return _result(_milliseconds(parsed).reshape(np.shape(value)), value)
+
+
+def date_time(value):
+    """
+    Converts strings to Survey123 datetime objects (unix timestamps in milliseconds).
+    Values can be a date and time separated by `T` or a space, or a date only, in local time.
+    Empty and invalid values return NaN.
+
+    Example:
+
+    `date-time(${datetime_question})`
+    """
+    strings = _strings(value)
+    # Quotes are stripped like in the scalar formula
+    quoted = strings.str.startswith("'") & strings.str.endswith("'")
+    strings = strings.where(~quoted.fillna(False).astype(bool), strings.str[1:-1])
+    has_time = strings.str.contains("T", regex=False).fillna(False).astype(bool)
+    parsed = pd.Series(pd.NaT, index=strings.index, dtype="datetime64[ms]")
+    parsed[has_time] = _parse(strings[has_time], dates.DATE_TIME_FORMATS[0])
+    parsed[~has_time] = _parse(strings[~has_time], dates.DATE_TIME_FORMATS[1])
+    # Only the values that are not a date and time are parsed again as a date
+    dates_only = parsed.isna() & strings.notna()
+    parsed[dates_only] = _parse(strings[dates_only], dates.DATE_FORMAT)
+    milliseconds = _milliseconds(parsed)
+    milliseconds -= _utc_offsets(milliseconds, to_local=False)
+    return _result(milliseconds.reshape(np.shape(value)), value)
+
+
+def decimal_date_time(timestamp):
+    """
+    Converts timestamps in milliseconds to the number of days since 1899-12-30 in local time.
+    Empty and invalid timestamps return NaN.
+
+    Example:
+
+    `decimal-date-time(${timestamp_field})`
+    """
+    local = _local_datetimes(timestamp)
+    days = (local - pd.Timestamp(1899, 12, 30)) / pd.Timedelta(days=1)
+    return _result(days.to_numpy(dtype=float, na_value=np.nan).reshape(np.shape(timestamp)), timestamp)
+
+
+# strftime directives built from the fields of the datetimes, with the number of
+# values of the field and the width they are padded to with zeros like strftime
+_FORMAT_FIELDS = {
+    "Y": ("year", 10000, 1), "m": ("month", 13, 2), "d": ("day", 32, 2), "H": ("hour", 24, 2),
+    "M": ("minute", 60, 2), "S": ("second", 60, 2), "j": ("dayofyear", 367, 3),
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _padded_numbers(count: int, width: int) -> np.ndarray:
+    # Text of the numbers below `count`, looked up instead of converting every value
+    return np.char.zfill(np.arange(count).astype(str), width)
+
+
+def format_date(datetime_val, format: str):
+    """
+    Fits timestamps in milliseconds to a format in local time, e.g. `%Y-%m-%d`.
+    The format is compiled once, and common directives are built for all values at once.
+    Empty and invalid timestamps return None.
+
+    Example:
+
+    `format_date(${question_one}, '%Y-%m-%d')`
+    """
+    local = _local_datetimes(datetime_val)
+    missing = local.isna().to_numpy()
+    tokens = dates.get_format(format).tokens
+    if all(kind == "literal" or value in _FORMAT_FIELDS for kind, value in tokens):
+        result = np.full(len(local), "")
+        for kind, value in tokens:
+            if kind == "literal":
+                result = np.char.add(result, value)
+            else:
+                field, count, width = _FORMAT_FIELDS[value]
+                numbers = getattr(local.dt, field).fillna(0).to_numpy(dtype=np.int64)
+                result = np.char.add(result, _padded_numbers(count, width)[numbers])
+    else:
+        # Other directives are formatted once per distinct datetime
+        codes, uniques = pd.factorize(local)
+        formatted = np.array([value.strftime(format) for value in uniques.to_pydatetime()] + [None], dtype=object)
+        result = formatted.take(codes)
+    result = result.astype(object)
+    result[missing] = None
+    if isinstance(datetime_val, pd.Series):
+        return pd.Series(result, index=datetime_val.index, dtype=object)
+    if isinstance(datetime_val, np.ndarray):
+        return result.reshape(datetime_val.shape)
+    return result[0]
+
+
+# Names of the scalar formulas that have a vectorized version in this module
+FUNCTION_NAMES = (
+    "acos", "asin", "atan", "atan2", "cos", "sin", "tan", "exp", "exp10", "log", "log10",
+    "pow", "round", "sqrt", "sum", "max", "min",
+    "date", "date_time", "decimal_date_time", "format_date",
+)
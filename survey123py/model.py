@@ -0,0 +1,418 @@
+"""
+Form Model Module
+
+This module holds a compact model of a form. Questions, choices and settings are
+`Question`, `Choice` and `Settings` objects with `__slots__` for the columns every
+row has, such as `type`, `name` and `label`. The other XLSForm columns, such as
+`hint`, `relevant` or `constraint_message`, are kept in a columnar `Table` shared by
+the rows of a sheet, with a list of values per column instead of a dictionary per
+row. Column names are interned, so the rows share a single string per column.
+
+Rows are read like dictionaries, with `get`, `[]`, `in` and `items`. Empty (None)
+values are left out.
+`FormData`, `FormPreviewer` and `ExcelToYamlConverter` read and write the rows of
+a `Form` directly, without converting it to the dictionaries of a YAML document.
+
+```python
+from survey123py.model import Form
+
+form = Form.from_dict({
+    "settings": {"form_title": "Inspection"},
+    "survey": [{"type": "text", "name": "site", "label": "Site", "hint": "Site name"}],
+    "choices": [{"list_name": "yes_no", "name": "yes", "label": "Yes"}],
+})
+form.questions[0].get("hint")  # "Site name"
+form.to_dict()  # The document the form was built from
+```
+"""
+
+import sys
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple, Union
+
+from . import tree
+
+_MISSING = object()
+
+# Values of a row given as a mapping or as (column, value) pairs
+RowData = Union[Mapping[str, Any], Iterable[Tuple[str, Any]]]
+
+
+def intern_column(column) -> str:
+    """
+    Get the interned name of a column, which is shared by every row using it.
+    """
+    return sys.intern(str(column))
+
+
+class Table:
+    """
+    Columnar store of the columns of the rows of a sheet that are not attributes
+    of the rows.
+
+    Attributes
+    ----------
+    columns : Dict[str, List[Any]]
+        Values of each column by row position, in the order the columns were first
+        set. Rows without a value hold None. A column list ends at the last row
+        with a value, so columns only used by the first rows stay short.
+    """
+    __slots__ = ("columns",)
+
+    def __init__(self):
+        self.columns: Dict[str, List[Any]] = {}
+
+    def get(self, row: int, column: str, default=None):
+        """
+        Get the value of a column of a row, or `default` if it has no value.
+        """
+        values = self.columns.get(column)
+        if values is None or row >= len(values):
+            return default
+        value = values[row]
+        return default if value is None else value
+
+    def set(self, row: int, column: str, value):
+        """
+        Set the value of a column of a row. None removes the value.
+        """
+        values = self.columns.get(column)
+        if values is None:
+            if value is None:
+                return
+            values = self.columns[intern_column(column)] = []
+        if row >= len(values):
+            if value is None:
+                return
+            values.extend([None] * (row + 1 - len(values)))
+        values[row] = value
+
+    def delete(self, row: int, column: str):
+        """
+        Remove the value of a column of a row, if any.
+        """
+        self.set(row, column, None)
+
+    def row(self, row: int) -> Iterator[Tuple[str, Any]]:
+        """
+        Iterate over the `(column, value)` pairs of a row.
+        """
+        for column, values in self.columns.items():
+            if row < len(values) and values[row] is not None:
+                yield column, values[row]
+
+    def copy(self) -> "Table":
+        """
+        Get a copy of the table. The values themselves are not copied.
+        """
+        table = Table()
+        table.columns = {column: values.copy() for column, values in self.columns.items()}
+        return table
+
+
+class _Row:
+    """
+    Row of a sheet with the columns in `_FIELDS` as attributes and the other
+    columns in the table of the sheet.
+    """
+    __slots__ = ("_table", "_row")
+    _FIELDS: Tuple[str, ...] = ()
+
+    def __init__(self, table: Table, row: int, data: Optional[RowData] = None):
+        self._table = table
+        self._row = row
+        for field in self._FIELDS:
+            setattr(self, field, None)
+        if data is not None:
+            for column, value in _pairs(data):
+                self[column] = value
+
+    def get(self, column: str, default=None):
+        """
+        Get the value of a column, or `default` if the row has no value.
+        """
+        if column in self._FIELDS:
+            value = getattr(self, column)
+            return default if value is None else value
+        return self._table.get(self._row, column, default)
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        """
+        Iterate over the `(column, value)` pairs of the row.
+        """
+        for field in self._FIELDS:
+            value = getattr(self, field)
+            if value is not None:
+                yield field, value
+        yield from self._table.row(self._row)
+
+    def keys(self) -> Iterator[str]:
+        return (column for column, _ in self.items())
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Get the columns of the row as a dictionary.
+        """
+        return dict(self.items())
+
+    def __getitem__(self, column: str):
+        value = self.get(column, _MISSING)
+        if value is _MISSING:
+            raise KeyError(column)
+        return value
+
+    def __setitem__(self, column: str, value):
+        if column in self._FIELDS:
+            setattr(self, column, value)
+        else:
+            self._table.set(self._row, column, value)
+
+    def _copy(self, table: Table) -> "_Row":
+        # Row with the same values in a copy of its table
+        row = object.__new__(type(self))
+        row._table = table
+        row._row = self._row
+        for field in self._FIELDS:
+            setattr(row, field, getattr(self, field))
+        return row
+
+    def __contains__(self, column: str) -> bool:
+        return self.get(column, _MISSING) is not _MISSING
+
+    def __iter__(self) -> Iterator[str]:
+        return self.keys()
+
+    def __eq__(self, other):
+        if isinstance(other, (_Row, dict)):
+            return self.to_dict() == dict(other.items())
+        return NotImplemented
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+class Question(_Row):
+    """
+    Question of the survey. Groups and repeats hold their questions in `children`.
+    """
+    __slots__ = ("type", "name", "label", "children")
+    _FIELDS = ("type", "name", "label")
+
+    def __init__(self, table: Table, row: int, data: Optional[RowData] = None):
+        self.children: Optional[List["Question"]] = None
+        super().__init__(table, row)
+        if data is not None:
+            # Children are added by the caller as questions of the form
+            for column, value in _pairs(data):
+                if column != tree.CHILDREN:
+                    self[column] = value
+
+    def get(self, column: str, default=None):
+        if column == tree.CHILDREN:
+            return default if self.children is None else self.children
+        return super().get(column, default)
+
+    def __setitem__(self, column: str, value):
+        if column == tree.CHILDREN:
+            self.children = value
+        else:
+            super().__setitem__(column, value)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Get the columns of the question as a dictionary, with the questions of
+        groups and repeats in `children`.
+        """
+        return _nested_dicts([self])[0]
+
+    def _copy(self, table: Table) -> "Question":
+        question = super()._copy(table)
+        question.children = None
+        return question
+
+
+class Choice(_Row):
+    """
+    Choice of a choice list.
+    """
+    __slots__ = ("list_name", "name", "label")
+    _FIELDS = ("list_name", "name", "label")
+
+
+class Settings(_Row):
+    """
+    Settings of the form.
+    """
+    __slots__ = ("form_title", "form_id", "instance_name", "version")
+    _FIELDS = ("form_title", "form_id", "instance_name", "version")
+
+    def __init__(self, data: Optional[RowData] = None):
+        super().__init__(Table(), 0, data)
+
+
+def _pairs(data: RowData) -> Iterable[Tuple[str, Any]]:
+    return data.items() if hasattr(data, "items") else data
+
+
+def _container(question: Question, container_type: str) -> Question:
+    # The begin row of a group or repeat becomes the question holding its children,
+    # with an empty name and label if it has none, as in tree.unflatten
+    question.type = container_type
+    if question.name is None:
+        question.name = ""
+    if question.label is None:
+        question.label = ""
+    question.children = []
+    return question
+
+
+def _nested_dicts(questions: List[Question]) -> List[Dict[str, Any]]:
+    # Dictionaries of questions and their children, built with a stack so any depth works
+    items = []
+    stack = [(iter(questions), items)]
+    while stack:
+        question = next(stack[-1][0], _MISSING)
+        if question is _MISSING:
+            stack.pop()
+            continue
+        item = dict(question.items())
+        stack[-1][1].append(item)
+        if question.children is not None:
+            item[tree.CHILDREN] = []
+            stack.append((iter(question.children), item[tree.CHILDREN]))
+    return items
+
+
+class Form:
+    """
+    Model of a form.
+
+    Attributes
+    ----------
+    questions : List[Question]
+        Questions of the survey. Groups and repeats hold their questions in `children`.
+    choices : List[Choice]
+        Choices of the form, in order.
+    settings : Settings or None
+        Settings of the form.
+    question_table : Table
+        Other columns of the questions, by the order the questions were created.
+    choice_table : Table
+        Other columns of the choices, by position in `choices`.
+    """
+    __slots__ = ("questions", "choices", "settings", "question_table", "choice_table", "_size")
+
+    def __init__(self):
+        self.questions: List[Question] = []
+        self.choices: List[Choice] = []
+        self.settings: Optional[Settings] = None
+        self.question_table = Table()
+        self.choice_table = Table()
+        # Number of questions including the children of groups and repeats
+        self._size = 0
+
+    def new_question(self, data: Optional[RowData] = None) -> Question:
+        """
+        Create a question of the form. The question still has to be added to
+        `questions` or to the `children` of a group or repeat.
+        """
+        question = Question(self.question_table, self._size, data)
+        self._size += 1
+        return question
+
+    def add_choice(self, data: Optional[RowData] = None) -> Choice:
+        """
+        Add a choice to the form.
+        """
+        choice = Choice(self.choice_table, len(self.choices), data)
+        self.choices.append(choice)
+        return choice
+
+    def add_survey_rows(self, rows: Iterable[RowData]):
+        """
+        Add the questions of the rows of a survey sheet, given as mappings or as
+        `(column, value)` pairs. The rows between a `begin` and an `end` row become
+        the `children` of a group or repeat, as in `tree.unflatten`.
+        """
+        questions = (self.new_question(row) for row in rows)
+        self.questions.extend(tree.unflatten(questions, container=_container))
+
+    def document(self) -> Dict[str, Any]:
+        """
+        Get the sections of the form like a YAML document, holding the rows of the
+        form instead of dictionaries. Changing a row changes the form.
+        """
+        data = {"survey": self.questions}
+        if self.choices:
+            data["choices"] = self.choices
+        if self.settings is not None:
+            data["settings"] = self.settings
+        return data
+
+    def copy(self) -> "Form":
+        """
+        Get a copy of the form whose rows can be changed without changing this form.
+        """
+        form = Form()
+        form.question_table = self.question_table.copy()
+        form.choice_table = self.choice_table.copy()
+        form._size = self._size
+        form.choices = [choice._copy(form.choice_table) for choice in self.choices]
+        if self.settings is not None:
+            form.settings = Settings(self.settings.items())
+        stack = [(iter(self.questions), form.questions)]
+        while stack:
+            question = next(stack[-1][0], _MISSING)
+            if question is _MISSING:
+                stack.pop()
+                continue
+            copied = question._copy(form.question_table)
+            stack[-1][1].append(copied)
+            if question.children is not None:
+                copied.children = []
+                stack.append((iter(question.children), copied.children))
+        return form
+
+    def walk(self) -> Iterator[Question]:
+        """
+        Iterate over the questions, including the children of groups and repeats,
+        in the order of the survey sheet.
+        """
+        return tree.walk(self.questions)
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> "Form":
+        """
+        Build a form from a YAML document with `survey`, `choices` and `settings` sections.
+        Settings written as a list use their first item, as in the settings sheet.
+        """
+        form = cls()
+        stack = [(iter(data.get("survey") or []), form.questions)]
+        while stack:
+            item = next(stack[-1][0], _MISSING)
+            if item is _MISSING:
+                stack.pop()
+                continue
+            question = form.new_question(item)
+            stack[-1][1].append(question)
+            if item.get(tree.CHILDREN) is not None:
+                question.children = []
+                stack.append((iter(item[tree.CHILDREN]), question.children))
+        for choice in data.get("choices") or []:
+            form.add_choice(choice)
+        settings = data.get("settings")
+        if isinstance(settings, list):
+            settings = settings[0] if settings else None
+        if settings is not None:
+            form.settings = Settings(settings)
+        return form
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Get the YAML document of the form.
+        """
+        data = {"survey": _nested_dicts(self.questions)}
+        if self.choices:
+            data["choices"] = [choice.to_dict() for choice in self.choices]
+        if self.settings is not None:
+            data["settings"] = self.settings.to_dict()
+        return data
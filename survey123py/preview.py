@@ -1,6 +1,52 @@
+import copy
 import re
+import time
+from pathlib import Path
+from typing import List, NamedTuple
+import numpy as np
+import pandas as pd
 import yaml
-from .formulas import *
+from . import choice_sources, tree, yaml_loader
+from .choice_filters import ChoiceFilter, compile_choice_filter
+from .choices import ChoiceIndex
+from .dependencies import DependencyGraph
+from .expressions import Expression, compile_expression
+from .formulas import selections
+from .model import Form, Settings
+from .vectorized import evaluate_vectorized, value_kind
+
+# Columns holding XLSForm expressions that are evaluated in the preview
+EXPRESSION_COLUMNS = ("calculation", "relevant", "required", "readonly", "repeat_count")
+# Columns that are never parsed
+_SKIPPED_COLUMNS = ("type", "name", "survey123py::preview_input", "children", "constraint")
+# Types of questions whose text preview inputs are never evaluated, e.g. 1990-05-15 for a date
+_TEXT_INPUT_TYPES = ("text", "date", "time", "dateTime", "barcode")
+# Values of yes/no columns that are not expressions
+_LITERAL_VALUES = ("yes", "no", "true", "false", "true()", "false()", "")
+
+
+def _is_literal(tree: tuple) -> bool:
+    """
+    True if a parsed expression is a number, boolean or quoted string literal.
+    """
+    if tree[0] == "neg":
+        tree = tree[1]
+    return tree[0] in ("num", "str", "bool") or (tree[0] == "call" and tree[1] in ("true", "false") and not tree[2])
+
+
+class _Node(NamedTuple):
+    """
+    Column of a question in the dependency graph. The value of a question is
+    produced by its "calculation" node, or its "input" node if it has no calculation.
+    """
+    name: str
+    column: str
+
+    def __str__(self):
+        if self.column in ("calculation", "input"):
+            return f"${{{self.name}}}"
+        return f"{self.column} of ${{{self.name}}}"
+
 
 class FormPreviewer:
 
@@ -18,289 +64,609 @@ class FormPreviewer:
               survey123py::preview_input: Apple
         ```
 
+        Expressions are compiled once by `survey123py.expressions` and evaluated
+        against the preview inputs and calculation results.
+
         Parameters
         ----------
         yaml : str
             Path to the YAML file containing survey data.
         """
-        # This pattern matches ${var_name} in the string
-        self.var_pattern = r"\$\{(\w+)\}"
         # Load YAML file
         with open(yaml_path, 'r') as file:
-            self.yaml_data = yaml.safe_load(file)
-            # Create copy for output
-            self.output_data = self.yaml_data.copy()
-        self.ctx = self._load_ctx()
+            yaml_data = yaml_loader.load(file)
+        self._load(yaml_data, Path(yaml_path).parent)
 
-    def _load_ctx(self) -> dict:
+    @classmethod
+    def from_model(cls, form: Form, base_dir: str = None) -> "FormPreviewer":
         """
-        Load variables into data context as specified by survey123py::preview_input fields in the YAML file
+        Preview a form model instead of a YAML file.
+
+        The previewer reads the rows of the form directly, so `yaml_data` holds the
+        questions and choices of the form and `set_input` changes the preview inputs
+        of the form. The output is written to a copy of the form, see `to_model`.
 
         Parameters
         ----------
-        yaml : str
-            Path to the YAML file containing survey data.
+        form : survey123py.model.Form
+            The form to preview, with `survey123py::preview_input` columns.
+        base_dir : str, optional
+            Directory of the relative paths of choice sources.
+        """
+        previewer = cls.__new__(cls)
+        previewer._load(form.document(), base_dir, form)
+        return previewer
+
+    def to_model(self) -> Form:
+        """
+        Get a form model of the output data, see `show_preview`. For a previewer
+        built with `from_model`, this is the copy of the form the output is written to.
+        """
+        if self._output_form is not None:
+            return self._output_form
+        return Form.from_dict(self.output_data)
+
+    def _load(self, yaml_data: dict, base_dir=None, form: Form = None):
+        # This pattern matches ${var_name} in the string
+        self.var_pattern = r"\$\{(\w+)\}"
+        self.yaml_data = yaml_data
+        self._form = form
+        self._output_form = None
+        # Create copy for output
+        self.output_data = self._output_copy()
+        settings = self.output_data.get("settings", {})
+        # Formulas such as version() read the settings as a dictionary
+        self.settings = settings.to_dict() if isinstance(settings, Settings) else settings
+        # Labels of the choices, used by jr:choice-name() and choice filters.
+        # Choices of source entries are read from their file.
+        choices = choice_sources.records(self.yaml_data.get("choices") or [], base_dir)
+        self.choices = ChoiceIndex(choices, self._questions())
+        # Compiled choice filters by question name, see filter_choices
+        self._choice_filters = {}
+        # Raw results of the calculations by question name
+        self.results = {}
+        # Outputs of the other columns by graph node, see get_outputs
+        self._outputs = {}
+        self.graph = self._build_graph()
+        self.ctx = self._load_ctx()
+
+    def _output_copy(self) -> dict:
+        """
+        Copy the loaded form to write the output to. The rows of a form model are
+        copied into a new model instead of dictionaries.
+        """
+        if self._form is None:
+            return copy.deepcopy(self.yaml_data)
+        self._output_form = self._form.copy()
+        return self._output_form.document()
+
+    def _questions(self, items: list = None):
+        """
+        Iterate over the questions of the survey including the children of groups and repeats.
+        """
+        if items is None:
+            items = self.yaml_data["survey"]
+        return tree.walk(items)
+
+    @staticmethod
+    def _input_value(item: dict):
+        """
+        Convert the preview input of a question to the value used in expressions.
+        """
+        value = item.get("survey123py::preview_input")
+        if value is None:
+            return None
+        question_type = item.get("type")
+        if question_type == "integer":
+            return int(value)
+        if question_type == "decimal":
+            return float(value)
+        if question_type == "text":
+            return value if isinstance(value, bool) else str(value)
+        if str(question_type).split(" ")[0] == "select_multiple":
+            # Answers are split into their selected values once instead of by every formula
+            value = FormPreviewer._input_value({"survey123py::preview_input": value})
+            return selections.parse(value) if isinstance(value, str) else value
+        if isinstance(value, str) and question_type not in _TEXT_INPUT_TYPES:
+            # Inputs of other questions may be written as a literal, e.g. 'option1,option3' or 5.
+            # Other text such as 123-45 is used as it is instead of being evaluated.
+            try:
+                expression = compile_expression(value)
+            except ValueError:
+                return value
+            if not _is_literal(expression.tree):
+                return value
+            return expression.evaluate()
+        return value
+
+    @staticmethod
+    def _stored_value(item: dict, value):
+        """
+        Convert the result of a calculation to the value stored by the question.
+        """
+        if item.get("type") == "text" and not isinstance(value, bool):
+            return "" if value is None else str(value)
+        return value
+
+    def _references(self, column: str, value: str):
+        """
+        Get the names referenced by a column and whether it refers to the current question using `.`
+        """
+        if column in EXPRESSION_COLUMNS or column == "constraint":
+            try:
+                expression = compile_expression(value)
+                return expression.variables, expression.uses_current
+            except ValueError:
+                # Invalid expressions are reported when they are evaluated
+                pass
+        return re.findall(self.var_pattern, value), False
+
+    def _build_graph(self) -> DependencyGraph:
+        """
+        Build the dependency graph of the form from the ${name} references in every column.
+        Each node is a `(name, column)` pair.
+        """
+        self._items = {}
+        for item in self._questions(self.yaml_data["survey"]):
+            if item.get("name") is not None:
+                self._items.setdefault(item["name"], item)
+
+        value_nodes = {}
+        for name, item in self._items.items():
+            column = "calculation" if item.get("calculation") else "input"
+            value_nodes[name] = _Node(name, column)
+
+        graph = DependencyGraph()
+        for name, item in self._items.items():
+            if value_nodes[name].column == "input":
+                graph.add(value_nodes[name])
+            for column, value in item.items():
+                if column == "calculation" and value:
+                    value = str(value)
+                if column in ("type", "name", "survey123py::preview_input", "children") or not isinstance(value, str):
+                    continue
+                references, uses_current = self._references(column, value)
+                dependencies = [value_nodes[reference] for reference in references if reference in value_nodes]
+                if uses_current and column != "calculation":
+                    dependencies.append(value_nodes[name])
+                graph.add(_Node(name, column), dependencies)
+        return graph
+
+    def _load_ctx(self) -> dict:
+        """
+        Load variables into data context as specified by survey123py::preview_input fields in the YAML file
+        and evaluate the calculations in dependency order, so a calculation can use calculations that
+        appear later in the form.
         """
         ctx = {}
-        for item in self.output_data["survey"]:
-            value = item.get("survey123py::preview_input")
-            
-            if value is not None or item.get("calculation"):
-
-                ctx[item["name"]] = {"value": "", "type": item.get("type")}
-                if item.get("type") == "integer":
-                    value = int(value)
-                elif item.get("type") == "decimal":
-                    value = float(value)
-                ctx[item["name"]]["value"] = value
-                if item["type"] == "text" and not isinstance(value, bool):
-                    # Need to escape quotes in the string so it can be used by eval() properly
-                    ctx[item["name"]]["value"] = f"\"{ctx[item['name']]['value']}\""
-            
-            elif item["type"] == "group" or item["type"] == "repeat":
-
-                for item2 in item["children"]:
-                    value2 = item2.get("survey123py::preview_input")
-                    if value2 is not None or item2.get("calculation"):
-                        ctx[item2["name"]] = {"value": "", "type": item2.get("type")}
-                        if item2.get("type") == "integer":
-                            value2 = int(value2)
-                        elif item2.get("type") == "decimal":
-                            value2 = float(value2)
-                        ctx[item2["name"]]["value"] = value2
-                        if item2["type"] == "text" and not isinstance(value2, bool):
-                            # Need to escape quotes in the string so it can be used by eval() properly
-                            ctx[item2["name"]]["value"] = f"\"{ctx[item2['name']]['value']}\""
+        for item in self._questions(self.yaml_data["survey"]):
+            if item.get("survey123py::preview_input") is not None or item.get("calculation"):
+                ctx[item["name"]] = {"value": self._input_value(item), "type": item.get("type")}
         if len(ctx) == 0:
             raise ValueError("No preview input found in the YAML file. Please add survey123py::preview_input fields to the YAML file.")
-        
-        # Load calculation columns
-        self.output_data["survey"]
-        for item in [x for x in self.output_data["survey"] if "calculation" in x]:
-            value = item["calculation"]
-            matches = re.findall(self.var_pattern, value)
-            if matches:
-                for match in matches:
-                    value = value.replace("${" + match + "}", str(ctx[match]["value"]))
-            # Handle modulo operator
-            if " mod " in value:
-                value = value.replace(" mod ", " % ")
-            ctx[item["name"]] = {"value": value, "type": item.get("type")}
-        
-        # Load constraint columns (handle dot operator here)
-        for item in [x for x in self.output_data["survey"] if "constraint" in x]:
-            value = item["constraint"]
-            
-            # Handle dot operator - replace "." with current field's value
-            if "." in value and "survey123py::preview_input" in item:
-                current_field_value = item["survey123py::preview_input"]
-                # Format the value appropriately for the constraint
-                if item.get("type") == "text" and not isinstance(current_field_value, bool):
-                    formatted_value = f'"{current_field_value}"'
-                else:
-                    formatted_value = str(current_field_value)
-                
-                # Replace standalone dots (not part of decimal numbers or method calls)
-                # Use regex to match dots that are not between digits or after alphanumeric characters
-                import re as regex_module
-                value = regex_module.sub(r'(?<!\w)\.(?!\d)', formatted_value, value)
-            
-            # Handle variable substitutions in constraints
-            matches = re.findall(self.var_pattern, value)
-            if matches:
-                for match in matches:
-                    value = value.replace("${" + match + "}", str(ctx[match]["value"]))
-            
-            # Apply function name conversions for constraints
-            if "if(" in value:
-                value = value.replace("if(", "if_(")
-            if "starts-with(" in value:
-                value = value.replace("starts-with(", "starts_with(")
-            if "int(" in value:
-                value = value.replace("int(", "int_(")
-            if "format-date(" in value:
-                value = value.replace("format-date(", "format_date(")
-            if "boolean-from-string(" in value:
-                value = value.replace("boolean-from-string(", "boolean_from_string(")
-            if "jr:choice-name(" in value:
-                value = value.replace("jr:choice-name(", "jr_choice_name(")
-            if "count-selected(" in value:
-                value = value.replace("count-selected(", "count_selected(")
-            if "decimal-date-time(" in value:
-                value = value.replace("decimal-date-time(", "decimal_date_time(")
-            if "date-time(" in value:
-                value = value.replace("date-time(", "date_time(")
-            if "not(" in value:
-                value = value.replace("not(", "not_(")
-            # Handle version() function
-            if "version()" in value:
-                survey_settings = self.output_data.get("settings", {})
-                value = value.replace("version()", f"version({survey_settings})")
-            # Handle modulo operator
-            if " mod " in value:
-                value = value.replace(" mod ", " % ")
-            # Handle equality operator (Survey123 uses = but Python uses ==)
-            if " = " in value and " == " not in value:
-                value = value.replace(" = ", " == ")
-            
-            # Store constraint result in context for evaluation
-            constraint_key = f"{item['name']}_constraint"
-            ctx[constraint_key] = {"value": value, "type": "constraint"}
-            
-        # Check if calculation values need function name replacements
-        for item in [x for x in self.output_data["survey"] if "calculation" in x]:
-            if item["name"] in ctx:
-                # Check if value to be evaluated contains things that need to be replaced
-                # Convert to string first to handle function replacements
-                value_str = str(ctx[item["name"]]["value"])
-                if "if(" in value_str:
-                    value_str = value_str.replace("if(", "if_(")
-                if "starts-with(" in value_str:
-                    value_str = value_str.replace("starts-with(", "starts_with(")
-                if "int(" in value_str:
-                    value_str = value_str.replace("int(", "int_(")
-                if "format-date(" in value_str:
-                    value_str = value_str.replace("format-date(", "format_date(")
-                if "boolean-from-string(" in value_str:
-                    value_str = value_str.replace("boolean-from-string(", "boolean_from_string(")
-                if "jr:choice-name(" in value_str:
-                    value_str = value_str.replace("jr:choice-name(", "jr_choice_name(")
-                if "count-selected(" in value_str:
-                    value_str = value_str.replace("count-selected(", "count_selected(")
-                if "decimal-date-time(" in value_str:
-                    value_str = value_str.replace("decimal-date-time(", "decimal_date_time(")
-                if "date-time(" in value_str:
-                    value_str = value_str.replace("date-time(", "date_time(")
-                if "not(" in value_str:
-                    value_str = value_str.replace("not(", "not_(")
-                # Handle version() function by replacing it with version(survey_settings)
-                if "version()" in value_str:
-                    survey_settings = self.output_data.get("settings", {})
-                    value_str = value_str.replace("version()", f"version({survey_settings})")
-                # Handle modulo operator
-                if " mod " in value_str:
-                    value_str = value_str.replace(" mod ", " % ")
-                ctx[item["name"]]["value"] = eval(value_str)
-                if ctx[item["name"]]["type"] == "text" and not isinstance(ctx[item["name"]]["value"], bool):
-                    # Need to escape quotes in the string so it can be used by eval() properly
-                    ctx[item["name"]]["value"] = f"\"{ctx[item['name']]['value']}\""
 
+        self.ctx = ctx
+        values = self._values()
+        for node in self.graph.order():
+            if node.column == "calculation":
+                self._evaluate_calculation(node.name, values)
         return ctx
-    
+
+    def _evaluate_calculation(self, name: str, values: dict):
+        """
+        Evaluate the calculation of a question and store the result in the data context and `values`.
+        """
+        item = self._items[name]
+        expression = compile_expression(str(item["calculation"]))
+        result = expression.evaluate(values, current=values.get(name), settings=self.settings, choices=self.choices)
+        self.results[name] = result
+        values[name] = self._stored_value(item, result)
+        self.ctx[name]["value"] = values[name]
+
+    def _values(self) -> dict:
+        return {name: entry["value"] for name, entry in self.ctx.items()}
+
+    def _substitute(self, text: str, values: dict) -> str:
+        """
+        Replace ${var} references in a text column with the values in the data context.
+        """
+        def replace(match):
+            if match.group(1) not in values:
+                raise ValueError(f"Element {match.group(0)} not found in data context. Please check the YAML file.")
+            return str(values[match.group(1)])
+        return re.sub(self.var_pattern, replace, text)
+
+    def _evaluate_column(self, item: dict, column: str, values: dict):
+        """
+        Get the preview output of a column of a question other than its calculation.
+
+        Expression columns are evaluated, constraint errors are returned as an
+        "Error: ..." message and ${var} references in text columns are replaced.
+        """
+        value = item[column]
+        if column == "constraint":
+            try:
+                expression = compile_expression(str(value))
+                current = values.get(item.get("name"), self._input_value(item))
+                return expression.evaluate(values, current=current, settings=self.settings, choices=self.choices)
+            except Exception as e:
+                return f"Error: {str(e)}"
+        if column in EXPRESSION_COLUMNS:
+            if value is None or isinstance(value, bool) or str(value).strip().lower() in _LITERAL_VALUES:
+                return value
+            expression = compile_expression(str(value))
+            return expression.evaluate(
+                values, current=values.get(item.get("name")), settings=self.settings, choices=self.choices
+            )
+        if isinstance(value, str):
+            return self._substitute(value, values)
+        return value
+
     def _parse_vars(self, survey_data: dict):
         """
-        This converts all variable references in the YAML data to their corresponding values in the data context
-        (as  given by the `survey123py::preview_input field`).
-        """
-        
-        for i, item in enumerate(survey_data["survey"]):
-
-            # Separate loop to handle nested children items (groups, repeaters)
-            if item["type"] == "group" or item["type"] == "repeat":
-                for item2 in item["children"]:
-                    for key, value in item2.items():
-                        if key not in ["type", "name", "survey123py::preview_input"]:
-                            if isinstance(value, bool):
-                                continue
-                            matches = re.findall(self.var_pattern, value)
-                            if matches:
-                                for match in matches:
-                                    if match in self.ctx:
-                                        var_value = self.ctx[match]["value"]
-                                        if key == "label" and isinstance(var_value, str):
-                                            var_value = var_value[1:-1]  # Remove the quotes for necessary calculations. label does not support calculations
-                                            
-                                        out_value = item2[key].replace("${" + match + "}", str(var_value))
-                                        
-                                        # Replace ${} variable with variable in data ctx
-                                        survey_data["survey"][i]["children"][0][key] = out_value
-                                    else:
-                                        var_name = "${" +  match + "}"
-                                        raise ValueError(f"Element {var_name} not found in data context. Please check the YAML file.")
-            
+        This converts all variable references in text columns such as labels and hints to their
+        corresponding values in the data context (as given by the `survey123py::preview_input` field).
+        """
+        values = self._values()
+        for item in self._questions(survey_data["survey"]):
             for key, value in item.items():
-                if key not in ["type", "name", "survey123py::preview_input", "children"]:
-                    matches = re.findall(self.var_pattern, value)
-                    if matches:
-                        for match in matches:
-                            if match in self.ctx:
-                                var_value = self.ctx[match]["value"]
-                                if key == "label" and isinstance(var_value, str):
-                                    var_value = var_value[1:-1]  # Remove the quotes for necessary calculations. label does not support calculations
-
-                                out_value = item[key].replace("${" + match + "}", str(var_value))
-
-                                # Replace ${} variable with variable in data ctx
-                                survey_data["survey"][i][key] = out_value
-                            else:
-                                var_name = "${" +  match + "}"
-                                raise ValueError(f"Element {var_name} not found in data context. Please check the YAML file.")
+                if key in _SKIPPED_COLUMNS or key in EXPRESSION_COLUMNS or not isinstance(value, str):
+                    continue
+                item[key] = self._evaluate_column(item, key, values)
         return survey_data
-    
+
     def _parse_formulas(self, survey_data: dict):
         """
-        Parses formulas in the YAML config. This must be used only after the variables have been parsed using
-        `_parse_vars`
+        Evaluates the expression columns (calculation, relevant, required, readonly and repeat_count)
+        and replaces them with their results.
         """
-        for i, item in enumerate(survey_data["survey"]):
-            for key, value in item.items():
-                if key not in ["type", "name", "label", "survey123py::preview_input", "children", "constraint"]:
-
-                    # Note: This is called again (other one is in _load_ctx)
-                    # This covers the survey data which is already parsed, for calculations it needs
-                    # to be evaluated again for it to execute
-                    if "if(" in value:
-                        value = value.replace("if(", "if_(")
-                    if "starts-with(" in value:
-                        value = value.replace("starts-with(", "starts_with(")
-                    if "int(" in value:
-                        value = value.replace("int(", "int_(")
-                    if "format-date(" in value:
-                        value = value.replace("format-date(", "format_date(")
-                    if "boolean-from-string(" in value:
-                        value = value.replace("boolean-from-string(", "boolean_from_string(")
-                    if "jr:choice-name(" in value:
-                        value = value.replace("jr:choice-name(", "jr_choice_name(")
-                    if "count-selected(" in value:
-                        value = value.replace("count-selected(", "count_selected(")
-                    if "decimal-date-time(" in value:
-                        value = value.replace("decimal-date-time(", "decimal_date_time(")
-                    if "date-time(" in value:
-                        value = value.replace("date-time(", "date_time(")
-                    if "not(" in value:
-                        value = value.replace("not(", "not_(")
-                    # Handle version() function
-                    if "version()" in value:
-                        survey_settings = survey_data.get("settings", {})
-                        value = value.replace("version()", f"version({survey_settings})")
-                    # Handle modulo operator
-                    if " mod " in value:
-                        value = value.replace(" mod ", " % ")
-                    survey_data["survey"][i][key] = eval(value)
-
+        values = self._values()
+        for item in self._questions(survey_data["survey"]):
+            for key in EXPRESSION_COLUMNS:
+                if item.get(key) is None:
+                    continue
+                if key == "calculation" and item.get("name") in self.results:
+                    item[key] = _output_value(self.results[item["name"]])
+                    continue
+                item[key] = _output_value(self._evaluate_column(item, key, values))
         return survey_data
-    
+
     def _parse_constraints(self, survey_data: dict):
         """
         Parse constraint expressions and evaluate them, adding results to survey items.
+        The `.` in a constraint refers to the preview input of the question.
         """
-        for i, item in enumerate(survey_data["survey"]):
-            if "name" in item:
-                constraint_key = f"{item['name']}_constraint"
-                if constraint_key in self.ctx and self.ctx[constraint_key]["type"] == "constraint":
-                    value = self.ctx[constraint_key]["value"]
-                    try:
-                        # Evaluate the constraint expression
-                        constraint_result = eval(value)
-                        # Add constraint result to the survey item
-                        survey_data["survey"][i]["constraint_result"] = constraint_result
-                        survey_data["survey"][i]["constraint_expression"] = value
-                    except Exception as e:
-                        survey_data["survey"][i]["constraint_result"] = f"Error: {str(e)}"
-                        survey_data["survey"][i]["constraint_expression"] = value
-        
+        values = self._values()
+        for item in self._questions(survey_data["survey"]):
+            if "name" not in item or not item.get("constraint"):
+                continue
+            # Add constraint result to the survey item
+            item["constraint_result"] = _output_value(self._evaluate_column(item, "constraint", values))
+            item["constraint_expression"] = str(item["constraint"])
+
         return survey_data
 
+    def set_input(self, name: str, value):
+        """
+        Change the preview input of a question. Only the calculations depending on the
+        question are evaluated again, and the outputs depending on it are refreshed
+        the next time `get_outputs` or `show_preview` is called.
+
+        ```python
+        previewer = FormPreviewer("survey.yaml")
+        previewer.set_input("age", 17)
+        previewer.get_outputs()["age_check"]["constraint_result"]
+        ```
+
+        Parameters
+        ----------
+        name : str
+            Name of the question.
+        value : any
+            New preview input, in the same format as `survey123py::preview_input`.
+            None removes the input.
+        """
+        item = self._items.get(name)
+        if item is None:
+            raise ValueError(f"Element ${{{name}}} not found in the form. Please check the question name.")
+        if item.get("calculation"):
+            raise ValueError(f"Element ${{{name}}} has a calculation. Its value cannot be set.")
+
+        item["survey123py::preview_input"] = value
+        if value is None:
+            self.ctx.pop(name, None)
+        else:
+            self.ctx[name] = {"value": self._input_value(item), "type": item.get("type")}
+
+        values = self._values()
+        for node in self.graph.downstream([_Node(name, "input")]):
+            if node.column == "calculation":
+                self._evaluate_calculation(node.name, values)
+            self._outputs.pop(node, None)
+
+    def get_outputs(self) -> dict:
+        """
+        Get the evaluated outputs of every named question. Outputs are cached and
+        only evaluated again when an input they depend on changes with `set_input`.
+
+        Returns
+        -------
+        dict
+            Question name mapped to a dictionary of its outputs. It contains
+            the `value` of the question if it has one, the result of its `calculation`,
+            `constraint_result` and the evaluated expression and text columns such as
+            `relevant` and `label`.
+        """
+        values = self._values()
+        outputs = {}
+        for node in self.graph:
+            name, column = node
+            question = outputs.setdefault(name, {})
+            if name in values:
+                question["value"] = _output_value(values[name])
+            if column == "input":
+                continue
+            if column == "calculation":
+                question["calculation"] = _output_value(self.results[name])
+                continue
+            if node not in self._outputs:
+                self._outputs[node] = _output_value(self._evaluate_column(self._items[name], column, values))
+            question["constraint_result" if column == "constraint" else column] = self._outputs[node]
+        return outputs
+
+    def _choice_filter(self, name: str) -> ChoiceFilter:
+        item = self._items.get(name)
+        if item is None:
+            raise ValueError(f"Element ${{{name}}} not found in the form. Please check the question name.")
+        if not item.get("choice_filter") or self.choices.list_name(name) is None:
+            raise ValueError(f"Element ${{{name}}} is not a select question with a choice_filter.")
+        if name not in self._choice_filters:
+            self._choice_filters[name] = compile_choice_filter(item["choice_filter"])
+        return self._choice_filters[name]
+
+    def filter_choices(self, name: str) -> List[dict]:
+        """
+        Get the choices of a select question that pass its `choice_filter` with the
+        current preview inputs. Names without `${}` in the filter refer to columns of
+        the choices, see `survey123py.choice_filters`.
+
+        ```python
+        previewer = FormPreviewer("survey.yaml")
+        previewer.set_input("county", "north")
+        [choice["name"] for choice in previewer.filter_choices("city")]
+        ```
+
+        Parameters
+        ----------
+        name : str
+            Name of the select question.
+
+        Returns
+        -------
+        List[dict]
+            The choices passing the filter, in the order of the choice list.
+        """
+        choice_filter = self._choice_filter(name)
+        return choice_filter.filter(self.choices, self.choices.list_name(name), self._values(), self.settings)
+
+    def choice_filter_report(self) -> pd.DataFrame:
+        """
+        Evaluate the choice filter of every select question with the current preview
+        inputs, to find the cascading selects that are slow or leave few choices.
+
+        Returns
+        -------
+        pandas.DataFrame
+            One row per question with a choice filter, with the columns `name`, `list_name`,
+            `choices` (size of the choice list), `filtered` (number of choices passing the
+            filter), `indexed` (whether column indexes were used), `seconds` (evaluation time)
+            and `error` (message if the filter could not be evaluated).
+        """
+        rows = []
+        values = self._values()
+        for item in self._questions():
+            name = item.get("name")
+            list_name = self.choices.list_name(name) if name else None
+            if not item.get("choice_filter") or list_name is None:
+                continue
+            row = {
+                "name": name, "list_name": list_name, "choices": len(self.choices.rows.get(list_name, [])),
+                "filtered": None, "indexed": False, "seconds": 0.0, "error": None,
+            }
+            start = time.perf_counter()
+            try:
+                choice_filter = self._choice_filter(name)
+                row["indexed"] = choice_filter.candidates(self.choices, list_name, values, self.settings) is not None
+                row["filtered"] = len(choice_filter.filter(self.choices, list_name, values, self.settings))
+            except Exception as e:
+                row["error"] = f"{type(e).__name__}: {e}"
+            row["seconds"] = time.perf_counter() - start
+            rows.append(row)
+        columns = ["name", "list_name", "choices", "filtered", "indexed", "seconds", "error"]
+        return pd.DataFrame(rows, columns=columns)
+
+    def evaluate_batch(self, inputs: pd.DataFrame) -> pd.DataFrame:
+        """
+        Evaluate the form for many scenarios at once. The calculations, constraints and
+        other expression columns are evaluated column-wise over every scenario using
+        `survey123py.vectorized`. Functions without a vectorized version, and scenarios
+        with empty values, are evaluated one scenario at a time with the same results
+        as `get_outputs`.
+
+        ```python
+        previewer = FormPreviewer("survey.yaml")
+        scenarios = pd.DataFrame({"age": [12, 17, 40], "country": ["CA", "US", "FR"]})
+        results = previewer.evaluate_batch(scenarios)
+        results["age.constraint"]
+        ```
+
+        Parameters
+        ----------
+        inputs : pandas.DataFrame
+            One row per scenario and one column per question holding its preview input,
+            in the same format as `survey123py::preview_input`. Questions without a column
+            use the preview input of the YAML file and empty cells have no input.
+
+        Returns
+        -------
+        pandas.DataFrame
+            One row per scenario with the index of `inputs` and a `<name>.<column>` column
+            for each evaluated column of a question, e.g. `total.calculation` or
+            `age.constraint`. Constraint errors are returned as an "Error: ..." message.
+
+        Raises
+        ------
+        ValueError
+            If a column is not a question of the form or is a calculated question, or if
+            a calculation cannot be evaluated for a scenario.
+        """
+        self._check_batch_columns(inputs.columns)
+
+        # Scenarios are numbered by position, values only have rows where the question has an input
+        rows = pd.RangeIndex(len(inputs))
+        values = {}
+        for name, item in self._items.items():
+            if item.get("calculation"):
+                continue
+            if name in inputs.columns:
+                values[name] = self._batch_inputs(item, inputs[name].reset_index(drop=True))
+            elif item.get("survey123py::preview_input") is not None:
+                values[name] = pd.Series([self._input_value(item)] * len(rows), index=rows)
+
+        outputs = {}
+        for node in self.graph.order():
+            name, column = node
+            item = self._items[name]
+            key = f"{name}.{column}"
+            if column == "calculation":
+                expression = compile_expression(str(item["calculation"]))
+                outputs[key] = self._evaluate_batch_expression(expression, values, values.get(name), rows, inputs.index)
+                values[name] = self._stored_values(item, outputs[key])
+            elif column == "constraint":
+                try:
+                    expression = compile_expression(str(item[column]))
+                except ValueError as e:
+                    outputs[key] = pd.Series([f"Error: {str(e)}"] * len(rows), index=rows, dtype=object)
+                    continue
+                outputs[key] = self._evaluate_batch_expression(
+                    expression, values, values.get(name), rows, inputs.index, errors="message"
+                )
+            elif column in EXPRESSION_COLUMNS:
+                value = item[column]
+                if str(value).strip().lower() in _LITERAL_VALUES:
+                    outputs[key] = pd.Series([value] * len(rows), index=rows, dtype=object)
+                    continue
+                expression = compile_expression(str(value))
+                outputs[key] = self._evaluate_batch_expression(expression, values, values.get(name), rows, inputs.index)
+
+        columns = [f"{name}.{column}" for name, column in self.graph if f"{name}.{column}" in outputs]
+        results = pd.DataFrame({column: outputs[column] for column in columns}, index=rows)
+        results.index = inputs.index
+        return results
+
+    def _check_batch_columns(self, names):
+        """
+        Check that the inputs of `evaluate_batch` are questions of the form whose value can be set.
+        """
+        for name in names:
+            item = self._items.get(name)
+            if item is None:
+                raise ValueError(f"Element ${{{name}}} not found in the form. Please check the question name.")
+            if item.get("calculation"):
+                raise ValueError(f"Element ${{{name}}} has a calculation. Its value cannot be set.")
+
+    def _batch_inputs(self, item: dict, column: pd.Series) -> pd.Series:
+        """
+        Convert a column of preview inputs to the values used in expressions.
+        Each distinct input is converted once with `_input_value`.
+        """
+        column = column.dropna()
+        codes, uniques = pd.factorize(column)
+        converted = np.empty(len(uniques), dtype=object)
+        converted[:] = [
+            self._input_value({"type": item.get("type"), "survey123py::preview_input": value})
+            for value in uniques.tolist()
+        ]
+        return _infer_values(pd.Series(converted[codes], index=column.index, dtype=object))
+
+    def _stored_values(self, item: dict, results: pd.Series) -> pd.Series:
+        """
+        Convert the results of a calculation to the values stored by the question.
+        """
+        if item.get("type") != "text" or value_kind(results) in ("string", "bool"):
+            return results
+        stored = [self._stored_value(item, value) for value in results.tolist()]
+        return _infer_values(pd.Series(stored, index=results.index, dtype=object))
+
+    def _evaluate_batch_expression(
+        self,
+        expression: Expression,
+        values: dict,
+        current,
+        rows: pd.RangeIndex,
+        labels: pd.Index,
+        errors: str = "raise",
+    ) -> pd.Series:
+        """
+        Evaluate an expression for every scenario. Scenarios where every referenced value
+        is present and not empty are evaluated column-wise, the others one at a time.
+
+        Errors of a scenario are raised as a ValueError with `errors="raise"` or returned
+        as an "Error: ..." message with `errors="message"`.
+        """
+        vectorized = np.ones(len(rows), dtype=bool)
+        for name in expression.variables:
+            if name not in values:
+                vectorized[:] = False
+                break
+            vectorized &= _valid_rows(values[name], len(rows))
+        if expression.uses_current and current is not None:
+            vectorized &= _valid_rows(current, len(rows))
+
+        result = None
+        if vectorized.any():
+            index = rows[vectorized]
+            try:
+                result = evaluate_vectorized(
+                    expression,
+                    {name: values[name].loc[index] for name in expression.variables},
+                    current=current.loc[index] if expression.uses_current and current is not None else None,
+                    settings=self.settings,
+                    choices=self.choices,
+                    index=index,
+                )
+            except Exception:
+                # Evaluate one scenario at a time to find the scenarios that fail
+                vectorized[:] = False
+                result = None
+            else:
+                if not isinstance(result, pd.Series):
+                    result = pd.Series([result] * len(index), index=index)
+        if vectorized.all():
+            return result
+
+        lookups = {name: values[name].to_dict() for name in expression.variables if name in values}
+        current_lookup = current.to_dict() if isinstance(current, pd.Series) else {}
+        scenario_results = []
+        for row in np.flatnonzero(~vectorized):
+            row_values = {name: lookup[row] for name, lookup in lookups.items() if row in lookup}
+            try:
+                scenario_results.append(
+                    expression.evaluate(
+                        row_values, current=current_lookup.get(row), settings=self.settings, choices=self.choices
+                    )
+                )
+            except Exception as e:
+                if errors == "raise":
+                    raise ValueError(f"Scenario {labels[row]}: {str(e)}") from e
+                scenario_results.append(f"Error: {str(e)}")
+
+        combined = pd.Series([None] * len(rows), index=rows, dtype=object)
+        if result is not None:
+            combined.iloc[np.flatnonzero(vectorized)] = result.astype(object).to_numpy()
+        combined.iloc[np.flatnonzero(~vectorized)] = scenario_results
+        return _infer_values(combined)
+
     def show_preview(self, outpath: str = None):
         """
         Generate a preview of the form output by parsing the YAML file and replacing variable references with their values.
@@ -316,6 +682,8 @@ class FormPreviewer:
         dict
             The parsed survey data with variable references replaced by their values.
         """
+        # Start from the loaded form so the preview reflects inputs changed by set_input
+        self.output_data = self._output_copy()
         # Parse variables in the survey data
         self.output_data = self._parse_vars(self.output_data)
         self.output_data = self._parse_formulas(self.output_data)
@@ -323,15 +691,35 @@ class FormPreviewer:
 
         if outpath:
             # Save the parsed survey data to a file if outpath is provided
+            output_data = self.output_data if self._output_form is None else self._output_form.to_dict()
             with open(outpath, 'w') as file:
-                yaml.dump(self.output_data, file, default_flow_style=False)
-        
+                yaml.dump(output_data, file, default_flow_style=False)
+
         # Return the parsed survey data
         return self.output_data
-    
-    def _eval():
-        """
-        Placeholder for a safe eval() function.
-        """
-        raise NotImplementedError("This function is not implemented yet.")
-        
\ No newline at end of file
+
+
+def _output_value(value):
+    """
+    Convert a value to the plain type written to the preview output, e.g. a
+    `select_multiple` answer to its text, so the output can be read with `yaml.safe_load`.
+    """
+    if isinstance(value, selections.Selection):
+        return str(value)
+    return value
+
+
+def _valid_rows(values: pd.Series, length: int) -> np.ndarray:
+    """
+    Mask of the rows where a question has a value that is not empty.
+    """
+    mask = np.zeros(length, dtype=bool)
+    mask[values.index[values.notna().to_numpy()]] = True
+    return mask
+
+
+def _infer_values(values: pd.Series) -> pd.Series:
+    # None and NaN are kept distinct, they are converted differently by the formulas
+    if values.isna().any():
+        return values
+    return values.infer_objects()
@@ -0,0 +1,208 @@
+"""
+Scenario Runner Module
+
+This module evaluates a form for large numbers of test scenarios with
+`FormPreviewer.evaluate_batch`. The scenarios are split into chunks that are
+spread across a pool of worker processes. Each worker loads the form and
+compiles its expressions once, and the results are yielded in the order of
+the scenarios as soon as they are ready.
+
+```python
+from survey123py.scenarios import iter_run_scenarios
+
+scenarios = ({"age": age} for age in range(200000))
+for result in iter_run_scenarios("survey.yaml", scenarios, chunksize=5000):
+    if not result.success:
+        print(result.scenario, result.error)
+```
+"""
+
+import itertools
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Iterable, Iterator, List, Mapping, Optional, Union
+
+import pandas as pd
+
+from .preview import FormPreviewer
+
+DEFAULT_CHUNKSIZE = 1000
+
+# Form loaded once by each worker process
+_previewer = None
+
+
+@dataclass
+class ScenarioResult:
+    """
+    Result of evaluating a form for a single scenario.
+
+    `outputs` maps `<name>.<column>` to the evaluated columns of each question,
+    as returned by `FormPreviewer.evaluate_batch`.
+    """
+    scenario: Any
+    outputs: dict = field(default_factory=dict)
+    error: Optional[str] = None
+
+    @property
+    def success(self) -> bool:
+        """True if the form was evaluated for the scenario."""
+        return self.error is None
+
+
+def _init_worker(yaml_path: str):
+    # Load the form once so its expressions are compiled once per worker
+    global _previewer
+    _previewer = FormPreviewer(yaml_path)
+
+
+def _run_chunk(chunk: pd.DataFrame) -> List[ScenarioResult]:
+    return _evaluate(_previewer, chunk)
+
+
+def _evaluate(previewer: FormPreviewer, chunk: pd.DataFrame) -> List[ScenarioResult]:
+    """
+    Evaluate a chunk of scenarios. If the chunk fails, it is split in half until
+    the failing scenarios are found, so the other scenarios are still evaluated.
+    The columns are checked by `_chunks` first, so only errors that depend on the
+    values of a scenario are retried.
+    """
+    try:
+        results = previewer.evaluate_batch(chunk)
+    except Exception as e:
+        if len(chunk) == 1:
+            return [ScenarioResult(scenario=chunk.index[0], error=f"{type(e).__name__}: {e}")]
+        middle = len(chunk) // 2
+        return _evaluate(previewer, chunk.iloc[:middle]) + _evaluate(previewer, chunk.iloc[middle:])
+    return [
+        ScenarioResult(scenario=label, outputs=outputs)
+        for label, outputs in zip(chunk.index, results.to_dict("records"))
+    ]
+
+
+def _chunks(
+    scenarios: Union[pd.DataFrame, Iterable[Mapping[str, Any]]],
+    chunksize: int,
+    previewer: FormPreviewer,
+) -> Iterator[pd.DataFrame]:
+    """
+    Split the scenarios into DataFrames of at most `chunksize` rows.
+
+    The columns are checked against the form before they are evaluated, so a
+    misspelled question name raises a ValueError instead of failing every scenario.
+    DataFrames are checked before the first chunk and mappings as they are read.
+    Scenarios given as mappings are labelled by their position, and the questions
+    missing from a mapping get their `survey123py::preview_input`. DataFrames are
+    split as they are: questions without a column get their preview input from
+    `evaluate_batch`, but an empty cell has no input.
+    """
+    if isinstance(scenarios, pd.DataFrame):
+        previewer._check_batch_columns(scenarios.columns)
+        for start in range(0, len(scenarios), chunksize):
+            yield scenarios.iloc[start:start + chunksize]
+        return
+
+    defaults = {name: item.get("survey123py::preview_input") for name, item in previewer._items.items()}
+    checked = set()
+    scenarios = iter(scenarios)
+    start = 0
+    while True:
+        records = list(itertools.islice(scenarios, chunksize))
+        if not records:
+            return
+        columns = list(dict.fromkeys(name for record in records for name in record))
+        previewer._check_batch_columns([name for name in columns if name not in checked])
+        checked.update(columns)
+        rows = [[record[name] if name in record else defaults.get(name) for name in columns] for record in records]
+        # Object columns keep the inputs as given instead of converting them to a common type
+        yield pd.DataFrame(rows, columns=columns, index=pd.RangeIndex(start, start + len(records)), dtype=object)
+        start += len(records)
+
+
+def iter_run_scenarios(
+    yaml_path: str,
+    scenarios: Union[pd.DataFrame, Iterable[Mapping[str, Any]]],
+    workers: Optional[int] = None,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+) -> Iterator[ScenarioResult]:
+    """
+    Evaluate a form for many scenarios, yielding each result in the order of
+    `scenarios` as soon as it is ready. A failing scenario does not stop the run.
+
+    Parameters
+    ----------
+    yaml_path : str
+        Path to the YAML file containing survey data.
+    scenarios : pandas.DataFrame or Iterable[Mapping[str, Any]]
+        Preview inputs of each scenario by question name, as rows of a DataFrame or
+        as dictionaries. Questions missing from a dictionary, or without a column in
+        the DataFrame, use their `survey123py::preview_input`, while empty cells and None
+        values have no input. A DataFrame cannot leave out a question for some rows only.
+        Scenarios are only read as chunks are needed, so a generator can be used for large runs.
+    workers : int, optional
+        Number of worker processes. Defaults to the number of CPUs.
+        With 1 worker the scenarios are evaluated in the current process.
+    chunksize : int, optional
+        Number of scenarios evaluated together by a worker, by default 1000.
+
+    Yields
+    ------
+    ScenarioResult
+        Result of each scenario, labelled by its DataFrame index or its position.
+
+    Raises
+    ------
+    ValueError
+        If a column or key of the scenarios is not a question of the form or is a
+        calculated question. DataFrame columns and the keys of the first chunk are
+        checked before any scenario is evaluated.
+    """
+    if chunksize < 1:
+        raise ValueError(f"Chunk size must be at least 1, got {chunksize}")
+    # Load the form and read the first chunk here so errors in the form and the
+    # scenario columns are raised before starting the workers
+    previewer = FormPreviewer(yaml_path)
+    chunks = _chunks(scenarios, chunksize, previewer)
+    first = next(chunks, None)
+    if first is None:
+        return
+    chunks = itertools.chain([first], chunks)
+
+    if workers == 1:
+        for chunk in chunks:
+            yield from _evaluate(previewer, chunk)
+        return
+
+    workers = workers or os.cpu_count() or 1
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(yaml_path,))
+    try:
+        # Keep a few chunks per worker in flight so memory stays bounded for large runs
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(_run_chunk, chunk))
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+
+def run_scenarios(
+    yaml_path: str,
+    scenarios: Union[pd.DataFrame, Iterable[Mapping[str, Any]]],
+    workers: Optional[int] = None,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+) -> List[ScenarioResult]:
+    """
+    Evaluate a form for many scenarios in parallel.
+    See `iter_run_scenarios` for the parameters.
+
+    Returns
+    -------
+    List[ScenarioResult]
+        Result of each scenario in the order of `scenarios`.
+    """
+    return list(iter_run_scenarios(yaml_path, scenarios, workers=workers, chunksize=chunksize))
@@ -0,0 +1,241 @@
+"""
+Template Registry Module
+
+This module loads the Survey123 XLSForm templates shipped with the package and
+keeps a single parsed copy of each one per process, so that every `FormData`
+and `ExcelToYamlConverter` instance can share it instead of re-reading the
+workbook.
+
+Parsing the template workbook is slow, so a binary snapshot of the parsed
+sheets can be built ahead of time with:
+
+```
+python -m survey123py.templates
+```
+
+The snapshot is used when it matches the template files and the installed
+pandas version. Otherwise the template is read from the `.xlsx` file.
+"""
+
+import hashlib
+import json
+import pickle
+import threading
+from dataclasses import dataclass
+from functools import cached_property
+from pathlib import Path
+from types import MappingProxyType
+from typing import Dict, Mapping, Tuple
+
+import pandas as pd
+
+from .workbook import TemplateWorkbook
+
+TEMPLATE_DIR = Path(__file__).parent / "template"
+
+TEMPLATE_PATHS = {
+    "3.22": {
+        "survey": TEMPLATE_DIR / "template_3.22.xlsx",
+        "columns": TEMPLATE_DIR / "template_3.22_columns.json",
+        "snapshot": TEMPLATE_DIR / "template_3.22.pkl",
+    },
+}
+
+# Increase when the layout of the snapshot file changes
+SNAPSHOT_FORMAT = 1
+
+# pandas 3 always uses copy-on-write. On older versions it is opt-in.
+_COPY_ON_WRITE = int(pd.__version__.split(".")[0]) >= 3 or pd.options.mode.copy_on_write is True
+
+
+@dataclass(frozen=True)
+class Template:
+    """
+    Parsed Survey123 template shared between all users of a template version.
+
+    The sheets and column mappings must not be modified in place. Use `sheet()`
+    to get a DataFrame that can be freely edited.
+    """
+    version: str
+    path: Path
+    columns_path: Path
+    key: Tuple[float, float]
+    sheets: Mapping[str, pd.DataFrame]
+    columns: Mapping[str, Mapping[str, str]]
+
+    @property
+    def form_version(self) -> str:
+        """Template version as written in the Version sheet of the workbook."""
+        return self.sheets["Version"].iloc[1]["Unnamed: 1"]
+
+    @cached_property
+    def workbook(self) -> TemplateWorkbook:
+        """Raw template workbook used to write new forms. Loaded on first use."""
+        return TemplateWorkbook(self.path)
+
+    def sheet(self, sheet_name: str) -> pd.DataFrame:
+        """
+        Get an editable copy of a template sheet.
+
+        With copy-on-write enabled in pandas this is a cheap view that only
+        copies the data once it is modified.
+
+        Parameters
+        ----------
+        sheet_name : str
+            Name of the sheet in the template workbook.
+
+        Returns
+        -------
+        pd.DataFrame
+            Copy of the template sheet.
+        """
+        return self.sheets[sheet_name].copy(deep=not _COPY_ON_WRITE)
+
+
+_cache: Dict[str, Template] = {}
+_lock = threading.Lock()
+
+
+def _template_key(paths: Dict[str, Path]) -> Tuple[float, float]:
+    return (paths["survey"].stat().st_mtime, paths["columns"].stat().st_mtime)
+
+
+def _source_hash(paths: Dict[str, Path]) -> str:
+    digest = hashlib.sha256()
+    for name in ("survey", "columns"):
+        digest.update(paths[name].read_bytes())
+    return digest.hexdigest()
+
+
+def _parse_template_files(paths: Dict[str, Path]) -> Tuple[Dict[str, pd.DataFrame], Dict[str, Dict[str, str]]]:
+    # A single read of the workbook returns every sheet at once
+    sheets = pd.read_excel(paths["survey"], sheet_name=None)
+    with open(paths["columns"]) as f:
+        columns = json.load(f)
+    return sheets, columns
+
+
+def _load_snapshot(paths: Dict[str, Path]):
+    """
+    Load the parsed sheets and columns from the snapshot file.
+    Returns None if the snapshot is missing, unreadable or stale.
+    """
+    snapshot_path = paths.get("snapshot")
+    if snapshot_path is None or not snapshot_path.exists():
+        return None
+    try:
+        with open(snapshot_path, "rb") as f:
+            snapshot = pickle.load(f)
+    except Exception:
+        return None
+
+    if (
+        not isinstance(snapshot, dict)
+        or snapshot.get("format") != SNAPSHOT_FORMAT
+        or snapshot.get("pandas") != pd.__version__
+        or snapshot.get("source") != _source_hash(paths)
+    ):
+        return None
+    return snapshot["sheets"], snapshot["columns"]
+
+
+def _read_template(version: str, paths: Dict[str, Path], key: Tuple[float, float]) -> Template:
+    snapshot = _load_snapshot(paths)
+    if snapshot is not None:
+        sheets, columns = snapshot
+    else:
+        sheets, columns = _parse_template_files(paths)
+    return Template(
+        version=version,
+        path=paths["survey"],
+        columns_path=paths["columns"],
+        key=key,
+        sheets=MappingProxyType(sheets),
+        columns=MappingProxyType({k: MappingProxyType(v) for k, v in columns.items()}),
+    )
+
+
+def get_template(version: str) -> Template:
+    """
+    Get the parsed template for a Survey123 version.
+
+    The template is read from disk the first time it is requested and cached
+    for the rest of the process. The cache entry is refreshed if the template
+    files are modified.
+
+    Parameters
+    ----------
+    version : str
+        Template version being used for Survey123
+
+    Returns
+    -------
+    Template
+        Parsed template shared by all callers.
+
+    Raises
+    ------
+    ValueError
+        If the version is not supported.
+    """
+    if version not in TEMPLATE_PATHS.keys():
+        raise ValueError(f"Version {version} not supported. Supported versions are: {list(TEMPLATE_PATHS.keys())}")
+
+    paths = TEMPLATE_PATHS[version]
+    key = _template_key(paths)
+    template = _cache.get(version)
+    if template is not None and template.key == key:
+        return template
+
+    with _lock:
+        template = _cache.get(version)
+        if template is None or template.key != key:
+            template = _read_template(version, paths, key)
+            _cache[version] = template
+    return template
+
+
+def clear_template_cache():
+    """
+    Remove all parsed templates from the cache.
+    """
+    with _lock:
+        _cache.clear()
+
+
+def build_snapshot(version: str) -> Path:
+    """
+    Parse the template files for a version and save them as a binary snapshot
+    next to the template, so later processes can skip parsing the workbook.
+
+    Parameters
+    ----------
+    version : str
+        Template version being used for Survey123
+
+    Returns
+    -------
+    Path
+        Path to the snapshot file.
+    """
+    if version not in TEMPLATE_PATHS.keys():
+        raise ValueError(f"Version {version} not supported. Supported versions are: {list(TEMPLATE_PATHS.keys())}")
+
+    paths = TEMPLATE_PATHS[version]
+    sheets, columns = _parse_template_files(paths)
+    snapshot = {
+        "format": SNAPSHOT_FORMAT,
+        "pandas": pd.__version__,
+        "source": _source_hash(paths),
+        "sheets": sheets,
+        "columns": columns,
+    }
+    with open(paths["snapshot"], "wb") as f:
+        pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+    return paths["snapshot"]
+
+
+if __name__ == "__main__":
+    for template_version in TEMPLATE_PATHS.keys():
+        print(f"Template {template_version} snapshot saved to {build_snapshot(template_version)}")
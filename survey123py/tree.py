@@ -0,0 +1,154 @@
+"""
+Survey Tree Module
+
+In YAML, a group or repeat is a single item of the survey with its questions in
+`children`. In the survey sheet of an XLSForm, its questions are rows between a
+`begin group` and an `end group` row, or `begin repeat` and `end repeat`.
+
+This module converts between the two and walks the questions of a survey. Groups
+and repeats can be nested at any depth. Items are visited with an explicit stack
+instead of recursion, so deep forms do not hit the recursion limit and every item
+is visited once.
+
+```python
+from survey123py import tree
+
+survey = [
+    {"type": "group", "name": "site", "label": "Site", "children": [
+        {"type": "repeat", "name": "visits", "label": "Visits", "children": [
+            {"type": "date", "name": "visit_date", "label": "Date"},
+        ]},
+    ]},
+]
+rows = list(tree.flatten(survey))  # begin group, begin repeat, date, end repeat, end group
+tree.unflatten(rows) == survey  # True
+[item["name"] for item in tree.walk(survey)]  # ["site", "visits", "visit_date"]
+```
+"""
+
+import warnings
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+# Column holding the questions of groups and repeats in YAML
+CHILDREN = "children"
+# Types of the begin and end rows of each container type
+CONTAINER_TYPES = {
+    "group": ("begin group", "end group"),
+    "repeat": ("begin repeat", "end repeat"),
+}
+# Container type of each begin row type. The converter writes `begin group` as `group`.
+_BEGIN_TYPES = {begin: container for container, (begin, _) in CONTAINER_TYPES.items()}
+_BEGIN_TYPES.update({container: container for container in CONTAINER_TYPES})
+_END_TYPES = tuple(end for _, end in CONTAINER_TYPES.values())
+# Marks the end of the children of a container
+_DONE = object()
+
+
+def _container_type(item: Any):
+    # Items are dictionaries or rows of survey123py.model
+    return CONTAINER_TYPES.get(item.get("type")) if hasattr(item, "get") else None
+
+
+def walk(items: Iterable[dict]) -> Iterator[dict]:
+    """
+    Iterate over the items of a YAML survey, including the children of groups and
+    repeats, in the order of the survey sheet. Groups and repeats come before their children.
+    """
+    stack = [iter(items)]
+    while stack:
+        item = next(stack[-1], _DONE)
+        if item is _DONE:
+            stack.pop()
+            continue
+        yield item
+        if _container_type(item) is not None:
+            stack.append(iter(item.get(CHILDREN) or []))
+
+
+def flatten(items: Iterable[dict]) -> Iterator[dict]:
+    """
+    Convert the items of a YAML survey to the rows of the survey sheet.
+
+    Each group or repeat is replaced by its `begin` row, with every column of the
+    item except `children`, followed by the rows of its children and an `end` row.
+    Other items are returned as they are.
+
+    Parameters
+    ----------
+    items : Iterable[dict]
+        Items of the `survey` section of a YAML form.
+
+    Yields
+    ------
+    dict
+        Rows of the survey sheet.
+    """
+    stack = [(iter(items), None)]
+    while stack:
+        children, end = stack[-1]
+        item = next(children, _DONE)
+        if item is _DONE:
+            stack.pop()
+            if end is not None:
+                yield {"type": end}
+            continue
+        types = _container_type(item)
+        if types is None:
+            yield item
+            continue
+        begin, end = types
+        row = {column: value for column, value in item.items() if column != CHILDREN}
+        row["type"] = begin
+        yield row
+        stack.append((iter(item.get(CHILDREN) or []), end))
+
+
+def unflatten(rows: Iterable[dict], container: Optional[Callable[[Any, str], Any]] = None) -> List[Dict[str, Any]]:
+    """
+    Convert the rows of a survey sheet to the items of a YAML survey.
+
+    The rows between a `begin` and an `end` row become the `children` of a group
+    or repeat item, which has the other columns of the `begin` row. A warning is
+    issued for `end` rows without a `begin` row, and groups that are not ended are
+    ended with the survey.
+
+    Parameters
+    ----------
+    rows : Iterable[dict]
+        Rows of the survey sheet.
+    container : Callable[[Any, str], Any], optional
+        Function building the item of a group or repeat from its `begin` row and
+        its type, "group" or "repeat". The item holds its children in an empty
+        `children` list. By default the item is a new dictionary.
+
+    Returns
+    -------
+    List[Dict[str, Any]]
+        Items of the `survey` section.
+    """
+    container = container or _container_item
+    items = []
+    stack = [items]
+    for row in rows:
+        row_type = str(row.get("type", "")).strip().lower()
+        container_type = _BEGIN_TYPES.get(row_type)
+        if container_type is not None:
+            item = container(row, container_type)
+            stack[-1].append(item)
+            stack.append(item[CHILDREN])
+        elif row_type in _END_TYPES:
+            if len(stack) > 1:
+                stack.pop()
+            else:
+                warnings.warn(f"Unmatched end statement: {row_type}")
+        else:
+            stack[-1].append(row)
+    return items
+
+
+def _container_item(row: Any, container_type: str) -> Dict[str, Any]:
+    item = {"type": container_type, "name": row.get("name", ""), "label": row.get("label", ""), CHILDREN: []}
+    for column, value in row.items():
+        if column not in ("type", "name", "label", CHILDREN):
+            item[column] = value
+    return item
@@ -0,0 +1,461 @@
+"""
+Vectorized Expression Module
+
+This module evaluates compiled XLSForm expressions over whole columns of
+question values at once, e.g. the calculations of a form for every scenario in
+a table. Operators and the functions in `VECTOR_FUNCTIONS` are applied to whole
+columns with NumPy and pandas. Other functions are called once per row with
+the functions in `survey123py.formulas`, so the results are the same as
+evaluating the expression for each row with `Expression.evaluate`.
+
+```python
+import pandas as pd
+from survey123py.expressions import compile_expression
+from survey123py.vectorized import evaluate_vectorized
+
+expression = compile_expression("if(${age} >= 18, 'adult', 'minor')")
+evaluate_vectorized(expression, {"age": pd.Series([12, 40])})  # ["minor", "adult"]
+```
+"""
+
+import functools
+import itertools
+import operator
+from typing import Any, Mapping, Optional
+
+import numpy as np
+import pandas as pd
+
+from . import expressions, formulas
+from .choices import ChoiceIndex
+from .expressions import Expression, FUNCTIONS
+from .formulas import selections, vectorized as vectorized_formulas
+
+# Scalar helpers of the operators, used for the values that cannot be vectorized
+_SCALAR_OPERATORS = {
+    operator_name: getattr(expressions, helper)
+    for operator_name, helper in expressions._OPERATOR_HELPERS.items()
+}
+_ARITHMETIC_OPERATORS = {
+    "+": operator.add, "-": operator.sub, "*": operator.mul, "div": operator.truediv,
+}
+_ORDERED_OPERATORS = {
+    "<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge,
+}
+_FALSE_STRINGS = ["", "0", "false", "no"]
+# Functions without arguments that return the same value for every row. now() and
+# today() read the clock once, see `survey123py.formulas.dates.set_clock`.
+_CONSTANT_FUNCTIONS = ("pi", "true", "false", "now", "today")
+# Kinds of the arguments of the vectorized formulas that are not all numbers
+_ARGUMENT_KINDS = {"date": ("string",), "date_time": ("string",), "format_date": ("number", "string")}
+# Vectorized formulas returning timestamps, which are integers in the scalar formulas
+_TIMESTAMP_FUNCTIONS = ("date", "date_time")
+
+
+def value_kind(value) -> str:
+    """
+    Classify a value or column for vectorized evaluation.
+
+    Parameters
+    ----------
+    value : any
+        Scalar value or pandas Series.
+
+    Returns
+    -------
+    str
+        "bool", "number", "string" or "object" for values of mixed or other types.
+    """
+    if isinstance(value, pd.Series):
+        if value.dtype == bool:
+            return "bool"
+        if value.dtype.kind in "iuf":
+            return "number"
+        if isinstance(value.dtype, pd.StringDtype):
+            return "string"
+        if value.dtype == object and pd.api.types.infer_dtype(value, skipna=False) == "string":
+            return "string"
+        return "object"
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, (int, float)):
+        return "number"
+    if isinstance(value, str):
+        return "string"
+    return "object"
+
+
+def evaluate_vectorized(
+    expression: Expression,
+    values: Mapping[str, Any],
+    current: Any = None,
+    settings: Optional[dict] = None,
+    index: Optional[pd.Index] = None,
+    choices: Optional[ChoiceIndex] = None,
+):
+    """
+    Evaluate an expression for every row of a set of columns.
+
+    Missing and empty values are not handled specially. Rows with missing values
+    should be evaluated with `Expression.evaluate`, which reports the missing
+    question, or converts None as the scalar functions do.
+
+    Parameters
+    ----------
+    expression : Expression
+        Compiled expression from `survey123py.expressions.compile_expression`.
+    values : Mapping[str, Any]
+        Question values referenced by `${name}`, as pandas Series sharing the same
+        index or as scalar values that are the same for every row.
+    current : any, optional
+        Value of the current question, referenced by `.`
+    settings : dict, optional
+        Settings of the form, used by `version()`.
+    index : pandas.Index, optional
+        Index of the rows. Defaults to the index of the first Series in `values`.
+    choices : ChoiceIndex, optional
+        Choices of the form, used by `jr:choice-name()`.
+
+    Returns
+    -------
+    pandas.Series or any
+        Result for each row, or a single value if the result is the same for every row.
+    """
+    if index is None:
+        index = next((value.index for value in values.values() if isinstance(value, pd.Series)), pd.RangeIndex(1))
+    with np.errstate(all="ignore"):
+        return _VectorEvaluator(values, current, settings, index, choices).evaluate(expression.tree)
+
+
+class _VectorEvaluator:
+    """
+    Evaluate an expression tree with pandas Series in place of scalar values.
+    """
+
+    def __init__(self, values, current, settings, index, choices=None):
+        self.values = values
+        self.current = current
+        self.settings = settings
+        self.index = index
+        self.choices = choices
+
+    def evaluate(self, tree: tuple):
+        kind = tree[0]
+        if kind in ("num", "str", "bool"):
+            return tree[1]
+        if kind == "var":
+            return self.values[tree[1]]
+        if kind == "current":
+            return self.current
+        if kind == "neg":
+            return _negate(self.evaluate(tree[1]))
+        if kind == "binop":
+            operator_name, left, right = tree[1], self.evaluate(tree[2]), self.evaluate(tree[3])
+            if operator_name in ("and", "or"):
+                return _logical(operator_name, left, right)
+            return _binary(operator_name, left, right)
+        if kind == "call":
+            return self._call(tree[1], [self.evaluate(arg) for arg in tree[2]])
+        raise ValueError(f"Unknown expression node {kind}")
+
+    def _call(self, name: str, args: list):
+        if name == "if_" and len(args) == 3:
+            return _where(*args)
+        if name == "version" and not args:
+            return formulas.version(self.settings)
+        if name == "jr_choice_name" and len(args) == 2:
+            # Labels are looked up in the choices of the form, one dictionary lookup per row
+            function = functools.partial(formulas.jr_choice_name, choices=self.choices)
+            if not any(isinstance(arg, pd.Series) for arg in args):
+                return function(*args)
+            return _rowwise(function, args, self.index)
+        if not args and name in _CONSTANT_FUNCTIONS:
+            return FUNCTIONS[name]()
+        if not args:
+            # Functions without arguments such as now() and uuid() may differ for every row
+            return _rowwise(FUNCTIONS[name], args, self.index)
+        if not any(isinstance(arg, pd.Series) for arg in args):
+            return FUNCTIONS[name](*args)
+        if name in VECTOR_FUNCTIONS:
+            result = VECTOR_FUNCTIONS[name](*args)
+            if result is not NotImplemented:
+                return result
+        return _rowwise(FUNCTIONS[name], args, self.index)
+
+
+def _rowwise(function, args: list, index: pd.Index) -> pd.Series:
+    """
+    Call a scalar function for every row of the arguments.
+    """
+    if not args:
+        results = [function() for _ in range(len(index))]
+    else:
+        columns = [arg.tolist() if isinstance(arg, pd.Series) else itertools.repeat(arg) for arg in args]
+        results = [function(*row) for row in zip(*columns)]
+    result = pd.Series(results, index=index, dtype=object)
+    # Keep None and NaN distinct, they are converted differently by the formulas
+    if result.isna().any():
+        return result
+    return result.infer_objects()
+
+
+def _series_args(args) -> list:
+    series = next(arg for arg in args if isinstance(arg, pd.Series))
+    return [arg if isinstance(arg, pd.Series) else pd.Series(arg, index=series.index) for arg in args]
+
+
+def _numbers(value):
+    """
+    Convert a number or string column to numbers, following XPath rules.
+    """
+    if not isinstance(value, pd.Series):
+        return expressions._to_number(value)
+    if value_kind(value) == "string":
+        return pd.to_numeric(value.str.strip(), errors="coerce")
+    return value
+
+
+def _truth(value):
+    if not isinstance(value, pd.Series):
+        return expressions._truth(value)
+    kind = value_kind(value)
+    if kind == "bool":
+        return value
+    if kind == "number":
+        return value != 0
+    if kind == "string":
+        return ~value.str.lower().isin(_FALSE_STRINGS)
+    return _rowwise(expressions._truth, [value], value.index).astype(bool)
+
+
+def _logical(operator_name: str, left, right):
+    left, right = _truth(left), _truth(right)
+    if operator_name == "and":
+        if not isinstance(left, pd.Series) and not isinstance(right, pd.Series):
+            return left and right
+        return left & right
+    if not isinstance(left, pd.Series) and not isinstance(right, pd.Series):
+        return left or right
+    return left | right
+
+
+def _binary(operator_name: str, left, right):
+    if not isinstance(left, pd.Series) and not isinstance(right, pd.Series):
+        return _SCALAR_OPERATORS[operator_name](left, right)
+    kinds = {value_kind(left), value_kind(right)}
+    if not kinds <= {"number", "string"}:
+        # Booleans and mixed columns follow the scalar rules for every value
+        return _rowwise(_SCALAR_OPERATORS[operator_name], [left, right], _series_args([left, right])[0].index)
+
+    if operator_name in ("=", "==", "!="):
+        if len(kinds) > 1:
+            # Strings compared with numbers are compared as numbers
+            left, right = _numbers(left), _numbers(right)
+        result = left == right
+        return ~result if operator_name == "!=" else result
+    if operator_name in _ORDERED_OPERATORS:
+        if len(kinds) > 1:
+            left, right = _numbers(left), _numbers(right)
+        return _ORDERED_OPERATORS[operator_name](left, right)
+
+    left, right = _numbers(left), _numbers(right)
+    if operator_name == "mod":
+        return _modulo(left, right)
+    return _ARITHMETIC_OPERATORS[operator_name](left, right)
+
+
+def _modulo(left, right):
+    # XPath keeps the sign of the dividend and returns NaN for a zero divisor
+    integers = all(
+        value.dtype.kind in "iu" if isinstance(value, pd.Series) else isinstance(value, int)
+        for value in (left, right)
+    )
+    if integers:
+        zero = (right == 0).any() if isinstance(right, pd.Series) else right == 0
+        if not zero:
+            return np.fmod(left, right)
+    left = left.astype(float) if isinstance(left, pd.Series) else float(left)
+    right = right.astype(float) if isinstance(right, pd.Series) else float(right)
+    return np.fmod(left, right)
+
+
+def _negate(value):
+    if not isinstance(value, pd.Series):
+        return expressions._neg(value)
+    kind = value_kind(value)
+    if kind in ("number", "string"):
+        return -_numbers(value)
+    return _rowwise(expressions._neg, [value], value.index)
+
+
+def _where(condition, a, b):
+    condition = _truth(condition)
+    if not isinstance(condition, pd.Series):
+        return a if condition else b
+    a, b = (value if isinstance(value, pd.Series) else pd.Series([value] * len(condition), index=condition.index)
+            for value in (a, b))
+    if a.dtype != b.dtype:
+        a, b = a.astype(object), b.astype(object)
+    return a.where(condition, b)
+
+
+def _strings(*args) -> bool:
+    return all(value_kind(arg) == "string" for arg in args)
+
+
+def _concat(*args):
+    if not _strings(*args):
+        return NotImplemented
+    return functools.reduce(operator.add, args)
+
+
+def _string_method(method: str):
+    def function(string, substring):
+        if not isinstance(string, pd.Series) or isinstance(substring, pd.Series) or not _strings(string, substring):
+            return NotImplemented
+        if method == "contains":
+            return string.str.contains(substring, regex=False)
+        return getattr(string.str, method)(substring)
+    return function
+
+
+def _string_length(string):
+    if not _strings(string):
+        return NotImplemented
+    return string.str.len()
+
+
+def _string(value):
+    kind = value_kind(value)
+    if kind == "string":
+        return value
+    if kind == "bool" or value.dtype.kind in "iu":
+        return value.astype(str)
+    return NotImplemented
+
+
+def _present(value):
+    """
+    Mask of the values that are not empty, as used by coalesce() and count().
+    """
+    kind = value_kind(value)
+    if kind == "string":
+        return value != ""
+    if kind in ("number", "bool"):
+        return True
+    return NotImplemented
+
+
+def _coalesce(*args):
+    masks = [_present(arg) for arg in args]
+    if any(mask is NotImplemented for mask in masks):
+        return NotImplemented
+    result = ""
+    for arg, mask in reversed(list(zip(args, masks))):
+        result = _where(mask, arg, result)
+    return result
+
+
+def _count(*args):
+    masks = [_present(arg) for arg in args]
+    if any(mask is NotImplemented for mask in masks):
+        return NotImplemented
+    return functools.reduce(operator.add, (mask.astype(int) if isinstance(mask, pd.Series) else int(mask) for mask in masks))
+
+
+def _selections(answer: pd.Series):
+    """
+    Parse every distinct multi-select answer once. Returns the code of the answer
+    of every row and the parsed answers, or None if some answers are missing.
+    """
+    codes, uniques = pd.factorize(answer)
+    if (codes < 0).any():
+        return None
+    return codes, [selections.parse(value) for value in uniques.tolist()]
+
+
+def _from_selections(answer: pd.Series, function, dtype):
+    parsed = _selections(answer)
+    if parsed is None:
+        return NotImplemented
+    codes, answers = parsed
+    results = np.array([function(selection) for selection in answers], dtype=dtype)
+    return pd.Series(results[codes], index=answer.index)
+
+
+def _selected(answer, choice):
+    if not isinstance(answer, pd.Series) or isinstance(choice, pd.Series) or not _strings(answer):
+        return NotImplemented
+    choice = "" if not choice else str(choice)
+    if not choice:
+        return pd.Series(False, index=answer.index)
+    return _from_selections(answer, lambda selection: choice in selection.choices, bool)
+
+
+def _selected_at(answer, index):
+    if not isinstance(answer, pd.Series) or not _strings(answer):
+        return NotImplemented
+    if isinstance(index, bool) or not isinstance(index, (int, np.integer)):
+        return NotImplemented
+    values = _from_selections(
+        answer, lambda selection: selection.values[index] if 0 <= index < len(selection.values) else "", object
+    )
+    return values if values is NotImplemented else values.astype(answer.dtype)
+
+
+def _count_selected(answer):
+    if not isinstance(answer, pd.Series) or not _strings(answer):
+        return NotImplemented
+    return _from_selections(answer, lambda selection: selection.count, np.int64)
+
+
+def _math(name: str):
+    """
+    Wrap a function of `survey123py.formulas.vectorized` for expressions. Rows with
+    empty values or outside the domain of the function, which return NaN, None or
+    infinity, are evaluated by the scalar formula instead so they raise the same errors.
+    """
+    function = getattr(vectorized_formulas, name)
+    kinds = _ARGUMENT_KINDS.get(name)
+
+    def vectorized(*args):
+        if kinds is None and not all(value_kind(arg) == "number" for arg in args):
+            return NotImplemented
+        if kinds is not None and [value_kind(arg) for arg in args] != list(kinds):
+            return NotImplemented
+        # Only the values can be columns, e.g. not the format of format-date()
+        if any(isinstance(arg, pd.Series) for arg in args[1:]) and name in ("round", "format_date"):
+            return NotImplemented
+        # Rounding to decimals is not vectorized, so it is left to the scalar formula
+        if name == "round" and len(args) > 1 and args[1] != 0:
+            return NotImplemented
+        result = function(*args)
+        if result.isna().any():
+            return NotImplemented
+        if result.dtype.kind == "f" and not np.isfinite(result).all():
+            return NotImplemented
+        if name in _TIMESTAMP_FUNCTIONS:
+            return result.astype("int64")
+        return result
+    return vectorized
+
+
+# Vectorized versions of the formulas, by their Python name. Each function receives
+# at least one pandas Series and returns NotImplemented if it does not support the
+# types of its arguments, in which case the formula is called for every row instead.
+VECTOR_FUNCTIONS = {
+    "boolean": _truth,
+    "not_": lambda value: ~_truth(value),
+    "concat": _concat,
+    "contains": _string_method("contains"),
+    "starts_with": _string_method("startswith"),
+    "ends_with": _string_method("endswith"),
+    "string_length": _string_length,
+    "string": _string,
+    "coalesce": _coalesce,
+    "count": _count,
+    "selected": _selected,
+    "selected_at": _selected_at,
+    "count_selected": _count_selected,
+}
+VECTOR_FUNCTIONS.update({name: _math(name) for name in vectorized_formulas.FUNCTION_NAMES})
@@ -0,0 +1,160 @@
+"""
+Template Workbook Module
+
+This module keeps the raw parts of a Survey123 template workbook in memory and
+writes new workbooks by replacing only the rows of the sheets being filled in.
+Every other part of the template (styles, tables, data validations, reference
+sheets) is copied to the output unchanged.
+"""
+
+import io
+import math
+import posixpath
+import re
+import zipfile
+from numbers import Number
+from pathlib import Path
+from typing import Dict, List, Mapping, Tuple
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape
+
+from openpyxl.utils import column_index_from_string, get_column_letter
+
+
+_NS_MAIN = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+_NS_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+_NS_PKG_REL = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+_SHEET_DATA_RE = re.compile(r"<sheetData\s*/>|<sheetData>(.*?)</sheetData>", re.S)
+_ROW_RE = re.compile(r"<row\b[^>]*?\br=\"(\d+)\"[^>]*?(?:/>|>.*?</row>)", re.S)
+_DIMENSION_RE = re.compile(r"<dimension ref=\"([A-Z]+)(\d+)(?::([A-Z]+)(\d+))?\"\s*/>")
+# Control characters that cannot be stored in an Excel file
+_ILLEGAL_CHARACTERS_RE = re.compile(r"[\000-\010]|[\013-\014]|[\016-\037]")
+
+
+class TemplateWorkbook:
+    """
+    Raw `.xlsx` parts of a template workbook, loaded once and reused for every
+    workbook written from it.
+    """
+
+    def __init__(self, path: Path):
+        """
+        Parameters
+        ----------
+        path : Path
+            Path to the template `.xlsx` file.
+        """
+        self.path = Path(path)
+        with zipfile.ZipFile(self.path) as zf:
+            self._parts = [(info, zf.read(info.filename)) for info in zf.infolist()]
+        self._sheet_parts = self._find_sheet_parts()
+
+    def _find_sheet_parts(self) -> Dict[str, str]:
+        """
+        Map sheet names to the zip entry holding the worksheet XML.
+        """
+        parts = dict((info.filename, data) for info, data in self._parts)
+        workbook = ElementTree.fromstring(parts["xl/workbook.xml"])
+        rels = ElementTree.fromstring(parts["xl/_rels/workbook.xml.rels"])
+        targets = {rel.get("Id"): rel.get("Target") for rel in rels.iter(f"{{{_NS_PKG_REL}}}Relationship")}
+
+        sheet_parts = {}
+        for sheet in workbook.iter(f"{{{_NS_MAIN}}}sheet"):
+            target = targets[sheet.get(f"{{{_NS_REL}}}id")]
+            if target.startswith("/"):
+                sheet_parts[sheet.get("name")] = target.lstrip("/")
+            else:
+                sheet_parts[sheet.get("name")] = posixpath.normpath(posixpath.join("xl", target))
+        return sheet_parts
+
+    def save(self, outpath: str, sheets: Mapping[str, Tuple[List[tuple], Mapping[str, str], int]]):
+        """
+        Write a copy of the template with new rows in the given sheets.
+
+        Parameters
+        ----------
+        outpath : str
+            Path to save the workbook.
+        sheets : Mapping[str, Tuple[List[tuple], Mapping[str, str], int]]
+            Sheet name mapped to `(rows, columns, start_row)`. `rows` are tuples of
+            cell values in the same order as `columns`, which maps column names to
+            Excel column letters. Template rows from `start_row` onwards are replaced.
+        """
+        patched = {}
+        for sheet_name, (rows, columns, start_row) in sheets.items():
+            part_name = self._sheet_parts[sheet_name]
+            patched[part_name] = (rows, columns, start_row)
+
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+            for info, data in self._parts:
+                if info.filename in patched:
+                    data = _patch_sheet(data, *patched[info.filename])
+                zf.writestr(info, data)
+
+        # The whole workbook is written to disk at once
+        Path(outpath).write_bytes(buffer.getvalue())
+
+
+def _patch_sheet(xml: bytes, rows: List[tuple], columns: Mapping[str, str], start_row: int) -> bytes:
+    """
+    Replace the rows of a worksheet from `start_row` onwards.
+    """
+    text = xml.decode("utf-8")
+    match = _SHEET_DATA_RE.search(text)
+    if match is None:
+        raise ValueError("Template worksheet has no sheetData element")
+
+    kept_rows = [
+        row_match.group(0)
+        for row_match in _ROW_RE.finditer(match.group(1) or "")
+        if int(row_match.group(1)) < start_row
+    ]
+    last_row = max([int(_ROW_RE.match(row).group(1)) for row in kept_rows], default=1)
+
+    # Resolve the cell columns once and keep them in the left to right order
+    # required by Excel
+    col_indices = [column_index_from_string(letter) for letter in columns.values()]
+    order = sorted(range(len(col_indices)), key=col_indices.__getitem__)
+    letters = [get_column_letter(col_indices[i]) for i in order]
+    last_col = max(col_indices, default=1)
+
+    new_rows = []
+    for excel_row, row in enumerate(rows, start=start_row):
+        cells = "".join(
+            _cell_xml(f"{letter}{excel_row}", row[i])
+            for letter, i in zip(letters, order)
+            if row[i] is not None
+        )
+        if cells:
+            new_rows.append(f'<row r="{excel_row}">{cells}</row>')
+            last_row = excel_row
+
+    sheet_data = "<sheetData>" + "".join(kept_rows) + "".join(new_rows) + "</sheetData>"
+    text = text[:match.start()] + sheet_data + text[match.end():]
+
+    dimension = _DIMENSION_RE.search(text)
+    if dimension is not None:
+        end_col = dimension.group(3) or dimension.group(1)
+        end_col = get_column_letter(max(column_index_from_string(end_col), last_col))
+        ref = f'<dimension ref="{dimension.group(1)}{dimension.group(2)}:{end_col}{last_row}"/>'
+        text = text[:dimension.start()] + ref + text[dimension.end():]
+    return text.encode("utf-8")
+
+
+def _cell_xml(ref: str, value) -> str:
+    """
+    Convert a single value to a worksheet cell element.
+    """
+    if isinstance(value, bool):
+        return f'<c r="{ref}" t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, Number):
+        if isinstance(value, float) and not math.isfinite(value):
+            return ""
+        return f'<c r="{ref}"><v>{value}</v></c>'
+
+    value = _ILLEGAL_CHARACTERS_RE.sub("", str(value))
+    if value != value.strip() or "\n" in value:
+        return f'<c r="{ref}" t="inlineStr"><is><t xml:space="preserve">{escape(value)}</t></is></c>'
+    return f'<c r="{ref}" t="inlineStr"><is><t>{escape(value)}</t></is></c>'
@@ -0,0 +1,220 @@
+"""
+YAML Loading Module
+
+This module loads the YAML files of the package with the LibYAML based
+`yaml.CSafeLoader` when PyYAML is built with LibYAML, falling back to the
+pure Python `yaml.SafeLoader`. Both accept the same documents and build the
+same data.
+
+`load_form` can pass large sections of a form, such as `choices`, to a function
+one item at a time as they are parsed, instead of building the whole list first.
+
+```python
+from survey123py.yaml_loader import load_form
+
+def count(choices):
+    return sum(1 for _ in choices)
+
+form = load_form("survey.yaml", {"choices": count})
+form["choices"]  # Number of choices
+```
+"""
+
+from typing import Any, Callable, Dict, Iterator, Mapping, Optional
+
+import yaml
+from yaml.composer import Composer, ComposerError
+from yaml.constructor import ConstructorError
+from yaml.events import (
+    MappingEndEvent,
+    MappingStartEvent,
+    ScalarEvent,
+    SequenceEndEvent,
+    SequenceStartEvent,
+    StreamEndEvent,
+)
+from yaml.nodes import ScalarNode
+
+# True if YAML is parsed by LibYAML
+LIBYAML = hasattr(yaml, "CSafeLoader")
+
+_STR_TAG = "tag:yaml.org,2002:str"
+_MERGE_TAG = "tag:yaml.org,2002:merge"
+
+
+class SafeLoader(yaml.CSafeLoader if LIBYAML else yaml.SafeLoader):
+    """
+    Safe YAML loader using LibYAML when available.
+    """
+    # The LibYAML parser only composes whole documents, so nodes with anchors or
+    # tags within a streamed document are composed by the Python composer
+    compose_node = Composer.compose_node
+    compose_scalar_node = Composer.compose_scalar_node
+    compose_sequence_node = Composer.compose_sequence_node
+    compose_mapping_node = Composer.compose_mapping_node
+
+
+def load(stream) -> Any:
+    """
+    Load a YAML document.
+
+    Parameters
+    ----------
+    stream : str or file
+        YAML text or open file.
+
+    Returns
+    -------
+    Any
+        The data of the document.
+    """
+    return yaml.load(stream, Loader=SafeLoader)
+
+
+def load_form(path: str, consumers: Optional[Mapping[str, Callable[[Iterator], Any]]] = None) -> Any:
+    """
+    Load a YAML form, passing some of its sections to functions as they are parsed.
+
+    Parameters
+    ----------
+    path : str
+        Path to the YAML file.
+    consumers : Mapping[str, Callable[[Iterator], Any]], optional
+        Functions by section name, e.g. `{"choices": build_choices}`. If the section
+        is a list, the function is called with an iterator over its items, which are
+        parsed as the function reads them. Otherwise it is called with the value
+        of the section.
+
+    Returns
+    -------
+    Any
+        The data of the document, where the sections in `consumers` are replaced
+        by what their function returned.
+    """
+    with open(path, "r") as file:
+        loader = SafeLoader(file)
+        try:
+            loader.anchors = {}
+            loader.get_event()  # StreamStartEvent
+            data = None
+            if not loader.check_event(StreamEndEvent):
+                loader.get_event()  # DocumentStartEvent
+                data = _value(loader, consumers or {})
+                loader.get_event()  # DocumentEndEvent
+                if not loader.check_event(StreamEndEvent):
+                    event = loader.get_event()
+                    raise ComposerError(
+                        "expected a single document in the stream", None, "but found another document", event.start_mark
+                    )
+            return data
+        finally:
+            loader.dispose()
+
+
+def _composed(loader: SafeLoader) -> Any:
+    # Compose the next node and build its data with the constructors of the loader
+    return loader.construct_document(loader.compose_node(None, None))
+
+
+def _value(loader: SafeLoader, consumers: Mapping[str, Callable] = None) -> Any:
+    """
+    Build the data of the next node from the parser events. Scalars, lists and
+    mappings without anchors or tags are built directly, which is faster than composing
+    their nodes first. Other nodes are composed and built by the loader.
+    """
+    event = loader.peek_event()
+    if event.anchor is not None:
+        return _composed(loader)
+    if isinstance(event, ScalarEvent):
+        return _scalar(loader, loader.get_event())[1]
+    if event.tag is not None:
+        return _composed(loader)
+    if isinstance(event, SequenceStartEvent):
+        loader.get_event()
+        items = []
+        while not loader.check_event(SequenceEndEvent):
+            items.append(_value(loader))
+        loader.get_event()
+        return items
+    if isinstance(event, MappingStartEvent):
+        return _mapping(loader, consumers)
+    # Aliases
+    return _composed(loader)
+
+
+def _scalar(loader: SafeLoader, event: ScalarEvent) -> tuple:
+    # Tag and value of a scalar without an anchor
+    tag = event.tag
+    if tag is None or tag == "!":
+        tag = loader.resolve(ScalarNode, event.value, event.implicit)
+    if tag == _STR_TAG or tag == _MERGE_TAG:
+        return tag, event.value
+    node = ScalarNode(tag, event.value, event.start_mark, event.end_mark, style=event.style)
+    return tag, loader.construct_document(node)
+
+
+def _mapping(loader: SafeLoader, consumers: Mapping[str, Callable] = None) -> Dict[Any, Any]:
+    start = loader.get_event()
+    data = {}
+    merges = []
+    while not loader.check_event(MappingEndEvent):
+        event = loader.peek_event()
+        if isinstance(event, ScalarEvent) and event.anchor is None:
+            tag, key = _scalar(loader, loader.get_event())
+        else:
+            tag, key = None, _value(loader)
+        if tag == _MERGE_TAG:
+            merges.extend(_merged(loader, start))
+            continue
+        try:
+            hash(key)
+        except TypeError:
+            raise ConstructorError(
+                "while constructing a mapping", start.start_mark, "found unhashable key", event.start_mark
+            )
+        consumer = consumers.get(key) if consumers else None
+        if consumer is None:
+            data[key] = _value(loader)
+        elif loader.check_event(SequenceStartEvent) and loader.peek_event().anchor is None:
+            data[key] = _consume(loader, consumer)
+        else:
+            data[key] = consumer(_value(loader))
+    loader.get_event()
+    if merges:
+        # As in PyYAML, the keys of the mapping take precedence over merged keys,
+        # and earlier merged mappings over later ones
+        merged = {}
+        for mapping in merges:
+            merged.update(mapping)
+        merged.update(data)
+        data = merged
+    return data
+
+
+def _merged(loader: SafeLoader, start: MappingStartEvent) -> list:
+    # Mappings of a merge key `<<`, in increasing order of precedence
+    event = loader.peek_event()
+    value = _value(loader)
+    mappings = value if isinstance(value, list) else [value]
+    if not all(isinstance(mapping, dict) for mapping in mappings):
+        raise ConstructorError(
+            "while constructing a mapping", start.start_mark,
+            "expected a mapping or list of mappings for merging", event.start_mark,
+        )
+    return mappings[::-1]
+
+
+def _consume(loader: SafeLoader, consumer: Callable[[Iterator], Any]) -> Any:
+    loader.get_event()  # SequenceStartEvent
+    items = _items(loader)
+    result = consumer(items)
+    # Skip the items the consumer did not read
+    for _ in items:
+        pass
+    loader.get_event()  # SequenceEndEvent
+    return result
+
+
+def _items(loader: SafeLoader) -> Iterator:
+    while not loader.check_event(SequenceEndEvent):
+        yield _value(loader)
@@ -0,0 +1,111 @@
+import unittest
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import openpyxl
+import yaml
+
+from survey123py.batch import find_batch_jobs, read_batch_manifest, generate_batch
+from survey123py.form import FormData, Sheets
+
+
+class TestBatchGeneration(unittest.TestCase):
+
+    def setUp(self):
+        self.data_dir = Path(__file__).parent / "data"
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.input_dir = Path(self.tmp_dir.name) / "forms"
+        self.output_dir = Path(self.tmp_dir.name) / "build"
+        self.input_dir.mkdir()
+        for name in ("sample_survey_full.yaml", "sample_survey_no_choices.yaml"):
+            shutil.copy(self.data_dir / name, self.input_dir / name)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_find_batch_jobs(self):
+        jobs = find_batch_jobs(str(self.input_dir / "*.yaml"), str(self.output_dir))
+        self.assertEqual(len(jobs), 2)
+        self.assertEqual(Path(jobs[0][1]), self.output_dir / "sample_survey_full.xlsx")
+
+    def test_find_batch_jobs_subdirectories(self):
+        for folder in ("a", "b"):
+            (self.input_dir / folder).mkdir()
+            shutil.copy(self.data_dir / "sample_survey_full.yaml", self.input_dir / folder / "survey.yaml")
+
+        jobs = find_batch_jobs(str(self.input_dir / "**" / "survey.yaml"), str(self.output_dir))
+        self.assertEqual([Path(output) for _, output in jobs], [
+            self.output_dir / "a" / "survey.xlsx",
+            self.output_dir / "b" / "survey.xlsx",
+        ], "Same-named files in different folders must not share an output")
+
+        results = generate_batch(jobs, workers=2, validate="off")
+        for result in results:
+            self.assertTrue(result.success, result.error)
+            self.assertTrue(os.path.exists(result.output))
+
+    def test_duplicate_outputs(self):
+        jobs = [
+            (str(self.input_dir / "sample_survey_full.yaml"), str(self.output_dir / "survey.xlsx")),
+            (str(self.input_dir / "sample_survey_no_choices.yaml"), str(self.output_dir / "survey.xlsx")),
+        ]
+        with self.assertRaises(ValueError):
+            generate_batch(jobs, workers=1)
+        self.assertFalse(self.output_dir.exists(), "No form must be generated")
+
+    def test_generate_batch_in_process(self):
+        jobs = find_batch_jobs(str(self.input_dir / "*.yaml"), str(self.output_dir))
+        results = generate_batch(jobs, workers=1)
+
+        self.assertEqual([result.input for result in results], [job[0] for job in jobs], "Results must be in the order of the jobs")
+        for result in results:
+            self.assertTrue(result.success, result.error)
+            self.assertTrue(os.path.exists(result.output))
+        ws = openpyxl.load_workbook(results[0].output)[Sheets.survey]
+        self.assertEqual(ws["A3"].value, "begin group")
+
+    def test_generate_batch_workers(self):
+        jobs = find_batch_jobs(str(self.input_dir / "*.yaml"), str(self.output_dir))
+        results = FormData.generate_batch(jobs, workers=2)
+
+        self.assertEqual([result.input for result in results], [job[0] for job in jobs])
+        for result in results:
+            self.assertTrue(result.success, result.error)
+            self.assertTrue(result.is_valid, result.validation_error)
+            self.assertTrue(os.path.exists(result.output))
+
+    def test_failing_form_does_not_stop_batch(self):
+        jobs = [
+            (str(self.input_dir / "missing.yaml"), str(self.output_dir / "missing.xlsx")),
+            (str(self.input_dir / "sample_survey_full.yaml"), str(self.output_dir / "full.xlsx")),
+        ]
+        results = generate_batch(jobs, workers=1, validate="off")
+
+        self.assertFalse(results[0].success)
+        self.assertIn("FileNotFoundError", results[0].error)
+        self.assertTrue(results[1].success, results[1].error)
+        self.assertIsNone(results[1].is_valid, "Validation must be skipped")
+        self.assertTrue(os.path.exists(self.output_dir / "full.xlsx"))
+
+    def test_read_batch_manifest(self):
+        manifest = Path(self.tmp_dir.name) / "manifest.yaml"
+        with open(manifest, "w") as file:
+            yaml.safe_dump([{"input": "forms/sample_survey_full.yaml", "output": "build/full.xlsx"}], file)
+
+        jobs = read_batch_manifest(str(manifest))
+        self.assertEqual(jobs, [(str(self.input_dir / "sample_survey_full.yaml"), str(self.output_dir / "full.xlsx"))])
+
+        with open(manifest, "w") as file:
+            yaml.safe_dump([{"input": "forms/sample_survey_full.yaml"}], file)
+        with self.assertRaises(ValueError):
+            read_batch_manifest(str(manifest))
+
+    def test_invalid_validation_mode(self):
+        with self.assertRaises(ValueError):
+            generate_batch([], validate="later")
+
+
+if __name__ == "__main__":
+    unittest.main()
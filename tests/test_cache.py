@@ -0,0 +1,133 @@
+import unittest
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import yaml
+
+from survey123py.cache import BuildCache, generate_cached
+from survey123py.form import FormData
+from survey123py.templates import TEMPLATE_PATHS
+
+
+class TestBuildCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.test_file = Path(self.tmp_dir.name) / "survey.yaml"
+        shutil.copy(Path(__file__).parent / "data" / "sample_survey_full.yaml", self.test_file)
+        self.cache = BuildCache(os.path.join(self.tmp_dir.name, "cache"))
+        self.outpath = os.path.join(self.tmp_dir.name, "output.xlsx")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_key(self):
+        key = self.cache.key(self.test_file, "3.22")
+        self.assertEqual(key, self.cache.key(self.test_file, "3.22"))
+        self.assertNotEqual(key, self.cache.key(self.test_file, "3.23"), "Template version must be part of the key")
+        with open(self.test_file, "a") as file:
+            file.write("\n# changed\n")
+        self.assertNotEqual(key, self.cache.key(self.test_file, "3.22"), "YAML content must be part of the key")
+
+    def test_key_dependencies(self):
+        key = self.cache.key(self.test_file, "3.22")
+        with patch("pyxform.__version__", "0.0.0"):
+            self.assertNotEqual(key, self.cache.key(self.test_file, "3.22"), "pyxform version must be part of the key")
+
+        template_dir = Path(self.tmp_dir.name) / "template"
+        shutil.copytree(Path(TEMPLATE_PATHS["3.22"]["survey"]).parent, template_dir)
+        paths = {name: template_dir / path.name for name, path in TEMPLATE_PATHS["3.22"].items()}
+        with patch.dict(TEMPLATE_PATHS, {"3.22": paths}):
+            self.assertEqual(key, self.cache.key(self.test_file, "3.22"))
+            with open(paths["columns"], "a") as file:
+                file.write("\n")
+            self.assertNotEqual(key, self.cache.key(self.test_file, "3.22"), "Template files must be part of the key")
+
+    def test_unchanged_form_is_not_rebuilt(self):
+        cached, result = generate_cached(self.test_file, self.outpath, cache=self.cache)
+        self.assertFalse(cached)
+        self.assertEqual(result, (True, None))
+        with open(self.outpath, "rb") as file:
+            expected = file.read()
+        os.remove(self.outpath)
+
+        with patch.object(FormData, "load_yaml", side_effect=AssertionError("Form must not be rebuilt")):
+            cached, result = generate_cached(self.test_file, self.outpath, cache=self.cache)
+        self.assertTrue(cached)
+        self.assertEqual(result, (True, None))
+        with open(self.outpath, "rb") as file:
+            self.assertEqual(file.read(), expected)
+
+        # Changed forms are rebuilt
+        with open(self.test_file, "a") as file:
+            file.write("\n# changed\n")
+        cached, _ = generate_cached(self.test_file, self.outpath, cache=self.cache)
+        self.assertFalse(cached)
+
+    def test_unvalidated_entry_is_rebuilt_for_validation(self):
+        generate_cached(self.test_file, self.outpath, validate="off", cache=self.cache)
+        cached, _ = generate_cached(self.test_file, self.outpath, validate="off", cache=self.cache)
+        self.assertTrue(cached)
+        cached, result = generate_cached(self.test_file, self.outpath, validate="sync", cache=self.cache)
+        self.assertFalse(cached)
+        self.assertEqual(result, (True, None))
+
+    def test_hard_link_is_not_written_through(self):
+        cache = BuildCache(self.cache.cache_dir, link=True)
+        generate_cached(self.test_file, self.outpath, cache=cache)
+        generate_cached(self.test_file, self.outpath, cache=cache)
+        key = cache.key(self.test_file, "3.22")
+        with open(cache.cache_dir / f"{key}.xlsx", "rb") as file:
+            expected = file.read()
+
+        with open(self.test_file, "a") as file:
+            file.write("\n# changed\n")
+        generate_cached(self.test_file, self.outpath, cache=cache)
+        with open(cache.cache_dir / f"{key}.xlsx", "rb") as file:
+            self.assertEqual(file.read(), expected, "Rebuilding must not modify an older cache entry")
+
+    def test_failed_build_keeps_output(self):
+        generate_cached(self.test_file, self.outpath, cache=self.cache)
+        with open(self.outpath, "rb") as file:
+            expected = file.read()
+
+        with open(self.test_file, "a") as file:
+            file.write("\nsurvey: [\n")
+        with self.assertRaises(yaml.YAMLError):
+            generate_cached(self.test_file, self.outpath, cache=self.cache)
+        with open(self.outpath, "rb") as file:
+            self.assertEqual(file.read(), expected, "A failed build must not remove the last output")
+        self.assertEqual(sorted(os.listdir(self.tmp_dir.name)), ["cache", "output.xlsx", "survey.yaml"])
+
+    def test_prune(self):
+        generate_cached(self.test_file, self.outpath, cache=self.cache)
+        key = self.cache.key(self.test_file, "3.22")
+        xlsx_path = self.cache.cache_dir / f"{key}.xlsx"
+
+        # Entries that are too old are evicted
+        old = time.time() - self.cache.max_age - 60
+        os.utime(xlsx_path, (old, old))
+        self.cache.prune()
+        self.assertFalse(xlsx_path.exists())
+        self.assertFalse(xlsx_path.with_suffix(".json").exists())
+
+        # Least recently used entries are evicted when the cache is too large
+        generate_cached(self.test_file, self.outpath, cache=self.cache)
+        os.utime(xlsx_path, (old + 120, old + 120))
+        with open(self.test_file, "a") as file:
+            file.write("\n# changed\n")
+        generate_cached(self.test_file, self.outpath, cache=self.cache)
+        newest = self.cache.cache_dir / f"{self.cache.key(self.test_file, '3.22')}.xlsx"
+        self.cache.max_age = float("inf")
+        self.cache.max_size = newest.stat().st_size
+        self.cache.prune()
+        self.assertFalse(xlsx_path.exists())
+        self.assertTrue(newest.exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
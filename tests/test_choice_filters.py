@@ -0,0 +1,80 @@
+import os
+import tempfile
+import unittest
+
+import yaml
+
+from survey123py.choice_filters import COLUMN_PREFIX, compile_choice_filter
+from survey123py.choices import ChoiceIndex
+from survey123py.preview import FormPreviewer
+
+CHOICES = [
+    {"list_name": "counties", "name": "north", "label": "North"},
+    {"list_name": "counties", "name": "south", "label": "South"},
+    {"list_name": "cities", "name": "a", "label": "A", "county": "north", "code": 1},
+    {"list_name": "cities", "name": "b", "label": "B", "county": "south", "code": "01"},
+    {"list_name": "cities", "name": "c", "label": "C", "county": "north", "code": None},
+    {"list_name": "cities", "name": "d", "label": "D", "code": 2},
+]
+
+
+class TestChoiceFilters(unittest.TestCase):
+
+    def assertMatchesScan(self, source, values):
+        choice_filter = compile_choice_filter(source)
+        index = ChoiceIndex(CHOICES)
+        filtered = choice_filter.filter(index, "cities", values)
+        choice_filter.equalities = ()
+        self.assertEqual(filtered, choice_filter.filter(index, "cities", values), msg=source)
+        return [choice["name"] for choice in filtered]
+
+    def test_compile(self):
+        choice_filter = compile_choice_filter("county=${county} and starts-with(name, 'a') and code != 3")
+        self.assertEqual(choice_filter.columns, ("county", "name", "code"))
+        self.assertEqual(choice_filter.variables, ("county",))
+        self.assertEqual([column for column, _ in choice_filter.equalities], ["county"])
+        self.assertEqual(compile_choice_filter("${county} = county").equalities[0][0], "county")
+        self.assertEqual(compile_choice_filter("county = name or code = 1").equalities, ())
+        self.assertIn(f"${{{COLUMN_PREFIX}county}}", compile_choice_filter("county=${county}").expression.source)
+
+    def test_indexed_filter_matches_scan(self):
+        self.assertEqual(self.assertMatchesScan("county=${county}", {"county": "north"}), ["a", "c"])
+        self.assertEqual(self.assertMatchesScan("county=${county}", {"county": ""}), ["d"])
+        self.assertEqual(self.assertMatchesScan("code=${code}", {"code": 1}), ["a", "b"])
+        self.assertEqual(self.assertMatchesScan("code=${code}", {"code": "1"}), ["a"])
+        self.assertEqual(self.assertMatchesScan("code=${code} and county=${county}", {"code": 1, "county": "south"}), ["b"])
+        self.assertEqual(self.assertMatchesScan("county=${county} or code=2", {"county": "south"}), ["b", "d"])
+
+    def test_preview(self):
+        survey = [
+            {"type": "select_one counties", "name": "county", "label": "County", "survey123py::preview_input": "'north'"},
+            {"type": "select_one cities", "name": "city", "label": "City", "choice_filter": "county=${county}"},
+            {"type": "select_one cities", "name": "coded", "label": "Coded", "choice_filter": "code > 1"},
+            {"type": "select_one cities", "name": "broken", "label": "Broken", "choice_filter": "county=${missing}"},
+            {"type": "text", "name": "notes", "label": "Notes"},
+        ]
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "form.yaml")
+            with open(path, "w") as file:
+                yaml.dump({"settings": {"form_title": "Test Form"}, "survey": survey, "choices": CHOICES}, file)
+            preview = FormPreviewer(path)
+
+        self.assertEqual([choice["name"] for choice in preview.filter_choices("city")], ["a", "c"])
+        preview.set_input("county", "south")
+        self.assertEqual([choice["name"] for choice in preview.filter_choices("city")], ["b"])
+        with self.assertRaises(ValueError):
+            preview.filter_choices("notes")
+
+        report = preview.choice_filter_report().set_index("name")
+        self.assertEqual(list(report.index), ["city", "coded", "broken"])
+        self.assertEqual(report.loc["city", "choices"], 4)
+        self.assertEqual(report.loc["city", "filtered"], 1)
+        self.assertTrue(report.loc["city", "indexed"])
+        self.assertFalse(report.loc["coded", "indexed"])
+        self.assertEqual(report.loc["coded", "filtered"], 1)
+        self.assertIn("missing", report.loc["broken", "error"])
+        self.assertTrue((report["seconds"] >= 0).all())
+
+
+if __name__ == "__main__":
+    unittest.main()
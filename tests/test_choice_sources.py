@@ -0,0 +1,80 @@
+import importlib.util
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import pandas as pd
+
+from survey123py import choice_sources
+from survey123py.cache import BuildCache
+from survey123py.form import FormData, Sheets
+from survey123py.preview import FormPreviewer
+
+FORM = """
+settings: {form_title: Test Form}
+survey:
+  - {type: select_one assets, name: asset, label: Asset, survey123py::preview_input: "00123"}
+  - {type: calculate, name: asset_label, calculation: "jr:choice-name(${asset}, '${asset}')"}
+choices:
+  - {list_name: yes_no, name: yes, label: Yes}
+  - source: assets.csv
+    list_name: assets
+  - {list_name: yes_no, name: no, label: No}
+"""
+
+
+class TestChoiceSources(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.yaml_path = os.path.join(self.tmp_dir.name, "form.yaml")
+        with open(self.yaml_path, "w") as file:
+            file.write(FORM)
+        self.write_assets(["00123", "a2", "a3"])
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def write_assets(self, names):
+        frame = pd.DataFrame({"name": names, "label": [f"Asset {name}" for name in names], "county": "north"})
+        frame.loc[1, "label"] = None
+        frame.to_csv(os.path.join(self.tmp_dir.name, "assets.csv"), index=False)
+
+    def test_load_yaml(self):
+        survey = FormData("3.22")
+        with patch.object(choice_sources, "CHUNK_ROWS", 2):
+            survey.load_yaml(self.yaml_path)
+        choices = survey.sheets[Sheets.choices]
+        self.assertEqual(choices["list_name"].tolist(), ["yes_no", "assets", "assets", "assets", "yes_no"])
+        self.assertEqual(choices["name"].tolist(), ["yes", "00123", "a2", "a3", "no"], "CSV values must be read as text")
+        self.assertTrue(pd.isna(choices.loc[2, "label"]))
+        self.assertEqual(list(choices.columns)[-1], "county")
+        self.assertEqual(choices["name"].dtype, object)
+        self.assertEqual(list(choices.index), list(range(5)))
+
+    @unittest.skipUnless(importlib.util.find_spec("pyarrow"), "pyarrow is not installed")
+    def test_parquet_source(self):
+        path = os.path.join(self.tmp_dir.name, "scores.parquet")
+        pd.DataFrame({"list_name": "scores", "name": [1, 2], "label": ["One", "Two"]}).to_parquet(path)
+        chunks = list(choice_sources.read_source({"source": "scores.parquet"}, self.tmp_dir.name, chunk_rows=1))
+        self.assertEqual([chunk["name"].tolist() for chunk in chunks], [[1], [2]])
+
+    def test_unsupported_source(self):
+        with self.assertRaisesRegex(ValueError, "Supported formats"):
+            next(choice_sources.read_source({"source": "assets.xlsx"}))
+
+    def test_preview_choices(self):
+        previewer = FormPreviewer(self.yaml_path)
+        self.assertEqual(previewer.choices.label("asset", "00123"), "Asset 00123")
+        self.assertNotIn("label", previewer.choices.rows["assets"][1], "Empty cells must be left out")
+
+    def test_cache_key(self):
+        key = BuildCache.key(self.yaml_path, "3.22")
+        self.assertEqual(BuildCache.key(self.yaml_path, "3.22"), key)
+        self.write_assets(["00123", "a2", "a4"])
+        self.assertNotEqual(BuildCache.key(self.yaml_path, "3.22"), key, "Changes to sources must change the key")
+
+
+if __name__ == "__main__":
+    unittest.main()
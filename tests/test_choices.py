@@ -0,0 +1,33 @@
+import unittest
+
+from survey123py.choices import ChoiceIndex
+
+
+class TestChoiceIndex(unittest.TestCase):
+
+    def test_labels(self):
+        index = ChoiceIndex(
+            choices=[
+                {"list_name": "priority", "name": "high", "label": "High"},
+                {"list_name": "priority", "name": "high", "label": "Duplicate"},
+                {"list_name": "rating", "name": 1, "label::English (en)": "One"},
+            ],
+            questions=[
+                {"type": "select_one priority", "name": "urgency"},
+                {"type": "select_multiple rating", "name": "ratings"},
+                {"type": "text", "name": "notes"},
+            ],
+        )
+        self.assertEqual(len(index), 2)
+        self.assertEqual(index.lists, {"urgency": "priority", "ratings": "rating"})
+        self.assertEqual(index.label("urgency", "high"), "High")
+        self.assertEqual(index.label("${urgency}", "high"), "High")
+        self.assertEqual(index.label("ratings", 1.0), "One")
+        self.assertEqual(index.label("ratings", "1"), "One")
+        self.assertIsNone(index.label("urgency", "low"))
+        self.assertIsNone(index.label("notes", "high"))
+        self.assertIsNone(index.list_name("missing"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -5,9 +5,9 @@ Unit tests for Excel to YAML conversion functionality.
 import unittest
 import tempfile
 import os
-import yaml
 from pathlib import Path
 
+from survey123py import yaml_loader
 from survey123py.converter import ExcelToYamlConverter
 from survey123py.form import FormData
 
@@ -80,7 +80,7 @@ class TestExcelToYamlConverter(unittest.TestCase):
         
         # Load the YAML file and verify structure
         with open(self.temp_yaml_path, 'r') as f:
-            loaded_yaml = yaml.safe_load(f)
+            loaded_yaml = yaml_loader.load(f)
         
         # Check top-level structure
         expected_keys = ['settings', 'choices', 'survey']
@@ -0,0 +1,65 @@
+import unittest
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from survey123py import formulas
+from survey123py.expressions import compile_expression
+from survey123py.formulas import dates, vectorized
+from survey123py.vectorized import evaluate_vectorized
+
+
+class TestDates(unittest.TestCase):
+
+    def tearDown(self):
+        dates.set_clock()
+
+    def test_date_format(self):
+        date_format = dates.get_format("%Y-%m-%d %H:%M")
+        self.assertIs(dates.get_format("%Y-%m-%d %H:%M"), date_format, "Formats must be compiled once")
+        self.assertEqual(date_format.tokens[:2], (("directive", "Y"), ("literal", "-")))
+        self.assertEqual(date_format.parse("2024-6-14 10:30"), datetime(2024, 6, 14, 10, 30))
+        self.assertIsNone(date_format.parse("2024-02-30 10:30"), "Invalid dates must not be parsed")
+        self.assertIsNone(date_format.parse("2024-06-14"))
+        self.assertIsNone(date_format.parse(None))
+        # Formats with other directives are parsed with strptime
+        self.assertEqual(dates.get_format("%d %b %Y").parse("14 Jun 2024"), datetime(2024, 6, 14))
+
+    def test_clock(self):
+        moment = datetime(2024, 6, 14, 10, 30, tzinfo=timezone.utc)
+        with dates.use_clock(moment):
+            self.assertEqual(formulas.now(), 1718361000000)
+            self.assertEqual(formulas.today(), 1718323200000)
+        self.assertGreater(formulas.now(), 1718361000000, "The system clock must be restored")
+
+        dates.set_clock(lambda: datetime(2020, 1, 1, tzinfo=timezone.utc))
+        self.assertEqual(formulas.now(), 1577836800000)
+
+    def test_vectorized_dates_match_scalar(self):
+        values = pd.Series(["2024-06-14", "2024-6-1", "2000-02-29", "0999-01-01"])
+        self.assertEqual(vectorized.date(values).tolist(), [formulas.date(value) for value in values])
+        date_times = pd.Series(["2024-06-14T10:30:00", "'2024-06-14 23:59:59'", "2024-06-14"])
+        self.assertEqual(vectorized.date_time(date_times).tolist(), [formulas.date_time(value) for value in date_times])
+
+        timestamps = pd.Series([1718361000000, 946684800000])
+        self.assertEqual(vectorized.decimal_date_time(timestamps).tolist(),
+                         [formulas.decimal_date_time(value) for value in timestamps])
+        for format in ("%Y-%m-%d", "%d/%m/%y %H:%M:%S", "%B %d, %Y"):
+            self.assertEqual(vectorized.format_date(timestamps, format).tolist(),
+                             [formulas.format_date(value, format) for value in timestamps])
+
+    def test_vectorized_invalid_dates(self):
+        result = vectorized.date(pd.Series(["", None, "2024-13-01", "14/06/2024"]))
+        self.assertTrue(result.isna().all())
+        self.assertIsNone(vectorized.format_date(pd.Series([np.nan]), "%Y").iloc[0])
+
+    def test_batch_clock(self):
+        expression = compile_expression("(today() - date(${start})) div 86400000")
+        with dates.use_clock(datetime(2024, 6, 14, 12, 0, tzinfo=timezone.utc)):
+            result = evaluate_vectorized(expression, {"start": pd.Series(["2024-06-01", "2024-06-13"])})
+        self.assertEqual(result.tolist(), [13, 1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,38 @@
+import unittest
+
+from survey123py.dependencies import DependencyGraph
+
+
+class TestDependencyGraph(unittest.TestCase):
+
+    def setUp(self):
+        self.graph = DependencyGraph()
+        self.graph.add("c", ["b"])
+        self.graph.add("a")
+        self.graph.add("b", ["a", "unknown"])
+        self.graph.add("d")
+
+    def test_order(self):
+        self.assertEqual(self.graph.order(), ["a", "b", "c", "d"])
+        self.assertEqual(self.graph.order(["c", "b"]), ["b", "c"])
+
+    def test_downstream(self):
+        self.assertEqual(self.graph.downstream(["a"]), ["a", "b", "c"])
+        self.assertEqual(self.graph.downstream(["unknown"]), ["b", "c"])
+        self.assertEqual(self.graph.downstream(["d"]), ["d"])
+
+    def test_cycle(self):
+        self.graph.add("e", ["g"])
+        self.graph.add("f", ["e"])
+        self.graph.add("g", ["f", "a"])
+        with self.assertRaises(ValueError) as context:
+            self.graph.order()
+        self.assertIn("e -> g -> f -> e", str(context.exception))
+
+    def test_duplicate_node(self):
+        with self.assertRaises(ValueError):
+            self.graph.add("a")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,131 @@
+import unittest
+import os
+import tempfile
+from unittest.mock import patch
+
+import yaml
+
+from survey123py.expressions import (
+    compile_expression,
+    function_name,
+    configure_expression_cache,
+    clear_expression_cache,
+    expression_cache_info,
+    _cache_size_from_env,
+)
+from survey123py.preview import FormPreviewer
+
+
+class TestExpressions(unittest.TestCase):
+
+    def evaluate(self, source, values=None, **kwargs):
+        return compile_expression(source).evaluate(values, **kwargs)
+
+    def test_operators(self):
+        self.assertEqual(self.evaluate("1 + 2 * 3"), 7)
+        self.assertEqual(self.evaluate("(1 + 2) * 3"), 9)
+        self.assertEqual(self.evaluate("7 div 2"), 3.5)
+        self.assertEqual(self.evaluate("7 mod 3"), 1)
+        self.assertEqual(self.evaluate("(9 - 1) div (2 * 2)"), 2)
+        self.assertTrue(self.evaluate("1 = 1 and (2 > 1)"))
+        self.assertEqual(self.evaluate("-7 mod 3"), -1, "XPath mod keeps the sign of the dividend")
+        self.assertEqual(self.evaluate("-3 - -2"), -1)
+        self.assertTrue(self.evaluate("1 < 2 and 2 <= 2 or 1 = 2"))
+        self.assertTrue(self.evaluate("${a} != 'x'", {"a": "y"}))
+        self.assertTrue(self.evaluate("${a} = 5", {"a": "5"}), "Strings must be compared to numbers as numbers")
+        self.assertTrue(self.evaluate("${a} == 5", {"a": 5}))
+
+    def test_functions(self):
+        values = {"q1": "Apple", "q2": "Red", "n": 7}
+        self.assertEqual(self.evaluate("concat(${q1}, ' and ', ${q2})", values), "Apple and Red")
+        self.assertEqual(self.evaluate("if(${n} mod 2 = 0, 'even', 'odd')", values), "odd")
+        self.assertTrue(self.evaluate("starts-with(${q1}, 'App')", values))
+        self.assertEqual(self.evaluate("string-length(${q1})", values), 5)
+        self.assertEqual(self.evaluate("int('42')"), 42)
+        self.assertFalse(self.evaluate("not(true())"))
+        self.assertEqual(self.evaluate("version()", settings={"version": "1.2.3"}), "1.2.3")
+        self.assertEqual(function_name("jr:choice-name"), "jr_choice_name")
+
+    def test_if_evaluates_selected_branch(self):
+        self.assertEqual(self.evaluate("if(${n} > 0, 10 div ${n}, sqrt(-1))", {"n": 5}), 2)
+
+    def test_current_value(self):
+        expression = compile_expression(". >= 2.5 and . <= 10.0")
+        self.assertTrue(expression.uses_current)
+        self.assertTrue(expression.evaluate(current=7.5))
+        self.assertFalse(expression.evaluate(current=12))
+
+    def test_variables(self):
+        expression = compile_expression("concat(${b}, ${a}, ${b}, '${c}')")
+        self.assertEqual(expression.variables, ("b", "a"), "Variables inside string literals are not references")
+        self.assertEqual(expression.evaluate({"a": "1", "b": "2"}), "212${c}")
+
+        with self.assertRaises(ValueError) as context:
+            expression.evaluate({"a": "1"})
+        self.assertIn("${b}", str(context.exception))
+
+    def test_invalid_expressions(self):
+        for source in ["1 +", "(1", "${a} ${b}", "foo(1)", "__import__('os')", "a.b", "1 | 2"]:
+            with self.assertRaises(ValueError, msg=source):
+                compile_expression(source)
+
+
+class TestExpressionCache(unittest.TestCase):
+
+    def setUp(self):
+        clear_expression_cache()
+
+    def tearDown(self):
+        configure_expression_cache()
+
+    def test_cache_is_shared(self):
+        expression = compile_expression("${a} +  1")
+        self.assertIs(compile_expression(" ${a} + 1 "), expression, "Whitespace must not change the cache key")
+        self.assertIsNot(compile_expression("concat('a  b')"), compile_expression("concat('a b')"))
+        info = expression_cache_info()
+        self.assertEqual((info.hits, info.misses), (1, 3))
+
+    def test_cache_size_from_env(self):
+        with patch.dict(os.environ, {"SURVEY123PY_EXPRESSION_CACHE_SIZE": "100"}):
+            self.assertEqual(_cache_size_from_env(), 100)
+        for value in ("big", "1.5", "-1"):
+            with patch.dict(os.environ, {"SURVEY123PY_EXPRESSION_CACHE_SIZE": value}):
+                with self.assertWarns(UserWarning, msg=value):
+                    self.assertEqual(_cache_size_from_env(), 4096)
+
+    def test_cache_across_previews(self):
+        form = {
+            "settings": {"form_title": "Test Form"},
+            "survey": [
+                {"type": "integer", "name": "q1", "label": "Count", "survey123py::preview_input": 4},
+                {"type": "integer", "name": "q2", "label": "Double", "calculation": "${q1} * 2", "constraint": ". > 2"},
+            ],
+        }
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "form.yaml")
+            with open(path, "w") as file:
+                yaml.dump(form, file)
+            for _ in range(3):
+                FormPreviewer(path).show_preview()
+
+        info = expression_cache_info()
+        self.assertEqual(info.misses, 2, "Each unique expression must be compiled once")
+        self.assertEqual(info.currsize, 2)
+
+    def test_lru_eviction(self):
+        configure_expression_cache(2)
+        first = compile_expression("1 + 1")
+        compile_expression("2 + 2")
+        compile_expression("1 + 1")
+        compile_expression("3 + 3")
+        self.assertIs(compile_expression("1 + 1"), first, "Recently used expressions must be kept")
+        self.assertEqual(expression_cache_info().currsize, 2)
+
+    def test_disable_cache(self):
+        configure_expression_cache(0)
+        self.assertIsNot(compile_expression("1 + 1"), compile_expression("1 + 1"))
+        self.assertEqual(expression_cache_info().currsize, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,9 @@
 import unittest
+import os
+import tempfile
 from pathlib import Path
+import openpyxl
+from unittest.mock import patch
 from survey123py.form import FormData, Sheets
 import pandas as pd
 
@@ -28,9 +32,114 @@ class TestSurvey123_322(unittest.TestCase):
         # TODO: Verify dataframe values
 
 
+    def test_load_yaml_columns(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "form.yaml")
+            with open(path, "w") as f:
+                f.write(
+                    "survey:\n"
+                    "  - {type: integer, name: count, label: Count, required: true, custom: 1}\n"
+                    "  - {type: group, name: grp, label: Group, children: [{type: text, name: note, readonly: 1}]}\n"
+                    "choices:\n"
+                    "  - {list_name: yes_no, name: yes, label: yes}\n"
+                    "  - {list_name: scores, name: 1, label: One}\n"
+                    "  - {list_name: scores, name: 0, label: null}\n"
+                )
+            self.survey.load_yaml(path)
+
+        survey = self.survey.sheets[self.sheet_names.survey]
+        template_cols = list(self.survey._template.columns[self.sheet_names.survey])
+        self.assertEqual(list(survey.columns), template_cols + ["custom"], "Extra columns must follow the template columns")
+        self.assertEqual(survey["type"].tolist(), ["integer", "begin group", "text", "end group"])
+        self.assertEqual(survey["required"].tolist()[0], "yes")
+        self.assertEqual(survey["readonly"].tolist()[2], "yes")
+        self.assertTrue(survey["required"].iloc[1:].isna().all())
+        self.assertEqual(survey["custom"].dtype, "float64")
+
+        choices = self.survey.sheets[self.sheet_names.choices]
+        self.assertEqual(choices["name"].tolist(), ["yes", 1, 0], "Only booleans must be written as yes/no")
+        self.assertEqual(choices["label"].tolist()[:2], ["yes", "One"])
+        self.assertTrue(pd.isna(choices["label"].iloc[2]))
+
+        records = self.survey.yaml_data["choices"]
+        self.assertNotIsInstance(records, pd.DataFrame, "yaml_data must hold the document, not the sheet")
+        self.assertEqual(len(records), 3)
+        self.assertEqual(records[0], {"list_name": "yes_no", "name": "yes", "label": "yes"})
+        self.assertEqual(list(records)[-1], {"list_name": "scores", "name": 0})
+        self.assertEqual(records[-2:], list(records)[1:])
+
+    def test_yaml_choices_write_back(self):
+        self.survey.load_yaml(self.test_file)
+        records = self.survey.yaml_data["choices"]
+
+        records.append({"list_name": "yes_no", "name": False, "label": "No"})
+        records[1] = {"list_name": "scores", "name": 2, "label": "Two"}
+        del records[2]
+        records.insert(0, {"list_name": "scores", "name": 3, "custom": "x"})
+
+        choices = self.survey.sheets[self.sheet_names.choices]
+        self.assertEqual(len(records), 5)
+        self.assertEqual(choices["name"].tolist(), [3, "yes", 2, "vehicle", "no"], "Added choices must be converted as when loaded")
+        self.assertEqual(choices["label"].tolist()[2], "Two")
+        self.assertEqual(choices["custom"].tolist()[0], "x")
+        self.assertEqual(records[-1], {"list_name": "yes_no", "name": "no", "label": "No"})
+
+        records[:] = []
+        self.assertEqual(len(self.survey.sheets[self.sheet_names.choices]), 0)
+        self.assertEqual(list(records), [])
+
     def test_save_survey(self):
         self.survey.load_yaml(self.test_file)
-        self.survey.save_survey("output.xlsx")
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            outpath = os.path.join(tmp_dir, "output.xlsx")
+            self.survey.save_survey(outpath)
+            self.assertTrue(os.path.exists(outpath))
+
+    def test_save_survey_cell_values(self):
+        self.survey.load_yaml(self.test_file)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            outpath = os.path.join(tmp_dir, "output.xlsx")
+            self.survey.save_survey(outpath)
+            wb = openpyxl.load_workbook(outpath)
+
+        ws = wb[self.sheet_names.survey]
+        self.assertEqual(ws["A3"].value, "begin group")
+        self.assertEqual(ws["B4"].value, "assetCode")
+        self.assertEqual(ws["G4"].value, "yes", "required should be written as yes")
+        self.assertIsNone(ws["D3"].value, "Empty values should not be written")
+
+        ws = wb[self.sheet_names.choices]
+        self.assertEqual([ws.cell(row=3, column=i).value for i in range(1, 4)], ["yes_no", "yes", "yes"])
+        self.assertEqual(ws["B6"].value, "vehicle")
+        self.assertIsNone(ws["A7"].value)
+
+        ws = wb[self.sheet_names.settings]
+        self.assertEqual(ws["A2"].value, "Asset Inspection")
+        self.assertEqual(ws["C2"].value, "Asset_Inspection")
+
+    def test_save_survey_validation_modes(self):
+        self.survey.load_yaml(self.test_file)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            outpath = os.path.join(tmp_dir, "output.xlsx")
+
+            future = self.survey.save_survey(outpath, validate="async")
+            self.assertEqual(future.result(timeout=60), (True, None))
+
+            with patch.object(FormData, "_validate_sheets") as validate:
+                self.assertIsNone(self.survey.save_survey(outpath, validate="off"))
+            validate.assert_not_called()
+
+            with self.assertRaises(ValueError):
+                self.survey.save_survey(outpath, validate="later")
+
+    def test_validate_invalid_survey(self):
+        self.survey.load_yaml(self.test_file)
+        self.survey.sheets[self.sheet_names.survey].loc[1, "type"] = "select_one missing_list"
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            future = self.survey.save_survey(os.path.join(tmp_dir, "output.xlsx"), validate="async")
+            is_valid, error = future.result(timeout=60)
+        self.assertFalse(is_valid)
+        self.assertIn("[row : 4] List name not in choices sheet: missing_list", str(error))
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -1225,6 +1225,30 @@ class TestSurvey123_322_Preview(unittest.TestCase):
         # Cleanup
         os.remove(self.test_tmp_file)
 
+    def test_jr_choice_name_label(self):
+        tpl = self.tpl.copy()
+        tpl["choices"] = [
+            {"list_name": "test_options", "name": "option1", "label": "Option 1"},
+            {"list_name": "test_options", "name": "option2", "label": "Option 2"},
+        ]
+        tpl["survey"] = [
+            {"type": "select_one test_options", "name": "q1", "label": "Single select question",
+             "survey123py::preview_input": "'option2'"},
+            {"type": "text", "name": "byReference", "label": "Label", "calculation": "jr:choice-name(${q1}, '${q1}')"},
+            {"type": "text", "name": "byName", "label": "Label", "calculation": "jr:choice-name('option1', 'q1')"},
+            {"type": "text", "name": "missing", "label": "Label", "calculation": "jr:choice-name('option9', 'q1')"},
+        ]
+
+        with open(self.test_tmp_file, 'w') as file:
+            yaml.dump(tpl, file)
+
+        results = FormPreviewer(str(self.test_tmp_file)).show_preview()
+        self.assertEqual(results["survey"][1]["calculation"], "Option 2")
+        self.assertEqual(results["survey"][2]["calculation"], "Option 1")
+        self.assertEqual(results["survey"][3]["calculation"], "option9", msg="Unknown choices must return the value")
+
+        os.remove(self.test_tmp_file)
+
     def test_jr_choice_name_empty(self):
         """Test jr_choice_name with empty inputs"""
         from survey123py.formulas import jr_choice_name
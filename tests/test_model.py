@@ -0,0 +1,121 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from survey123py import yaml_loader
+from survey123py.converter import ExcelToYamlConverter
+from survey123py.form import FormData, Sheets
+from survey123py.model import Form, Question
+from survey123py.preview import FormPreviewer
+
+DATA_DIR = Path(__file__).parent / "data"
+
+
+class TestModel(unittest.TestCase):
+
+    def setUp(self):
+        with open(DATA_DIR / "sample_survey_full.yaml") as file:
+            self.data = yaml_loader.load(file)
+
+    def test_round_trip(self):
+        form = Form.from_dict(self.data)
+        self.assertEqual(form.to_dict(), self.data)
+        self.assertEqual([question["name"] for question in form.walk()][:3], ["groupInfo", "assetCode", "assetType"])
+        self.assertEqual(form.settings["form_title"], "Asset Inspection")
+
+    def test_rows(self):
+        form = Form.from_dict({"survey": [
+            {"type": "text", "name": "a", "label": "A", "hint": "Hint"},
+            {"type": "text", "name": "b", "hint": "Other", "relevant": "${a} != ''"},
+        ]})
+        first, second = form.questions
+        self.assertIsInstance(first, Question)
+        self.assertEqual(first.get("hint"), "Hint")
+        self.assertNotIn("relevant", first)
+        self.assertIsNone(second.label)
+        with self.assertRaises(KeyError):
+            first["relevant"]
+        with self.assertRaises(AttributeError):
+            first.extra = 1
+
+        first["relevant"] = "true()"
+        second["hint"] = None
+        self.assertEqual(first.to_dict(), {"type": "text", "name": "a", "label": "A", "hint": "Hint", "relevant": "true()"})
+        self.assertEqual(second.to_dict(), {"type": "text", "name": "b", "relevant": "${a} != ''"})
+        # Sparse columns are stored once per sheet with interned names
+        self.assertEqual(form.question_table.columns["hint"], ["Hint", None])
+        column = next(column for column in form.question_table.columns if column == "relevant")
+        self.assertIs(column, "relevant")
+
+    def test_survey_rows(self):
+        form = Form()
+        form.add_survey_rows([
+            [("type", "begin group"), ("name", "site"), ("relevant", "true()")],
+            {"type": "text", "name": "code", "hint": "Code"},
+            {"type": "end group"},
+            [("type", "integer"), ("name", "count")],
+        ])
+        group, count = form.questions
+        self.assertEqual(group.to_dict(), {"type": "group", "name": "site", "label": "", "relevant": "true()", "children": [
+            {"type": "text", "name": "code", "hint": "Code"},
+        ]})
+        self.assertEqual(count.name, "count")
+
+    def test_copy(self):
+        form = Form.from_dict(self.data)
+        copied = form.copy()
+        self.assertEqual(copied.to_dict(), self.data)
+        copied.questions[0].children[0]["hint"] = "Changed"
+        copied.choices[0]["label"] = "Changed"
+        self.assertEqual(form.to_dict(), self.data, "Changing the copy must not change the form")
+
+    def test_deep_nesting(self):
+        survey = [{"type": "text", "name": "leaf"}]
+        for level in range(3000):
+            survey = [{"type": "group", "name": f"g{level}", "children": survey}]
+        form = Form.from_dict({"survey": survey})
+        self.assertEqual(sum(1 for _ in form.walk()), 3001)
+        self.assertEqual(len(form.to_dict()["survey"]), 1)
+
+    def test_form_data(self):
+        survey = FormData("3.22")
+        survey.load_yaml(DATA_DIR / "sample_survey_full.yaml")
+        model = survey.to_model()
+        self.assertIs(model.questions[0].children[0]["required"], True)
+
+        self.assertEqual(model.to_dict()["choices"], list(survey.yaml_data["choices"]))
+
+        from_model = FormData("3.22")
+        from_model.load_model(Form.from_dict(self.data))
+        self.assertEqual(list(from_model.yaml_data["choices"]), list(survey.yaml_data["choices"]))
+        for sheet_name in (Sheets.survey, Sheets.choices, Sheets.settings):
+            self.assertTrue(from_model.sheets[sheet_name].equals(survey.sheets[sheet_name]), sheet_name)
+
+    def test_preview(self):
+        previewer = FormPreviewer(DATA_DIR / "sample_survey_formulas.yaml")
+        model = previewer.to_model()
+        expected = model.to_dict()
+        from_model = FormPreviewer.from_model(model)
+        self.assertIs(from_model.yaml_data["survey"], model.questions, "The rows of the form must be previewed directly")
+        self.assertEqual(from_model.show_preview(), previewer.show_preview())
+        self.assertEqual(from_model.to_model().to_dict(), previewer.to_model().to_dict())
+        self.assertEqual(model.to_dict(), expected, "The output must be written to a copy of the form")
+        self.assertEqual(from_model.get_outputs(), previewer.get_outputs())
+
+    def test_converter(self):
+        survey = FormData("3.22")
+        survey.load_model(Form.from_dict(self.data))
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "survey.xlsx")
+            survey.save_survey(path, validate="off")
+            converter = ExcelToYamlConverter("3.22")
+            form = converter.convert_excel_to_model(path)
+            self.assertEqual(form.to_dict(), Form.from_dict(converter.convert_excel_to_yaml(path)).to_dict())
+        self.assertEqual(form.questions[0].type, "group")
+        self.assertEqual([question.name for question in form.questions[0].children], ["assetCode", "assetType"])
+        self.assertEqual(form.choices[0].list_name, "yes_no")
+
+
+if __name__ == "__main__":
+    unittest.main()
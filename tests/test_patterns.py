@@ -0,0 +1,41 @@
+import time
+import unittest
+
+from survey123py import formulas
+from survey123py.formulas import patterns
+
+
+class TestPatterns(unittest.TestCase):
+
+    def tearDown(self):
+        patterns.set_timeout()
+
+    def test_compile_cache(self):
+        patterns.compile_pattern.cache_clear()
+        self.assertTrue(formulas.regex("^[0-9]+$", "12345"))
+        self.assertFalse(formulas.regex("^[0-9]+$", "12a45"))
+        info = patterns.compile_pattern.cache_info()
+        self.assertEqual((info.hits, info.misses), (1, 1), "Patterns must be compiled once")
+        self.assertEqual(info.maxsize, patterns.CACHE_SIZE)
+
+        # Invalid patterns are cached too and never match
+        self.assertFalse(formulas.regex("[0-9", "1"))
+        self.assertFalse(formulas.regex("[0-9", "1"))
+        self.assertIsNone(patterns.compile_pattern("[0-9"))
+        self.assertEqual(patterns.compile_pattern.cache_info().misses, 2)
+
+    def test_timeout(self):
+        with patterns.use_timeout(0.2):
+            self.assertTrue(formulas.regex("^a+$", "a" * 40))
+            start = time.perf_counter()
+            with self.assertRaisesRegex(ValueError, "took longer than 0.2 seconds"):
+                formulas.regex("^(a+)+$", "a" * 40 + "b")
+            self.assertLess(time.perf_counter() - start, 2)
+        self.assertIsNone(patterns._timeout, "The previous budget must be restored")
+
+        with self.assertRaises(ValueError):
+            patterns.set_timeout(0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,14 @@
 import unittest
 from survey123py.form import FormData, Sheets
 from survey123py.preview import FormPreviewer
+from survey123py import formulas
+from survey123py.formulas import selections
 from pathlib import Path
+import os
+import tempfile
+import yaml
+import pandas as pd
+from unittest.mock import patch
 
 
 class TestSurvey123_322_Preview(unittest.TestCase):
@@ -28,4 +35,207 @@ class TestSurvey123_322_Preview(unittest.TestCase):
         # Test parsing an invalid survey file
         # It should raise a value error due to ${} variable not found in the context
         with self.assertRaises(ValueError) as context:
-            self.preview_error.show_preview()
\ No newline at end of file
+            self.preview_error.show_preview()
+
+    def test_nested_calculations_and_hints(self):
+        form = {
+            "settings": {"form_title": "Test Form"},
+            "survey": [
+                {"type": "integer", "name": "q1", "label": "Count", "hint": "Enter more than ${q1}", "survey123py::preview_input": 4},
+                {"type": "group", "name": "g1", "label": "Group", "children": [
+                    {"type": "text", "name": "first", "label": "First", "survey123py::preview_input": "a"},
+                    {"type": "text", "name": "double", "label": "Double is ${double}", "calculation": "${q1} * 2",
+                     "relevant": "${q1} > 2", "required": "yes"},
+                ]},
+            ],
+        }
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "form.yaml")
+            with open(path, "w") as file:
+                yaml.dump(form, file)
+            output_yaml = FormPreviewer(path).show_preview()
+
+        self.assertEqual(output_yaml["survey"][0]["hint"], "Enter more than 4")
+        child = output_yaml["survey"][1]["children"][1]
+        self.assertEqual(child["calculation"], 8)
+        self.assertEqual(child["label"], "Double is 8")
+        self.assertEqual(child["relevant"], True)
+        self.assertEqual(child["required"], "yes")
+
+    def preview_form(self, survey):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "form.yaml")
+            with open(path, "w") as file:
+                yaml.dump({"settings": {"form_title": "Test Form"}, "survey": survey}, file)
+            return FormPreviewer(path)
+
+    def test_calculation_order(self):
+        # total uses a calculation that appears later in the form
+        preview = self.preview_form([
+            {"type": "integer", "name": "q1", "label": "Count", "survey123py::preview_input": 4},
+            {"type": "decimal", "name": "total", "label": "Total ${total}", "calculation": "${subtotal} + 1"},
+            {"type": "decimal", "name": "subtotal", "label": "Subtotal", "calculation": "${q1} * 2"},
+        ])
+        output_yaml = preview.show_preview()
+        self.assertEqual(output_yaml["survey"][1]["calculation"], 9)
+        self.assertEqual(output_yaml["survey"][1]["label"], "Total 9")
+        self.assertEqual(
+            [str(node) for node in preview.graph.downstream([("q1", "input")])],
+            ["${q1}", "${subtotal}", "${total}", "label of ${total}"],
+        )
+
+    def test_circular_calculations(self):
+        with self.assertRaises(ValueError) as context:
+            self.preview_form([
+                {"type": "integer", "name": "q1", "label": "Count", "survey123py::preview_input": 4},
+                {"type": "integer", "name": "a", "label": "A", "calculation": "${b} + ${q1}"},
+                {"type": "integer", "name": "b", "label": "B", "calculation": "${a} + 1"},
+            ])
+        self.assertIn("Circular reference found: ${a} -> ${b} -> ${a}", str(context.exception))
+
+    def test_set_input(self):
+        preview = self.preview_form([
+            {"type": "integer", "name": "q1", "label": "Count", "survey123py::preview_input": 4},
+            {"type": "text", "name": "q2", "label": "Name", "survey123py::preview_input": "Ann"},
+            {"type": "integer", "name": "double", "label": "Double is ${double}", "calculation": "${q1} * 2",
+             "constraint": ". < 10"},
+            {"type": "note", "name": "greeting", "label": "Hello ${q2}", "relevant": "${q1} > 2"},
+        ])
+        outputs = preview.get_outputs()
+        self.assertEqual(outputs["double"]["calculation"], 8)
+        self.assertEqual(outputs["double"]["label"], "Double is 8")
+        self.assertEqual(outputs["double"]["constraint_result"], True)
+        self.assertEqual(outputs["greeting"]["relevant"], True)
+
+        with patch.object(FormPreviewer, "_evaluate_column", wraps=preview._evaluate_column) as evaluate:
+            preview.set_input("q1", 6)
+            outputs = preview.get_outputs()
+        evaluated = sorted(call.args[1] for call in evaluate.call_args_list)
+        self.assertEqual(evaluated, ["constraint", "label", "relevant"], "Only outputs depending on q1 must be evaluated")
+        self.assertEqual(outputs["q1"]["value"], 6)
+        self.assertEqual(outputs["double"]["value"], 12)
+        self.assertEqual(outputs["double"]["label"], "Double is 12")
+        self.assertEqual(outputs["double"]["constraint_result"], False)
+        self.assertEqual(outputs["greeting"]["label"], "Hello Ann")
+
+        preview.set_input("q2", "Bob")
+        self.assertEqual(preview.get_outputs()["greeting"]["label"], "Hello Bob")
+        self.assertEqual(preview.show_preview()["survey"][3]["label"], "Hello Bob")
+
+        with self.assertRaises(ValueError):
+            preview.set_input("double", 1)
+        with self.assertRaises(ValueError):
+            preview.set_input("missing", 1)
+
+    def test_date_input(self):
+        # Example of "Testing Date and Time Functions" in docs/testing-previewing.rst
+        preview = self.preview_form([
+            {"type": "date", "name": "birth_date", "label": "Birth date", "survey123py::preview_input": "1990-05-15"},
+            {"type": "calculate", "name": "birth_timestamp", "calculation": "date(${birth_date})"},
+            {"type": "calculate", "name": "current_time", "calculation": "now()"},
+            {"type": "calculate", "name": "age_days", "calculation": "(${current_time} - ${birth_timestamp}) div (1000 * 60 * 60 * 24)"},
+            {"type": "calculate", "name": "age_years", "calculation": "round(${age_days} div 365.25, 1)"},
+            {"type": "note", "name": "age_display", "label": "Approximate age: ${age_years} years"},
+        ])
+        results = preview.show_preview()
+        self.assertEqual(preview.ctx["birth_date"]["value"], "1990-05-15", "Dates must not be evaluated as expressions")
+        self.assertEqual(results["survey"][1]["calculation"], formulas.date("1990-05-15"))
+        self.assertGreater(results["survey"][4]["calculation"], 30)
+
+    def test_literal_inputs(self):
+        preview = self.preview_form([
+            {"type": "barcode", "name": "code", "label": "Code", "survey123py::preview_input": "2*3"},
+            {"type": "select_one parts", "name": "part", "label": "Part", "survey123py::preview_input": "123-45"},
+            {"type": "select_one parts", "name": "quoted", "label": "Quoted", "survey123py::preview_input": "'a-b'"},
+            {"type": "select_one levels", "name": "level", "label": "Level", "survey123py::preview_input": "-2"},
+            {"type": "acknowledge", "name": "ok", "label": "OK", "survey123py::preview_input": "true()"},
+        ])
+        values = {name: entry["value"] for name, entry in preview.ctx.items()}
+        self.assertEqual(values, {"code": "2*3", "part": "123-45", "quoted": "a-b", "level": -2, "ok": True})
+
+    def test_multi_select_input(self):
+        preview = self.preview_form([
+            {"type": "select_multiple fruits", "name": "fruit", "label": "Fruit",
+             "survey123py::preview_input": "'apple, pear'"},
+            {"type": "note", "name": "apple", "label": "Apple", "relevant": "selected(${fruit}, 'apple')"},
+            {"type": "integer", "name": "total", "label": "Total", "calculation": "count-selected(${fruit})"},
+        ])
+        answer = preview.ctx["fruit"]["value"]
+        self.assertIsInstance(answer, selections.Selection, "Multi-select answers must be parsed once")
+        self.assertEqual(answer, "apple, pear")
+        self.assertEqual(answer.values, ("apple", "pear"))
+        self.assertIs(selections.parse("apple, pear"), answer)
+        self.assertEqual(preview.get_outputs()["apple"]["relevant"], True)
+        self.assertEqual(preview.get_outputs()["total"]["value"], 2)
+
+        preview.set_input("fruit", "kiwi")
+        self.assertEqual(preview.get_outputs()["apple"]["relevant"], False)
+        self.assertEqual(preview.get_outputs()["total"]["value"], 1)
+
+    def test_multi_select_output(self):
+        preview = self.preview_form([
+            {"type": "select_multiple letters", "name": "m", "label": "Letters", "survey123py::preview_input": "'a,b'"},
+            {"type": "calculate", "name": "copy", "label": "Copy", "calculation": "${m}"},
+        ])
+        outputs = preview.get_outputs()
+        self.assertIs(type(outputs["m"]["value"]), str)
+        self.assertIs(type(outputs["copy"]["calculation"]), str)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "preview.yaml")
+            preview.show_preview(path)
+            with open(path) as file:
+                output = yaml.safe_load(file)
+        self.assertEqual(output["survey"][1]["calculation"], "a,b")
+
+    def test_evaluate_batch(self):
+        preview = self.preview_form([
+            {"type": "integer", "name": "age", "label": "Age", "survey123py::preview_input": 30,
+             "constraint": ". >= 0 and . < 120"},
+            {"type": "text", "name": "first", "label": "First name", "survey123py::preview_input": "Ann"},
+            {"type": "select_multiple fruits", "name": "fruit", "label": "Fruit", "survey123py::preview_input": "apple"},
+            {"type": "text", "name": "group", "label": "Group", "calculation": "if(${age} >= 18, 'adult', 'minor')"},
+            {"type": "text", "name": "summary", "label": "Summary", "calculation": "concat(${first}, ' is an ', ${group})",
+             "relevant": "string-length(${first}) > 0"},
+            {"type": "integer", "name": "fruits", "label": "Fruits", "calculation": "count-selected(${fruit}) + ${age} mod 7"},
+        ])
+        scenarios = pd.DataFrame(
+            {"age": [12, 40, 150], "first": ["Bob", "", "Cy"], "fruit": ["apple,pear", "", "kiwi"]},
+            index=["a", "b", "c"],
+        )
+        results = preview.evaluate_batch(scenarios)
+        self.assertEqual(list(results.index), ["a", "b", "c"])
+        self.assertEqual(results["group.calculation"].tolist(), ["minor", "adult", "adult"])
+        self.assertEqual(results["summary.calculation"].tolist(), ["Bob is an minor", " is an adult", "Cy is an adult"])
+        self.assertEqual(results["summary.relevant"].tolist(), [True, False, True])
+        self.assertEqual(results["age.constraint"].tolist(), [True, True, False])
+
+        # Every scenario gives the same outputs as previewing it on its own
+        for label, scenario in scenarios.iterrows():
+            for name, value in scenario.items():
+                preview.set_input(name, value.item() if hasattr(value, "item") else value)
+            outputs = preview.get_outputs()
+            for column in results.columns:
+                name, key = column.split(".")
+                key = "constraint_result" if key == "constraint" else key
+                self.assertEqual(results.at[label, column], outputs[name][key], f"{column} of scenario {label}")
+
+    def test_evaluate_batch_fallback(self):
+        preview = self.preview_form([
+            {"type": "integer", "name": "q1", "label": "Count", "survey123py::preview_input": 4,
+             "constraint": "sqrt(.) < 2"},
+            {"type": "decimal", "name": "q2", "label": "Amount", "survey123py::preview_input": 1.5},
+            {"type": "decimal", "name": "total", "label": "Total", "calculation": "${q1} + ${q2}"},
+        ])
+        # q2 uses the preview input of the YAML file
+        results = preview.evaluate_batch(pd.DataFrame({"q1": [1, -4]}))
+        self.assertEqual(results["total.calculation"].tolist(), [2.5, -2.5])
+        self.assertEqual(results["q1.constraint"].tolist(), [True, "Error: Value must be non-negative"])
+
+        # Empty cells have no input
+        with self.assertRaisesRegex(ValueError, r"Scenario 2: Element \$\{q1\} not found"):
+            preview.evaluate_batch(pd.DataFrame({"q1": [1, 2, None]}))
+        with self.assertRaises(ValueError):
+            preview.evaluate_batch(pd.DataFrame({"total": [1]}))
+        with self.assertRaises(ValueError):
+            preview.evaluate_batch(pd.DataFrame({"missing": [1]}))
+
@@ -0,0 +1,78 @@
+import unittest
+import os
+import tempfile
+from unittest.mock import patch
+
+import pandas as pd
+import yaml
+
+from survey123py.preview import FormPreviewer
+from survey123py.scenarios import run_scenarios, iter_run_scenarios
+
+
+class TestScenarioRunner(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.form_path = os.path.join(self.tmp_dir.name, "form.yaml")
+        survey = [
+            {"type": "integer", "name": "age", "label": "Age", "survey123py::preview_input": 30,
+             "constraint": ". >= 0"},
+            {"type": "text", "name": "pattern", "label": "Pattern", "survey123py::preview_input": "^[a-z]+$"},
+            {"type": "text", "name": "code", "label": "Code", "survey123py::preview_input": "abc"},
+            {"type": "text", "name": "count", "label": "Count", "survey123py::preview_input": "3"},
+            {"type": "text", "name": "group", "label": "Group", "calculation": "if(${age} >= 18, 'adult', 'minor')"},
+            {"type": "calculate", "name": "valid", "label": "Valid", "calculation": "regex(${pattern}, ${code})"},
+            {"type": "calculate", "name": "total", "label": "Total", "calculation": "int(${count}) + ${age}"},
+        ]
+        with open(self.form_path, "w") as file:
+            yaml.dump({"settings": {"form_title": "Test Form"}, "survey": survey}, file)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_run_scenarios_in_process(self):
+        scenarios = [{"age": 10}, {"age": 40, "code": "ABC"}, {"age": 18, "count": "x"}, {"code": None}]
+        results = run_scenarios(self.form_path, scenarios, workers=1, chunksize=3)
+
+        self.assertEqual([result.scenario for result in results], [0, 1, 2, 3])
+        self.assertEqual(results[0].outputs["group.calculation"], "minor")
+        self.assertEqual(results[0].outputs["valid.calculation"], True)
+        self.assertEqual(results[1].outputs["valid.calculation"], False)
+        self.assertEqual(results[1].outputs["total.calculation"], 43)
+        # An invalid input or a missing input only fails its own scenario
+        self.assertFalse(results[2].success)
+        self.assertIn("ValueError", results[2].error)
+        self.assertFalse(results[3].success)
+        self.assertIn("${code} not found", results[3].error)
+        self.assertTrue(results[1].success, results[1].error)
+
+    def test_run_scenarios_workers(self):
+        scenarios = pd.DataFrame({"age": list(range(-5, 45))}, index=[f"case{i}" for i in range(50)])
+        results = list(iter_run_scenarios(self.form_path, scenarios, workers=2, chunksize=7))
+
+        self.assertEqual([result.scenario for result in results], list(scenarios.index), "Results must be in the order of the scenarios")
+        for age, result in zip(scenarios["age"], results):
+            self.assertTrue(result.success, result.error)
+            self.assertEqual(result.outputs["group.calculation"], "adult" if age >= 18 else "minor")
+            self.assertEqual(result.outputs["age.constraint"], age >= 0)
+
+    def test_unknown_columns(self):
+        with patch.object(FormPreviewer, "evaluate_batch") as evaluate_batch:
+            with self.assertRaises(ValueError) as context:
+                run_scenarios(self.form_path, pd.DataFrame({"agee": [1, 2]}), workers=2)
+            self.assertIn("${agee} not found", str(context.exception))
+            with self.assertRaises(ValueError):
+                run_scenarios(self.form_path, [{"age": 1}, {"total": 3}], workers=1)
+            # Keys first used in a later chunk are checked when the chunk is read
+            with self.assertRaises(ValueError):
+                run_scenarios(self.form_path, [{"age": 1}, {"agee": 2}], workers=1, chunksize=1)
+        evaluate_batch.assert_called_once()
+
+    def test_invalid_chunksize(self):
+        with self.assertRaises(ValueError):
+            run_scenarios(self.form_path, [{"age": 1}], chunksize=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
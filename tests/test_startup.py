@@ -0,0 +1,37 @@
+import subprocess
+import sys
+import unittest
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+HEAVY_MODULES = ("pandas", "openpyxl", "pyxform", "arcgis")
+
+
+class TestStartup(unittest.TestCase):
+
+    def loaded_modules(self, code: str) -> list:
+        check = f"\nimport sys\nprint(','.join(name for name in {HEAVY_MODULES!r} if name in sys.modules))"
+        output = subprocess.run(
+            [sys.executable, "-c", code + check], cwd=REPO_DIR, capture_output=True, text=True, check=True,
+        ).stdout
+        return [name for name in output.splitlines()[-1].split(",") if name]
+
+    def test_package_import_is_lazy(self):
+        self.assertEqual(self.loaded_modules("import survey123py"), [])
+        self.assertEqual(self.loaded_modules("import survey123py.formulas"), [])
+        self.assertEqual(self.loaded_modules("import main"), [], "The CLI must only import what a command needs")
+
+    def test_lazy_attributes(self):
+        import survey123py
+        from survey123py.form import FormData
+
+        self.assertIs(survey123py.FormData, FormData)
+        self.assertIn("FormData", dir(survey123py))
+        self.assertIn("convert_excel_to_yaml", survey123py.__all__)
+        with self.assertRaises(AttributeError):
+            survey123py.Missing
+        self.assertIn("pandas", self.loaded_modules("from survey123py import FormData"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import unittest
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+from survey123py import templates
+from survey123py.form import FormData, Sheets
+from survey123py.templates import get_template, clear_template_cache, build_snapshot
+from unittest.mock import patch
+
+
+class TestTemplateRegistry(unittest.TestCase):
+
+    def setUp(self):
+        clear_template_cache()
+
+    def tearDown(self):
+        clear_template_cache()
+
+    def test_template_is_cached(self):
+        template = get_template("3.22")
+        self.assertIs(get_template("3.22"), template, "Template should only be parsed once")
+        self.assertEqual(template.form_version, "3.22")
+        self.assertIn(Sheets.survey, template.sheets)
+        self.assertIn(Sheets.survey, template.columns)
+
+    def test_unsupported_version(self):
+        with self.assertRaises(ValueError):
+            get_template("1.0")
+
+    def test_form_data_sheets_are_independent(self):
+        survey1 = FormData("3.22")
+        survey2 = FormData("3.22")
+        survey1.sheets[Sheets.choices].loc[0, "name"] = "changed"
+
+        self.assertNotEqual(survey2.sheets[Sheets.choices].loc[0, "name"], "changed")
+        self.assertNotEqual(get_template("3.22").sheets[Sheets.choices].loc[0, "name"], "changed")
+
+
+class TestTemplateFiles(unittest.TestCase):
+    """Tests that work on a temporary copy of the template files."""
+
+    def setUp(self):
+        clear_template_cache()
+        self.tmp_dir = tempfile.mkdtemp()
+        self.original_paths = templates.TEMPLATE_PATHS["3.22"]
+        self.paths = {
+            "survey": Path(shutil.copy(self.original_paths["survey"], self.tmp_dir)),
+            "columns": Path(shutil.copy(self.original_paths["columns"], self.tmp_dir)),
+            "snapshot": Path(self.tmp_dir) / "template_3.22.pkl",
+        }
+        templates.TEMPLATE_PATHS["3.22"] = self.paths
+
+    def tearDown(self):
+        templates.TEMPLATE_PATHS["3.22"] = self.original_paths
+        shutil.rmtree(self.tmp_dir)
+        clear_template_cache()
+
+    def test_modified_template_is_reloaded(self):
+        template = get_template("3.22")
+
+        stat = self.paths["columns"].stat()
+        os.utime(self.paths["columns"], (stat.st_atime, stat.st_mtime + 10))
+        self.assertIsNot(get_template("3.22"), template, "Modified template should be reloaded")
+
+    def test_snapshot_is_used(self):
+        snapshot_path = build_snapshot("3.22")
+        self.assertTrue(snapshot_path.exists())
+
+        with patch.object(templates, "_parse_template_files", side_effect=AssertionError("Workbook should not be parsed")):
+            template = get_template("3.22")
+        self.assertEqual(template.form_version, "3.22")
+        self.assertEqual(template.columns[Sheets.survey]["type"], "A")
+
+    def test_stale_snapshot_is_ignored(self):
+        build_snapshot("3.22")
+        with open(self.paths["columns"], "a") as f:
+            f.write("\n")
+
+        with patch.object(templates, "_parse_template_files", wraps=templates._parse_template_files) as parse:
+            get_template("3.22")
+        parse.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import os
+import tempfile
+import unittest
+
+import yaml
+
+from survey123py import tree
+from survey123py.form import FormData, Sheets
+from survey123py.preview import FormPreviewer
+
+SURVEY = [
+    {"type": "text", "name": "site", "label": "Site"},
+    {"type": "group", "name": "inspection", "label": "Inspection", "relevant": "${site} != ''", "children": [
+        {"type": "repeat", "name": "defects", "label": "Defects", "repeat_count": 2, "children": [
+            {"type": "text", "name": "defect", "label": "Defect"},
+            {"type": "group", "name": "photos", "label": "Photos", "children": []},
+        ]},
+        {"type": "integer", "name": "score", "label": "Score"},
+    ]},
+]
+
+
+class TestTree(unittest.TestCase):
+
+    def test_flatten(self):
+        rows = list(tree.flatten(SURVEY))
+        self.assertEqual([row["type"] for row in rows], [
+            "text", "begin group", "begin repeat", "text", "begin group", "end group", "end repeat", "integer", "end group",
+        ])
+        self.assertEqual(rows[1]["relevant"], "${site} != ''", "Columns of groups must be kept")
+        self.assertEqual(rows[2]["repeat_count"], 2)
+        self.assertNotIn("children", rows[1])
+        self.assertEqual(tree.unflatten(rows), SURVEY)
+
+    def test_walk(self):
+        names = [item["name"] for item in tree.walk(SURVEY)]
+        self.assertEqual(names, ["site", "inspection", "defects", "defect", "photos", "score"])
+
+    def test_deep_nesting(self):
+        depth = 5000
+        survey = [{"type": "text", "name": "leaf", "label": "Leaf"}]
+        for level in range(depth):
+            survey = [{"type": "group" if level % 2 else "repeat", "name": f"g{level}", "label": "", "children": survey}]
+        rows = list(tree.flatten(survey))
+        self.assertEqual(len(rows), 2 * depth + 1)
+        self.assertEqual(rows[depth]["name"], "leaf")
+        # Nested items are compared as rows, since comparing them directly would recurse
+        self.assertEqual(list(tree.flatten(tree.unflatten(rows))), rows)
+        self.assertEqual(sum(1 for _ in tree.walk(survey)), depth + 1)
+
+    def test_unmatched_end(self):
+        with self.assertWarnsRegex(UserWarning, "Unmatched end statement: end group"):
+            items = tree.unflatten([{"type": "end group"}, {"type": "begin group", "name": "g"}, {"type": "text", "name": "q"}])
+        self.assertEqual(items, [{"type": "group", "name": "g", "label": "", "children": [{"type": "text", "name": "q"}]}])
+
+    def test_nested_form(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "form.yaml")
+            survey = [dict(SURVEY[0], **{"survey123py::preview_input": "A"})] + SURVEY[1:]
+            with open(path, "w") as file:
+                yaml.dump({"settings": {"form_title": "Test Form"}, "survey": survey}, file)
+            form = FormData("3.22")
+            form.load_yaml(path)
+            previewer = FormPreviewer(path)
+
+        sheet = form.sheets[Sheets.survey]
+        self.assertEqual(sheet["type"].tolist()[2], "begin repeat")
+        self.assertNotIn("children", sheet.columns)
+        self.assertIn("score", [item["name"] for item in previewer._questions()])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+import math
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from survey123py import formulas
+from survey123py.expressions import compile_expression
+from survey123py.formulas import vectorized
+from survey123py.vectorized import evaluate_vectorized, value_kind
+
+
+class TestVectorized(unittest.TestCase):
+
+    def assertMatchesScalar(self, source, values, current=None):
+        """
+        Check the vectorized result of every row against Expression.evaluate.
+        """
+        expression = compile_expression(source)
+        result = evaluate_vectorized(expression, values, current=current)
+        rows = pd.DataFrame(values)
+        for row, (_, scenario) in enumerate(rows.iterrows()):
+            row_values = {name: value.item() if hasattr(value, "item") else value for name, value in scenario.items()}
+            expected = expression.evaluate(row_values, current=None if current is None else current.tolist()[row])
+            actual = result.iloc[row] if isinstance(result, pd.Series) else result
+            if isinstance(expected, float) and math.isnan(expected):
+                self.assertTrue(math.isnan(actual), f"{source} row {row}")
+            else:
+                self.assertEqual(actual, expected, f"{source} row {row}")
+        return result
+
+    def test_arithmetic(self):
+        values = {"a": pd.Series([7, -7, 5, 0]), "b": pd.Series([3, 3, 0, 0]), "c": pd.Series(["2", " 4 ", "x", ""])}
+        for source in ("${a} + ${b} * 2", "${a} div ${b}", "${a} mod ${b}", "-${a} mod 2.5", "${a} + ${c}", "-${c}"):
+            self.assertMatchesScalar(source, values)
+
+    def test_comparisons(self):
+        values = {"a": pd.Series([1, 2, 10]), "s": pd.Series(["1", "10", "abc"]), "t": pd.Series(["b", "a", "abc"])}
+        for source in ("${a} = ${s}", "${a} != ${s}", "${s} < ${t}", "${a} >= ${s}", "${a} > 1 and ${t} = 'a'",
+                       "${a} = 10 or not(${s})", "${t} = 'abc'"):
+            self.assertMatchesScalar(source, values)
+
+    def test_functions(self):
+        values = {"name": pd.Series(["Ann", "", "Bob"]), "fruit": pd.Series(["apple, pear", "", "kiwi"]),
+                  "n": pd.Series([1, 2, 3])}
+        for source in ("concat(${name}, '!')", "if(contains(${name}, 'n'), 'yes', ${n})", "string-length(${name})",
+                       "coalesce(${name}, 'none')", "count(${name}, ${n}, '')", "selected(${fruit}, 'pear')",
+                       "count-selected(${fruit})", "string(${n})", "starts-with(${name}, 'B')"):
+            self.assertMatchesScalar(source, values)
+
+    def test_multi_select_functions(self):
+        values = {"fruit": pd.Series(["apple, pear", "", "kiwi,,pear", "apple, pear"])}
+        for source in ("selected(${fruit}, 'pear')", "selected(${fruit}, ' pear')", "selected-at(${fruit}, 1)",
+                       "selected-at(${fruit}, 5)", "count-selected(${fruit})"):
+            self.assertMatchesScalar(source, values)
+
+    def test_current(self):
+        self.assertMatchesScalar(". >= 2 and . < ${max}", {"max": pd.Series([10, 10, 10])}, current=pd.Series([1, 5, 12]))
+
+    def test_value_kind(self):
+        self.assertEqual(value_kind(pd.Series([1.5])), "number")
+        self.assertEqual(value_kind(pd.Series(["a"], dtype=object)), "string")
+        self.assertEqual(value_kind(pd.Series([True])), "bool")
+        self.assertEqual(value_kind(pd.Series(["a", 1], dtype=object)), "object")
+        self.assertEqual(value_kind(None), "object")
+
+    def test_math_functions(self):
+        values = {"x": pd.Series([0.25, 4.0, 9.0]), "n": pd.Series([2, 3, 4])}
+        for source in ("sqrt(${x}) + pow(${n}, 2)", "round(${x} * 10)", "round(${x}, 1)", "max(${x}, ${n}, 1)",
+                       "sum(${x}, ${n})", "log(${x}) + exp(${n})", "cos(${x} * pi())"):
+            self.assertMatchesScalar(source, values)
+
+
+class TestVectorizedFormulas(unittest.TestCase):
+
+    def test_matches_scalar_formulas(self):
+        values = [0.5, 1.0, 2.5, 3.5, 10.0]
+        for name in ("acos", "asin", "atan", "cos", "sin", "tan", "exp", "exp10", "log", "log10", "sqrt", "round"):
+            result = getattr(vectorized, name)(pd.Series(values))
+            for value, actual in zip(values, result):
+                try:
+                    expected = getattr(formulas, name)(value)
+                except ValueError:
+                    self.assertTrue(np.isnan(actual), f"{name}({value})")
+                else:
+                    self.assertAlmostEqual(actual, expected, msg=f"{name}({value})")
+
+    def test_domain_errors_are_nan(self):
+        result = vectorized.sqrt(pd.Series([4, -1, None], index=["a", "b", "c"]))
+        self.assertEqual(list(result.index), ["a", "b", "c"])
+        self.assertEqual(result["a"], 2.0)
+        self.assertTrue(result[["b", "c"]].isna().all())
+        self.assertTrue(np.isnan(vectorized.log(0)))
+        self.assertTrue(np.isnan(vectorized.acos(np.array([2.0])))[0])
+        self.assertTrue(np.isnan(vectorized.pow(-8, 1 / 3)))
+
+    def test_reductions(self):
+        a = pd.Series([1, None, "x"])
+        b = pd.Series([5, 2, ""])
+        self.assertEqual(vectorized.sum(a, b, 1).tolist(), [7.0, 3.0, 1.0])
+        self.assertEqual(vectorized.max(a, b).tolist()[:2], [5.0, 2.0])
+        self.assertTrue(np.isnan(vectorized.min(a, b).iloc[2]), "Rows without a number return NaN")
+        self.assertEqual(vectorized.round(pd.Series([2.5, 3.5, 1.234]), pd.Series([0, 0, 2])).tolist(), [2.0, 4.0, 1.23])
+        values = pd.Series([2.675, 1.005, -0.125, None])
+        for ndigits in (1, 2, -1):
+            expected = [formulas.round(value, ndigits) for value in values[:3]]
+            self.assertEqual(vectorized.round(values, ndigits).tolist()[:3], expected, f"ndigits={ndigits}")
+        self.assertTrue(np.isnan(vectorized.round(values, 2).iloc[3]))
+
+
+if __name__ == "__main__":
+    unittest.main()
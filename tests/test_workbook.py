@@ -0,0 +1,58 @@
+import unittest
+import os
+import tempfile
+
+import openpyxl
+
+from survey123py.form import Sheets
+from survey123py.templates import get_template
+
+
+class TestTemplateWorkbook(unittest.TestCase):
+
+    def setUp(self):
+        self.template = get_template("3.22")
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.outpath = os.path.join(self.tmp_dir.name, "output.xlsx")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_workbook_is_shared(self):
+        self.assertIs(self.template.workbook, get_template("3.22").workbook)
+
+    def test_save_rows(self):
+        columns = self.template.columns[Sheets.survey]
+        rows = [
+            ("text", "q1", "Fish & <Chips>", None, None, None, True) + (None,) * (len(columns) - 7),
+            ("integer", "q2", " padded ", None, None, None, None) + (None,) * (len(columns) - 7),
+        ]
+        self.template.workbook.save(self.outpath, {Sheets.survey: (rows, columns, 3)})
+
+        wb = openpyxl.load_workbook(self.outpath)
+        ws = wb[Sheets.survey]
+        self.assertEqual(ws["A1"].value, "type", "Template column titles must be kept")
+        self.assertTrue(ws["A1"].has_style, "Template styles must be kept")
+        self.assertEqual(ws["C3"].value, "Fish & <Chips>")
+        self.assertEqual(ws["G3"].value, True)
+        self.assertEqual(ws["C4"].value, " padded ")
+        self.assertIsNone(ws["D3"].value)
+        self.assertEqual(ws.max_row, 4)
+
+        # Sheets that are not written keep the template content
+        ws = wb[Sheets.choices]
+        self.assertEqual(ws["A3"].value, "yes_no")
+        self.assertEqual(len(wb.sheetnames), 9)
+
+    def test_replace_template_rows(self):
+        columns = self.template.columns[Sheets.choices]
+        rows = [("colors", "red", "Red", None, None, None, None, None)]
+        self.template.workbook.save(self.outpath, {Sheets.choices: (rows, columns, 3)})
+
+        ws = openpyxl.load_workbook(self.outpath)[Sheets.choices]
+        self.assertEqual(ws["B3"].value, "red")
+        self.assertIsNone(ws["A4"].value, "Template placeholder rows must be removed")
+
+
+if __name__ == "__main__":
+    unittest.main()
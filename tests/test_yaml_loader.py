@@ -0,0 +1,75 @@
+import os
+import tempfile
+import types
+import unittest
+
+import yaml
+
+from survey123py import yaml_loader
+
+FORM = """
+defaults: &defaults {required: true, hint: Required}
+settings: {form_title: Test Form}
+survey:
+  - <<: *defaults
+    type: text
+    name: a
+  - &b {type: integer, name: b, label: '12'}
+  - *b
+  - {type: date, name: c, default: 2024-01-02, readonly: yes, <<: [*defaults, {hint: Other, label: C}]}
+  - !!str 123
+choices:
+  - {list_name: scores, name: 1, label: One}
+  - &no {list_name: yes_no, name: no, label: null}
+  - *no
+  - <<: *no
+    name: maybe
+"""
+
+
+class TestYamlLoader(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "form.yaml")
+        with open(self.path, "w") as file:
+            file.write(FORM)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_same_data_as_safe_load(self):
+        expected = yaml.safe_load(FORM)
+        self.assertEqual(yaml_loader.load(FORM), expected)
+        self.assertEqual(yaml_loader.load_form(self.path), expected)
+        self.assertEqual(yaml_loader.SafeLoader.__bases__[0] is yaml.CSafeLoader, yaml_loader.LIBYAML)
+
+    def test_streamed_sections(self):
+        streamed = []
+
+        def first(choices):
+            streamed.append(isinstance(choices, types.GeneratorType))
+            return next(choices)
+
+        form = yaml_loader.load_form(self.path, {"choices": first, "settings": lambda settings: settings["form_title"]})
+        self.assertEqual(streamed, [True], "Lists must be passed as an iterator")
+        self.assertEqual(form["choices"], {"list_name": "scores", "name": 1, "label": "One"})
+        self.assertEqual(form["settings"], "Test Form")
+        # The items the function did not read are skipped
+        self.assertEqual(form["survey"], yaml.safe_load(FORM)["survey"])
+
+    def test_errors(self):
+        for text, error in [
+            ("a: 1\n---\nb: 2\n", yaml.composer.ComposerError),
+            ("a: {<<: 1}", yaml.constructor.ConstructorError),
+            ("{[1]: 2}", yaml.constructor.ConstructorError),
+            ("a: [1, 2", yaml.YAMLError),
+        ]:
+            with open(self.path, "w") as file:
+                file.write(text)
+            with self.assertRaises(error):
+                yaml_loader.load_form(self.path)
+
+
+if __name__ == "__main__":
+    unittest.main()